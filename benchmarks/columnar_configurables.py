@@ -0,0 +1,111 @@
+"""Compare row by row and columnar processing of the largest configurable
+scraper sources in the test fixtures. Files are read once and the timings are
+for processing the rows only.
+
+Run from the repository root with: python -m benchmarks.columnar_configurables
+"""
+import copy
+from os.path import join
+from tempfile import TemporaryDirectory
+from timeit import repeat
+
+from hdx.api.configuration import Configuration
+from hdx.location.adminlevel import AdminLevel
+from hdx.location.country import Country
+from hdx.scraper.framework.utilities.reader import Read
+from hdx.utilities.dateparse import parse_date
+from hdx.utilities.useragent import UserAgent
+from scrapers.utilities.configurable import CompiledConfigurableScraper
+
+SOURCES = (
+    ("gam", "subnational"),
+    ("gam", "national"),
+    ("covidtests", "national"),
+    ("cadre_harmonise", "national"),
+    ("cadre_harmonise", "subnational"),
+    ("population", "national"),
+    ("oxcgrt", "national"),
+)
+COUNTRIES = ("AFG", "CAF", "MMR", "PSE", "TCD", "UKR", "VEN", "YEM", "BRA")
+
+
+class ReadOnceScraper(CompiledConfigurableScraper):
+    rows = dict()
+
+    def get_iterator(self):
+        key = (self.name, self.level)
+        if key not in self.rows:
+            headers, iterator = super().get_iterator()
+            # Reading fills in details like the url in the dataset information
+            datasetinfo = dict(self.datasetinfo)
+            del datasetinfo["columnar"]
+            self.rows[key] = headers, list(iterator), datasetinfo
+        headers, rows, datasetinfo = self.rows[key]
+        self.datasetinfo.update(datasetinfo)
+        return headers, iter(rows)
+
+
+def setup(temp_folder):
+    UserAgent.set_global("benchmark")
+    Configuration._create(
+        hdx_read_only=True,
+        hdx_site="prod",
+        project_config_yaml=join("config", "project_configuration.yml"),
+    )
+    configuration = Configuration.read()
+    Country.countriesdata(
+        use_live=False,
+        country_name_overrides=configuration["country_name_overrides"],
+        country_name_mappings=configuration["country_name_mappings"],
+    )
+    configuration["countries_fuzzy_try"] = COUNTRIES
+    today = parse_date("2022-06-03")
+    Read.create_readers(
+        temp_folder,
+        join("tests", "fixtures", "input"),
+        temp_folder,
+        save=False,
+        use_saved=True,
+        today=today,
+    )
+    adminlevel = AdminLevel(configuration)
+    adminlevel.setup_from_admin_info(configuration["admin_info"])
+    return configuration, today, adminlevel
+
+
+def run(configuration, today, adminlevel, name, level_name, columnar):
+    datasetinfo = copy.deepcopy(configuration[f"scraper_{level_name}"][name])
+    datasetinfo["columnar"] = columnar
+    scraper = ReadOnceScraper(
+        name,
+        datasetinfo,
+        level_name,
+        COUNTRIES,
+        adminlevel,
+        level_name,
+        today=today,
+    )
+    scraper.run()
+    return scraper.get_values(level_name), scraper.rowparser.get_maxdate()
+
+
+def main():
+    with TemporaryDirectory() as temp_folder:
+        configuration, today, adminlevel = setup(temp_folder)
+        for name, level_name in SOURCES:
+            args = configuration, today, adminlevel, name, level_name
+            assert run(*args, False) == run(*args, True)
+            key = (name, level_name)
+            no_rows = len(ReadOnceScraper.rows[key][1])
+            timings = list()
+            for columnar in (False, True):
+                best = min(repeat(lambda: run(*args, columnar), number=1, repeat=3))
+                timings.append(f"{best * 1000:.0f} ms")
+            print(
+                f"{name} ({level_name}, {no_rows} rows): row by row "
+                f"{timings[0]}, columnar {timings[1]}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare per-row HXL dict remapping with tuple projection on a 100x inflated
+copy of the COVAX deliveries fixture.
+
+Run from the repository root with: python -m benchmarks.covax_deliveries
+"""
+import csv
+from os.path import join
+from timeit import repeat
+
+from hdx.utilities.text import get_numeric_if_possible
+from scrapers.utilities import project_hxl_rows
+
+INFLATION = 100
+HXLTAGS = (
+    "#country+code",
+    "#meta+vaccine+pipeline",
+    "#meta+vaccine+producer",
+    "#meta+vaccine+funder",
+    "#capacity+vaccine+doses",
+)
+
+
+def load_rows(folder=join("tests", "fixtures", "input")):
+    path = join(
+        folder,
+        "covax_deliveries_2pacx-1vtvzu79pptfaa2syevoqfyrrjy63djwitqu0ffbxiqczoun9k9timwmrvfgg1rbsnlmgyugzseiaye2-pub-gid-1635331605-single-true-output-csv.csv",
+    )
+    with open(path, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return rows[0], rows[1:] * INFLATION
+
+
+def remap_rows(hxlrow, rows, countryiso3s):
+    doses_lookup = dict()
+    for row in rows:
+        newrow = dict()
+        for key in row:
+            newrow[hxlrow[key]] = row[key]
+        countryiso = newrow["#country+code"]
+        if not countryiso or countryiso not in countryiso3s:
+            continue
+        key = f'{countryiso}|{newrow["#meta+vaccine+pipeline"]}|{newrow["#meta+vaccine+producer"]}|{newrow["#meta+vaccine+funder"]}'
+        nodoses = get_numeric_if_possible(newrow["#capacity+vaccine+doses"])
+        if nodoses:
+            doses_lookup[key] = doses_lookup.get(key, 0) + nodoses
+    return [key.split("|") for key in sorted(doses_lookup)]
+
+
+def project_rows(hxlrow, rows, countryiso3s):
+    doses_lookup = dict()
+    for row in project_hxl_rows(iter(rows), hxlrow, HXLTAGS):
+        countryiso = row[0]
+        if not countryiso or countryiso not in countryiso3s:
+            continue
+        nodoses = get_numeric_if_possible(row[4])
+        if nodoses:
+            key = row[:4]
+            doses_lookup[key] = doses_lookup.get(key, 0) + nodoses
+    return sorted(doses_lookup, key=lambda x: "|".join(map(str, x)))
+
+
+def main():
+    hxlrow, rows = load_rows()
+    countryiso3s = {row["ISO3"] for row in rows if row["ISO3"]}
+    assert [list(key) for key in project_rows(hxlrow, rows, countryiso3s)] == remap_rows(
+        hxlrow, rows, countryiso3s
+    )
+    print(f"{len(rows)} rows")
+    for fn in (remap_rows, project_rows):
+        best = min(repeat(lambda: fn(hxlrow, rows, countryiso3s), number=1, repeat=5))
+        print(f"{fn.__name__}: {best * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Compare evaluating the transform and process expressions of configurable
+scrapers as strings with calling compiled expressions for the subnational
+population scraper and the national ourworldindata scraper in the test
+fixtures. Files are read once. The timings are for processing the rows and
+for evaluating the expressions alone on the input value of every row.
+
+Run from the repository root with: python -m benchmarks.expressions
+"""
+import copy
+from tempfile import TemporaryDirectory
+from timeit import repeat
+
+from hdx.scraper.framework.scrapers.configurable_scraper import ConfigurableScraper
+from hdx.scraper.framework.utilities import get_rowval
+
+from benchmarks.columnar_configurables import COUNTRIES, ReadOnceScraper, setup
+from scrapers.utilities.expressions import get_literal, scraper_globals
+
+SOURCES = (("population", "subnational"), ("ourworldindata", "national"))
+
+
+class StringScraper(ReadOnceScraper):
+    def run_scraper(self, iterator):
+        ConfigurableScraper.run_scraper(self, iterator)
+
+
+def get_scraper(configuration, today, adminlevel, name, level_name, scraper_class):
+    datasetinfo = copy.deepcopy(configuration[f"scraper_{level_name}"][name])
+    datasetinfo.setdefault("columnar", False)
+    # The external filter is not in the test fixtures so filter on the
+    # countries instead
+    if datasetinfo.pop("external_filter", None):
+        datasetinfo["prefilter"] += f" and row['#country+code'] in {COUNTRIES}"
+    return scraper_class(
+        name,
+        datasetinfo,
+        level_name,
+        COUNTRIES,
+        adminlevel,
+        level_name,
+        today=today,
+    )
+
+
+def get_expression_functions(scraper, rows):
+    # Functions evaluating each expression of the scraper on the input values
+    # of all filtered rows as strings and compiled
+    subset = scraper.subsets[0]
+    expressions = scraper.expressions[0]
+    valcol = subset["input"][0]
+    rows = scraper.rowparser.filter_sort_rows(iter(rows))
+    vals = [get_rowval(row, valcol) for row in rows]
+    vals = [val for val in vals if val not in (None, "")]
+    adm = "AFG"
+    functions = list()
+    transform = subset.get("transform", {}).get(valcol)
+    if transform:
+        expression = transform.replace(valcol, "val")
+        function = expressions["transform"][valcol]
+        functions.append(
+            (
+                lambda: [
+                    eval(expression, scraper_globals, {"val": val}) for val in vals
+                ],
+                lambda: [function(val) for val in vals],
+            )
+        )
+    population_str = scraper.get_population_str(subset)
+    for process_col, (formula, _) in zip(
+        subset.get("process") or (), expressions["process"]
+    ):
+
+        def evaluate_strings(process_col=process_col):
+            results = list()
+            for val in vals:
+                string = process_col.replace("#population", "#pzbgvjh")
+                string = string.replace(valcol, str(val))
+                string = string.replace("#pzbgvjh", population_str)
+                results.append(
+                    eval(string, scraper_globals, {"self": scraper, "adm": adm})
+                )
+            return results
+
+        def call_compiled(function=formula.function):
+            return [function(scraper, adm, None, get_literal(val)) for val in vals]
+
+        functions.append((evaluate_strings, call_compiled))
+    return len(vals), functions
+
+
+def main():
+    with TemporaryDirectory() as temp_folder:
+        configuration, today, adminlevel = setup(temp_folder)
+        # ourworldindata divides by national population
+        population = get_scraper(
+            configuration, today, adminlevel, "population", "national", ReadOnceScraper
+        )
+        population.run()
+        population.add_population()
+        for name, level_name in SOURCES:
+            args = configuration, today, adminlevel, name, level_name
+            results = list()
+            timings = list()
+            for scraper_class in (StringScraper, ReadOnceScraper):
+                scraper = get_scraper(*args, scraper_class)
+                scraper.run()
+                results.append(
+                    [dict(values) for values in scraper.get_values(level_name)]
+                )
+                headers, iterator = scraper.get_iterator()
+                rows = list(iterator)
+
+                def run_scraper():
+                    # The values are replaced by each run
+                    scraper.run_scraper(iter(rows))
+
+                best = min(repeat(run_scraper, number=1, repeat=5))
+                timings.append(f"{best * 1000:.1f} ms")
+            assert results[0] == results[1]
+            print(
+                f"{name} ({level_name}, {len(rows)} rows): strings "
+                f"{timings[0]}, compiled {timings[1]}"
+            )
+            no_values, functions = get_expression_functions(scraper, rows)
+            for i, (evaluate_strings, call_compiled) in enumerate(functions):
+                assert evaluate_strings() == call_compiled()
+                timings = [
+                    min(repeat(function, number=1, repeat=5))
+                    for function in (evaluate_strings, call_compiled)
+                ]
+                print(
+                    f"  expression {i} on {no_values} values: strings "
+                    f"{timings[0] * 1000:.1f} ms, compiled {timings[1] * 1000:.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Compare per-aggregator regional sums and means with the matrix engine on a
+synthetic 200 country x 300 indicator case.
+
+Run from the repository root with: python -m benchmarks.regional_aggregation
+"""
+import random
+from timeit import timeit
+
+from hdx.scraper.framework.scrapers.aggregator import Aggregator
+from scrapers.utilities.aggregation import AggregationMatrix, MatrixAggregator
+
+NO_COUNTRIES = 200
+NO_INDICATORS = 300
+REGIONS = ("ROAP", "ROCCA", "ROLAC", "ROMENA", "ROSEA", "ROWCA")
+
+
+def get_value(rng, numeric_only):
+    kind = rng.random()
+    if numeric_only:
+        kind = 0.15 + kind * 0.65
+    if kind < 0.1:
+        return None
+    if kind < 0.15:
+        return ""
+    if kind < 0.5:
+        return rng.randint(0, 10_000_000)
+    if kind < 0.8:
+        return rng.random() * 100
+    if kind < 0.9:
+        return str(rng.randint(0, 100_000))
+    return f"{rng.random() * 100:.3f}"
+
+
+def get_data(numeric_only=False, seed=0):
+    rng = random.Random(seed)
+    countries = [f"C{i:03d}" for i in range(NO_COUNTRIES)]
+    adm_aggregation = dict()
+    for countryiso3 in countries:
+        regions = {"GHO", rng.choice(REGIONS)}
+        if rng.random() < 0.3:
+            regions.add("HRPs")
+        adm_aggregation[countryiso3] = regions
+    input_values = dict()
+    for j in range(NO_INDICATORS):
+        values = dict()
+        for countryiso3 in countries:
+            if rng.random() < 0.9:
+                values[countryiso3] = get_value(rng, numeric_only)
+        input_values[f"#indicator+{j}"] = values
+    return adm_aggregation, input_values
+
+
+def get_aggregators(cls, adm_aggregation, input_values):
+    aggregators = list()
+    for j, hxltag in enumerate(input_values):
+        datasetinfo = {"action": "mean" if j % 8 == 0 else "sum", "input": (hxltag,)}
+        headers = {"regional": ((f"Indicator{j}",), (hxltag,))}
+        aggregator = cls(
+            f"indicator_{j}_regional",
+            datasetinfo,
+            headers,
+            adm_aggregation,
+            True,
+            aggregation_scrapers=aggregators,
+        )
+        aggregator.set_input_values_sources(input_values, dict())
+        aggregators.append(aggregator)
+    return aggregators
+
+
+def setup_matrix(aggregators, adm_aggregation, input_values):
+    matrix = AggregationMatrix(adm_aggregation)
+    matrix.set_input_values_sources(input_values, dict())
+    group = list(aggregators)
+    for aggregator in group:
+        aggregator.matrix = matrix
+        aggregator.group = group
+    return group
+
+
+def run(aggregators):
+    for aggregator in list(aggregators):
+        aggregator.run()
+    return {x.name: x.get_values("regional")[0] for x in aggregators}
+
+
+def time_run(cls, adm_aggregation, input_values):
+    # Aggregators are created outside the timings as their output values
+    # can only be filled once
+    times = list()
+    for _ in range(5):
+        aggregators = get_aggregators(cls, adm_aggregation, input_values)
+        if cls is MatrixAggregator:
+            aggregators = setup_matrix(aggregators, adm_aggregation, input_values)
+        times.append(timeit(lambda: run(aggregators), number=1))
+    return min(times)
+
+
+def main():
+    for numeric_only in (False, True):
+        adm_aggregation, input_values = get_data(numeric_only)
+        aggregators = get_aggregators(Aggregator, adm_aggregation, input_values)
+        matrix_aggregators = setup_matrix(
+            get_aggregators(MatrixAggregator, adm_aggregation, input_values),
+            adm_aggregation,
+            input_values,
+        )
+        assert run(matrix_aggregators) == run(aggregators)
+        if numeric_only:
+            kind = "numbers only"
+        else:
+            kind = "numbers, strings and missing values"
+        print(f"{NO_COUNTRIES} countries x {NO_INDICATORS} indicators ({kind})")
+        for cls in (Aggregator, MatrixAggregator):
+            best = time_run(cls, adm_aggregation, input_values)
+            print(f"{cls.__name__}: {best * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compare the memory used by scraper values and the time taken by
+Writer.update_national and Writer.update_subnational when values are dicts
+with when they are Values on a synthetic 80 country x 300 indicator national
+and 20000 pcode x 100 indicator subnational case.
+
+Run from the repository root with: python -m benchmarks.value_store
+"""
+import random
+import tracemalloc
+from timeit import repeat
+from types import SimpleNamespace
+
+from hdx.location.country import Country
+from hdx.scraper.framework.base_scraper import BaseScraper
+from hdx.scraper.framework.outputs.base import BaseOutput
+from hdx.scraper.framework.runner import Runner
+from hdx.scraper.framework.utilities.writer import Writer
+from hdx.utilities.dateparse import parse_date
+from scrapers.utilities.checkpoint import CheckpointRunner
+from scrapers.utilities.values import ValuesScraper
+
+NO_COUNTRIES = 80
+NO_PCODES = 20000
+LEVELS = {"national": (30, 10), "subnational": (20, 5)}
+FILL = 0.7
+
+
+class DictScraper(BaseScraper):
+    def run(self):
+        pass
+
+
+class CompactScraper(ValuesScraper, DictScraper):
+    pass
+
+
+class RowsOutput(BaseOutput):
+    def __init__(self):
+        super().__init__(list())
+        self.tabs = dict()
+
+    def update_tab(self, tabname, values, hxltags=None, limit=None):
+        self.tabs[tabname] = values
+
+
+def get_value(rng, kind):
+    if kind == 0:
+        return rng.randint(0, 10_000_000)
+    if kind == 1:
+        return rng.random() * 100
+    return f"{rng.random():.4f}"
+
+
+def get_adms():
+    countries = [f"C{i:02d}" for i in range(NO_COUNTRIES)]
+    pcodes = [f"{countries[i % NO_COUNTRIES]}{i:05d}" for i in range(NO_PCODES)]
+    return {"national": countries, "subnational": pcodes}
+
+
+def add_scrapers(runner, scraper_class, all_adms, seed=0):
+    rng = random.Random(seed)
+    for level, (no_scrapers, no_indicators) in LEVELS.items():
+        adms = all_adms[level]
+        for i in range(no_scrapers):
+            hxltags = [f"#indicator+{level}+{i}+{j}" for j in range(no_indicators)]
+            headers = {level: (hxltags, hxltags)}
+            scraper = scraper_class(f"{level}_{i}", {}, headers)
+            for j, values in enumerate(scraper.get_values(level)):
+                kind = (i + j) % 3
+                for adm in adms:
+                    if rng.random() < FILL:
+                        values[adm] = get_value(rng, kind)
+            scraper.has_run = True
+            runner.add_custom(scraper)
+
+
+def setup(runner_class, scraper_class, all_adms):
+    runner = runner_class(all_adms["national"], parse_date("2022-06-01"))
+    tracemalloc.start()
+    add_scrapers(runner, scraper_class, all_adms)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return runner, memory
+
+
+def main():
+    Country.countriesdata(use_live=False)
+    all_adms = get_adms()
+    pcodes = all_adms["subnational"]
+    adminlevel = SimpleNamespace(
+        admin_level=1,
+        pcodes=pcodes,
+        pcode_to_iso3={pcode: pcode[:3] for pcode in pcodes},
+        pcode_to_name={pcode: f"Name {pcode}" for pcode in pcodes},
+    )
+    results = dict()
+    tabs = None
+    for label, runner_class, scraper_class in (
+        ("dicts", Runner, DictScraper),
+        ("Values", CheckpointRunner, CompactScraper),
+    ):
+        runner, memory = setup(runner_class, scraper_class, all_adms)
+        output = RowsOutput()
+        writer = Writer(runner, {"json": output})
+        national = min(
+            repeat(
+                lambda: writer.update_national(all_adms["national"]),
+                number=1,
+                repeat=5,
+            )
+        )
+        subnational = min(
+            repeat(lambda: writer.update_subnational(adminlevel), number=1, repeat=5)
+        )
+        if tabs is None:
+            tabs = output.tabs
+        else:
+            assert output.tabs == tabs
+        results[label] = memory, national, subnational
+    for label, (memory, national, subnational) in results.items():
+        print(
+            f"{label}: {memory / 2**20:.1f} MiB, update_national {national * 1000:.1f} ms, "
+            f"update_subnational {subnational * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
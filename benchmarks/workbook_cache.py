@@ -0,0 +1,94 @@
+"""Compare reading the xls and xlsx sources of the configurable scrapers in the
+test fixtures by parsing them with reading them from a WorkbookCache. Timings
+are for reading the rows of every source in process.
+
+Run from the repository root with: python -m benchmarks.workbook_cache
+"""
+import copy
+from os import listdir
+from os.path import getsize, join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from hdx.scraper.framework.utilities.reader import Read
+from scrapers.utilities.configurable import CompiledConfigurableScraper
+from scrapers.utilities.shared_sources import SharedSources
+from scrapers.utilities.workbooks import WorkbookParser
+
+from .columnar_configurables import COUNTRIES, setup
+
+SOURCES = (
+    ("population", "national"),
+    ("economicindex", "national"),
+    ("gam", "national"),
+    ("covidtests", "national"),
+    ("cadre_harmonise", "national"),
+    ("worldbank", "national"),
+    ("closure_duration", "national"),
+)
+
+
+def read_all(configuration, today, adminlevel, cache_folder=None):
+    scrapers = list()
+    for name, level_name in SOURCES:
+        datasetinfo = copy.deepcopy(configuration[f"scraper_{level_name}"][name])
+        scrapers.append(
+            CompiledConfigurableScraper(
+                name,
+                datasetinfo,
+                level_name,
+                COUNTRIES,
+                adminlevel,
+                level_name,
+                today=today,
+            )
+        )
+    if cache_folder:
+        workbook_parser = WorkbookParser(cache_folder)
+    else:
+        workbook_parser = None
+    shared_sources = SharedSources(dict())
+    original_readers = Read.retrievers
+    shared_sources.setup_readers(workbook_parser)
+    try:
+        start = perf_counter()
+        rows = dict()
+        for scraper in scrapers:
+            headers, iterator = scraper.get_iterator()
+            rows[scraper.name] = headers, list(iterator)
+        seconds = perf_counter() - start
+    finally:
+        if workbook_parser:
+            workbook_parser.close()
+        shared_sources.close()
+        Read.retrievers = original_readers
+    return seconds, rows
+
+
+def main():
+    with TemporaryDirectory() as temp_folder, TemporaryDirectory() as cache_folder:
+        configuration, today, adminlevel = setup(temp_folder)
+        parse_seconds, expected = read_all(configuration, today, adminlevel)
+        save_seconds, rows = read_all(configuration, today, adminlevel, cache_folder)
+        assert rows == expected
+        cache_bytes = sum(
+            getsize(join(cache_folder, filename)) for filename in listdir(cache_folder)
+        )
+        best = None
+        for _ in range(3):
+            seconds, rows = read_all(configuration, today, adminlevel, cache_folder)
+            assert rows == expected
+            if best is None or seconds < best:
+                best = seconds
+        no_rows = sum(len(rows) for _, rows in expected.values())
+        print(
+            f"{len(SOURCES)} workbooks, {no_rows} rows, "
+            f"cache {cache_bytes / 1048576:.1f} MB"
+        )
+        print(f"parsing: {parse_seconds * 1000:.0f} ms")
+        print(f"parsing and caching: {save_seconds * 1000:.0f} ms")
+        print(f"from cache: {best * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,6 @@ from os.path import join, expanduser
 from hdx.api.configuration import Configuration
 from hdx.facades.keyword_arguments import facade
 from hdx.scraper.framework.outputs.base import BaseOutput
-from hdx.scraper.framework.outputs.excelfile import ExcelFile
-from hdx.scraper.framework.outputs.googlesheets import GoogleSheets
-from hdx.scraper.framework.outputs.json import JsonFile
 from hdx.scraper.framework.utilities import string_params_to_dict
 from hdx.scraper.framework.utilities.reader import Read
 from hdx.utilities.dateparse import now_utc
@@ -16,6 +13,15 @@ from hdx.utilities.easy_logging import setup_logging
 from hdx.utilities.errors_onexit import ErrorsOnExit
 from hdx.utilities.path import temp_dir
 from scrapers.main import get_indicators
+from scrapers.utilities.checkpoint import Checkpoint
+from scrapers.utilities.deadlines import Deadlines
+from scrapers.utilities.delta import DeltaFeed
+from scrapers.utilities.fallbacks import save_fallbacks_index
+from scrapers.utilities.http_pool import HTTPPool
+from scrapers.utilities.json_output import CompressedJsonFile
+from scrapers.utilities.scheduler import Scheduler
+from scrapers.utilities.shards import Shard, ShardsCheckpoint, start_shard
+from scrapers.utilities.snapshot import read_project_configuration
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -75,7 +81,93 @@ def parse_args():
     parser.add_argument(
         "-usv", "--use_saved", default=False, action="store_true", help="Use saved data"
     )
+    parser.add_argument(
+        "-sn",
+        "--snapshot_folder",
+        default=None,
+        help="Folder for configuration, country and parsed workbook snapshots",
+    )
+    parser.add_argument(
+        "-cf",
+        "--checkpoint_folder",
+        default=None,
+        help="Folder for checkpoints of scraper state",
+    )
+    parser.add_argument(
+        "-rs",
+        "--resume",
+        default=None,
+        help="Id of checkpointed run to resume",
+    )
+    parser.add_argument(
+        "-sd",
+        "--schedule",
+        default=False,
+        action="store_true",
+        help="Keep running, refreshing scrapers when due",
+    )
+    parser.add_argument(
+        "-sh",
+        "--shard",
+        default=None,
+        help="Run only the countries of shard i of N given as i/N",
+    )
+    parser.add_argument(
+        "-sf",
+        "--shard_folder",
+        default=None,
+        help="Folder for the state of shards",
+    )
+    parser.add_argument(
+        "-ms",
+        "--merge_shards",
+        default=False,
+        action="store_true",
+        help="Merge the shards in the shard folder and write the outputs",
+    )
+    parser.add_argument(
+        "-df",
+        "--delta",
+        default=False,
+        action="store_true",
+        help="Save changes to json in a delta feed",
+    )
+    parser.add_argument(
+        "-sr",
+        "--series_files",
+        default=False,
+        action="store_true",
+        help="Save time series in json to a file per country",
+    )
+    parser.add_argument(
+        "-fj",
+        "--fast_json",
+        default=False,
+        action="store_true",
+        help="Use a faster json encoder whose output is not byte-identical",
+    )
+    parser.add_argument(
+        "-dl",
+        "--deadline",
+        default=False,
+        action="store_true",
+        help="Use fallbacks for scrapers that go over their time budgets",
+    )
     args = parser.parse_args()
+    if args.shard or args.merge_shards:
+        if args.shard and args.merge_shards:
+            parser.error("--shard and --merge_shards cannot be used together")
+        if not (args.shard_folder or getenv("SHARD_FOLDER")):
+            parser.error("--shard and --merge_shards require a shard folder")
+        if args.resume or args.schedule or args.checkpoint_folder:
+            parser.error(
+                "--shard and --merge_shards cannot be used with checkpoints"
+            )
+    if not (args.checkpoint_folder or getenv("CHECKPOINT_FOLDER")):
+        if args.resume:
+            parser.error("--resume requires a checkpoint folder")
+        if args.schedule:
+            parser.error("--schedule requires a checkpoint folder")
     return args
 
 
@@ -93,13 +185,40 @@ def main(
     hrp_countries_override,
     save,
     use_saved,
+    snapshot_folder,
+    checkpoint_folder,
+    resume,
+    schedule,
+    shard=None,
+    shard_folder=None,
+    merge_shards=False,
+    deadline=False,
+    delta=False,
+    series_files=False,
+    fast_json=False,
     **ignore,
 ):
     logger.info(f"##### {lookup} version {VERSION:.1f} ####")
     configuration = Configuration.read()
-    with ErrorsOnExit() as errors_on_exit:
+    if scrapers_to_run:
+        logger.info(f"Updating only scrapers: {scrapers_to_run}")
+    tabs = configuration["tabs"]
+    if updatetabs is None:
+        updatetabs = list(tabs.keys())
+        logger.info("Updating all tabs")
+    else:
+        logger.info(f"Updating only these tabs: {updatetabs}")
+    if deadline:
+        deadlines = Deadlines(configuration["deadlines"])
+    else:
+        deadlines = None
+    if series_files and not nojson:
+        series_folder = configuration["json"]["series_folder"]
+    else:
+        series_folder = None
+
+    def run_indicators(today, checkpoint, errors_on_exit, shard=None):
         with temp_dir() as temp_folder:
-            today = now_utc()
             Read.create_readers(
                 temp_folder,
                 "saved_data",
@@ -112,20 +231,18 @@ def main(
                 param_auths=param_auths,
                 today=today,
             )
-            if scrapers_to_run:
-                logger.info(f"Updating only scrapers: {scrapers_to_run}")
-            tabs = configuration["tabs"]
-            if updatetabs is None:
-                updatetabs = list(tabs.keys())
-                logger.info("Updating all tabs")
-            else:
-                logger.info(f"Updating only these tabs: {updatetabs}")
+            HTTPPool.mount_readers()
             noout = BaseOutput(updatetabs)
-            if excel_path:
+            # Shards do not write outputs
+            if excel_path and not shard:
+                from hdx.scraper.framework.outputs.excelfile import ExcelFile
+
                 excelout = ExcelFile(excel_path, tabs, updatetabs)
             else:
                 excelout = noout
-            if gsheet_auth:
+            if gsheet_auth and not shard:
+                from hdx.scraper.framework.outputs.googlesheets import GoogleSheets
+
                 gsheets = GoogleSheets(
                     configuration["googlesheets"],
                     gsheet_auth,
@@ -135,10 +252,16 @@ def main(
                 )
             else:
                 gsheets = noout
-            if nojson:
+            if nojson or shard:
                 jsonout = noout
             else:
-                jsonout = JsonFile(configuration["json"], updatetabs)
+                if fast_json:
+                    encoder = "fast"
+                else:
+                    encoder = "canonical"
+                jsonout = CompressedJsonFile(
+                    configuration["json"], updatetabs, encoder
+                )
             outputs = {"gsheets": gsheets, "excel": excelout, "json": jsonout}
             countries_to_save = get_indicators(
                 configuration,
@@ -149,9 +272,57 @@ def main(
                 gho_countries_override,
                 hrp_countries_override,
                 errors_on_exit,
+                snapshot_folder=snapshot_folder,
+                checkpoint=checkpoint,
+                shard=shard,
+                deadlines=deadlines,
+                series_folder=series_folder,
             )
+            if shard:
+                HTTPPool.report()
+                return
             jsonout.save(countries_to_save=countries_to_save)
+            if not nojson:
+                json_configuration = configuration["json"]
+                jsonout.report()
+                save_fallbacks_index(json_configuration["output"], jsonout.json)
+                if delta:
+                    delta_feed = DeltaFeed(
+                        json_configuration["output"],
+                        json_configuration["delta_full_every"],
+                    )
+                    delta_feed.save(jsonout.json)
             excelout.save()
+            HTTPPool.report()
+
+    HTTPPool.setup(configuration["http_pool"])
+    if schedule:
+        scheduler = Scheduler(checkpoint_folder, configuration["schedule"])
+        scheduler.run(run_indicators)
+        return
+    with ErrorsOnExit() as errors_on_exit:
+        if shard:
+            if gho_countries_override:
+                gho_countries = gho_countries_override
+            else:
+                gho_countries = configuration["gho"]
+            shard = Shard.parse(shard, gho_countries)
+            checkpoint = start_shard(shard_folder, shard, now_utc())
+            run_indicators(checkpoint.today, checkpoint, errors_on_exit, shard)
+            return
+        if merge_shards:
+            checkpoint = ShardsCheckpoint(shard_folder)
+            today = checkpoint.today
+        elif resume:
+            checkpoint = Checkpoint.resume(checkpoint_folder, resume)
+            today = checkpoint.today
+        else:
+            today = now_utc()
+            if checkpoint_folder:
+                checkpoint = Checkpoint.start(checkpoint_folder, today)
+            else:
+                checkpoint = None
+        run_indicators(today, checkpoint, errors_on_exit)
 
 
 if __name__ == "__main__":
@@ -203,12 +374,29 @@ if __name__ == "__main__":
         hrp_countries_override = args.hrp_countries_override.split(",")
     else:
         hrp_countries_override = None
+    snapshot_folder = args.snapshot_folder
+    if snapshot_folder is None:
+        snapshot_folder = getenv("SNAPSHOT_FOLDER")
+    checkpoint_folder = args.checkpoint_folder
+    if checkpoint_folder is None:
+        checkpoint_folder = getenv("CHECKPOINT_FOLDER")
+    shard_folder = args.shard_folder
+    if shard_folder is None:
+        shard_folder = getenv("SHARD_FOLDER")
+    project_config_yaml = join("config", "project_configuration.yml")
+    if snapshot_folder:
+        project_config = {
+            "project_config_dict": read_project_configuration(
+                project_config_yaml, snapshot_folder
+            )
+        }
+    else:
+        project_config = {"project_config_yaml": project_config_yaml}
     facade(
         main,
         hdx_read_only=True,
         user_agent_config_yaml=join(expanduser("~"), ".useragents.yaml"),
         user_agent_lookup=lookup,
-        project_config_yaml=join("config", "project_configuration.yml"),
         excel_path=args.excel_path,
         gsheet_auth=gsheet_auth,
         updatesheets=updatesheets,
@@ -222,4 +410,16 @@ if __name__ == "__main__":
         hrp_countries_override=hrp_countries_override,
         save=args.save,
         use_saved=args.use_saved,
+        snapshot_folder=snapshot_folder,
+        checkpoint_folder=checkpoint_folder,
+        resume=args.resume,
+        schedule=args.schedule,
+        shard=args.shard,
+        shard_folder=shard_folder,
+        merge_shards=args.merge_shards,
+        deadline=args.deadline,
+        delta=args.delta,
+        series_files=args.series_files,
+        fast_json=args.fast_json,
+        **project_config,
     )
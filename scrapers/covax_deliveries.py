@@ -3,11 +3,13 @@ import logging
 from hdx.scraper.framework.base_scraper import BaseScraper
 from hdx.utilities.dictandlist import dict_of_lists_add
 from hdx.utilities.text import get_numeric_if_possible
+from scrapers.utilities import project_hxl_rows
+from scrapers.utilities.values import ValuesScraper
 
 logger = logging.getLogger(__name__)
 
 
-class CovaxDeliveries(BaseScraper):
+class CovaxDeliveries(ValuesScraper, BaseScraper):
     def __init__(self, datasetinfo, countryiso3s):
         super().__init__(
             "covax_deliveries",
@@ -28,27 +30,32 @@ class CovaxDeliveries(BaseScraper):
     def run(self) -> None:
         headers, iterator = self.get_reader().read(self.datasetinfo, file_prefix=self.name)
         hxlrow = next(iterator)
+        hxltags = (
+            "#country+code",
+            "#meta+vaccine+pipeline",
+            "#meta+vaccine+producer",
+            "#meta+vaccine+funder",
+            "#capacity+vaccine+doses",
+        )
         doses_lookup = dict()
-        for row in iterator:
-            newrow = dict()
-            for key in row:
-                newrow[hxlrow[key]] = row[key]
-            countryiso = newrow["#country+code"]
+        for row in project_hxl_rows(iterator, hxlrow, hxltags):
+            countryiso = row[0]
             if not countryiso or countryiso not in self.countryiso3s:
                 continue
-            key = f'{countryiso}|{newrow["#meta+vaccine+pipeline"]}|{newrow["#meta+vaccine+producer"]}|{newrow["#meta+vaccine+funder"]}'
-            nodoses = get_numeric_if_possible(newrow["#capacity+vaccine+doses"])
+            nodoses = get_numeric_if_possible(row[4])
             if nodoses:
+                key = row[:4]
                 doses_lookup[key] = doses_lookup.get(key, 0) + nodoses
         producers = self.get_values("national")[0]
         funders = self.get_values("national")[1]
         doses = self.get_values("national")[2]
-        for key in sorted(doses_lookup):
-            countryiso, pipeline, producer, funder = key.split("|")
+        # Order as if the key columns were joined with "|" and sorted as strings
+        for key in sorted(doses_lookup, key=lambda x: "|".join(map(str, x))):
+            countryiso, pipeline, producer, funder = key
             if pipeline == "COVAX":
                 funder = f"{pipeline}/{funder}"
-            dict_of_lists_add(producers, countryiso, producer)
-            dict_of_lists_add(funders, countryiso, funder)
+            dict_of_lists_add(producers, countryiso, str(producer))
+            dict_of_lists_add(funders, countryiso, str(funder))
             dict_of_lists_add(doses, countryiso, str(doses_lookup[key]))
         for countryiso in funders:
             producers[countryiso] = "|".join(producers[countryiso])
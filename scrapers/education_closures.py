@@ -4,10 +4,15 @@ from typing import Dict
 from hdx.scraper.framework.base_scraper import BaseScraper
 from hdx.utilities.dateparse import default_date, parse_date
 
+from .utilities.values import ValuesScraper
+
 logger = logging.getLogger(__name__)
 
 
-class EducationClosures(BaseScraper):
+class EducationClosures(ValuesScraper, BaseScraper):
+    # Read by EducationEnrolment so kept when resuming from a checkpoint
+    checkpoint_attributes = ("fully_closed",)
+
     def __init__(self, datasetinfo: Dict, today, countryiso3s, iso3_to_region):
         super().__init__(
             "education_closures",
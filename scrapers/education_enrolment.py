@@ -1,12 +1,19 @@
 import logging
 
+import numpy
+import pandas as pd
 from hdx.scraper.framework.base_scraper import BaseScraper
-from hdx.utilities.text import get_fraction_str
+from hdx.utilities.text import number_format
+
+from .utilities.values import ValuesScraper
 
 logger = logging.getLogger(__name__)
 
 
-class EducationEnrolment(BaseScraper):
+class EducationEnrolment(ValuesScraper, BaseScraper):
+    levels_012 = ["Pre-primary (both)", "Primary (both)", "Secondary (both)"]
+    level_3 = "Tertiary (both)"
+
     def __init__(self, datasetinfo, closures, countryiso3s, iso3_to_region):
         super().__init__(
             "education_enrolment",
@@ -40,68 +47,60 @@ class EducationEnrolment(BaseScraper):
         self.countryiso3s = countryiso3s
         self.iso3_to_region = iso3_to_region
 
+    @staticmethod
+    def last_valid(series):
+        # Later rows for a country only overwrite earlier ones if they have a value
+        return series.dropna().groupby(level=0, sort=False).last()
+
+    @staticmethod
+    def to_dict(series):
+        return {countryiso: int(value) for countryiso, value in series.items()}
+
     def run(self) -> None:
         learners_headers, learners_iterator = self.get_reader().read(self.datasetinfo, file_prefix="education")
+        columns = ["ISO3"] + self.levels_012 + [self.level_3]
+        df = pd.DataFrame.from_records(
+            [[row.get(column) for column in columns] for row in learners_iterator],
+            columns=columns,
+        )
+        df = df[df["ISO3"].isin(self.countryiso3s)].set_index("ISO3")
+        levels = df[columns[1:]].apply(pd.to_numeric, errors="coerce")
+        l_012 = levels[self.levels_012].sum(axis=1, min_count=1)
+        l_3 = levels[self.level_3]
+        no_learners = levels.sum(axis=1, min_count=1)
+
         learners_012, learners_3, affected_learners = self.get_values("national")
-        all_learners = dict()
+        learners_012.update(self.to_dict(self.last_valid(l_012)))
+        learners_3.update(self.to_dict(self.last_valid(l_3)))
+        all_learners = self.last_valid(no_learners)
+        affected = all_learners[all_learners.index.isin(self.closures.fully_closed)]
+        affected_learners.update(self.to_dict(affected))
 
-        for row in learners_iterator:
-            countryiso = row["ISO3"]
-            if not countryiso or countryiso not in self.countryiso3s:
-                continue
-            l_0 = row["Pre-primary (both)"]
-            l_1 = row["Primary (both)"]
-            l_2 = row["Secondary (both)"]
-            l_3 = row["Tertiary (both)"]
-            l_012 = None
-            if l_0 is not None and l_0 != "-":
-                l_012 = int(l_0)
-            if l_1 is not None and l_1 != "-":
-                l_1 = int(l_1)
-                if l_012 is None:
-                    l_012 = l_1
-                else:
-                    l_012 += l_1
-            if l_2 is not None and l_2 != "-":
-                l_2 = int(l_2)
-                if l_012 is None:
-                    l_012 = l_2
-                else:
-                    l_012 += l_2
-            if l_012 is not None:
-                learners_012[countryiso] = l_012
-            if l_3 == "-":
-                l_3 = None
-            elif l_3 is not None:
-                l_3 = int(l_3)
-                learners_3[countryiso] = l_3
-            no_learners = None
-            if l_012 is not None:
-                no_learners = l_012
-                if l_3:
-                    no_learners += l_3
-            elif l_3 is not None:
-                no_learners = l_3
-            if no_learners is not None:
-                all_learners[countryiso] = no_learners
-                if countryiso in self.closures.fully_closed:
-                    affected_learners[countryiso] = no_learners
-        affected_learners_total = self.get_values("regional")[0]
-        learners_total = dict()
-        for countryiso in all_learners:
-            country_learners = all_learners[countryiso]
-            country_affected_learners = affected_learners.get(countryiso)
-            for region in self.iso3_to_region[countryiso]:
-                learners_total[region] = (
-                    learners_total.get(region, 0) + country_learners
-                )
-                if country_affected_learners is not None:
-                    affected_learners_total[region] = (
-                        affected_learners_total.get(region, 0)
-                        + country_affected_learners
-                    )
-        percentage_affected_learners = self.get_values("regional")[1]
-        for region, no_learners in affected_learners_total.items():
-            percentage_affected_learners[region] = get_fraction_str(
-                no_learners, learners_total[region]
-            )
+        country_region = pd.DataFrame(
+            [
+                (countryiso, region)
+                for countryiso in all_learners.index
+                for region in self.iso3_to_region[countryiso]
+            ],
+            columns=["ISO3", "Region"],
+        )
+        country_region["learners"] = all_learners.reindex(
+            country_region["ISO3"]
+        ).to_numpy()
+        country_region["affected"] = affected.reindex(country_region["ISO3"]).to_numpy()
+        learners_total = country_region.groupby("Region")["learners"].sum()
+        affected_learners_total = (
+            country_region.dropna(subset=["affected"])
+            .groupby("Region", sort=False)["affected"]
+            .sum()
+        )
+        learners_total = learners_total[affected_learners_total.index]
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            fractions = affected_learners_total / learners_total
+        self.get_values("regional")[0].update(self.to_dict(affected_learners_total))
+        self.get_values("regional")[1].update(
+            {
+                region: number_format(fraction) if learners_total[region] else ""
+                for region, fraction in fractions.items()
+            }
+        )
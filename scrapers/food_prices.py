@@ -6,10 +6,13 @@ from hdx.utilities.dictandlist import dict_of_lists_add
 from hdx.utilities.downloader import Download
 from hdx.utilities.text import number_format
 
+from .utilities.http_pool import HTTPPool
+from .utilities.values import ValuesScraper
+
 logger = logging.getLogger(__name__)
 
 
-class FoodPrices(BaseScraper):
+class FoodPrices(ValuesScraper, BaseScraper):
     def __init__(self, datasetinfo, today, countryiso3s):
         super().__init__(
             "food_prices",
@@ -34,7 +37,15 @@ class FoodPrices(BaseScraper):
             "Accept": "application/json",
             "Authorization": f"Bearer {access_token}",
         }
-        downloader = Download(rate_limit={"calls": 1, "period": 0.1}, headers=headers)
+        adapter = HTTPPool.adapter
+        if adapter is not None and adapter.rate_limiter is not None:
+            # Requests to the API are rate limited by host in the HTTP pool
+            downloader = Download(headers=headers)
+        else:
+            downloader = Download(
+                rate_limit={"calls": 1, "period": 0.1}, headers=headers
+            )
+        HTTPPool.mount(downloader.session)
         reader = token_reader.clone(downloader)
 
         def get_list(endpoint, countryiso3, startdate=None):
@@ -6,6 +6,8 @@ from hdx.scraper.framework.base_scraper import BaseScraper
 from hdx.utilities.dictandlist import dict_of_lists_add
 from hdx.utilities.text import earliest_index, get_fraction_str, multiple_replace
 
+from .utilities.values import ValuesScraper
+
 logger = logging.getLogger(__name__)
 
 
@@ -13,7 +15,7 @@ class FTSException(Exception):
     pass
 
 
-class FTS(BaseScraper):
+class FTS(ValuesScraper, BaseScraper):
     def __init__(self, datasetinfo, today, outputs, countryiso3s):
         base_hxltags = [
             "#value+funding+hrp+required+usd",
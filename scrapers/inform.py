@@ -5,10 +5,12 @@ from hdx.scraper.framework.base_scraper import BaseScraper
 from hdx.utilities.dateparse import default_date, parse_date
 from hdx.utilities.dictandlist import dict_of_lists_add
 
+from .utilities.values import ValuesScraper
+
 logger = logging.getLogger(__name__)
 
 
-class Inform(BaseScraper):
+class Inform(ValuesScraper, BaseScraper):
     def __init__(self, datasetinfo, today, countryiso3s):
         super().__init__(
             "inform",
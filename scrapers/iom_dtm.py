@@ -5,11 +5,13 @@ from hdx.data.dataset import Dataset
 from hdx.scraper.framework.base_scraper import BaseScraper
 from hdx.utilities.dictandlist import dict_of_lists_add
 
+from .utilities.values import ValuesScraper
+
 logger = logging.getLogger(__name__)
 
 
-class IOMDTM(BaseScraper):
-    def __init__(self, datasetinfo, today, adminone):
+class IOMDTM(ValuesScraper, BaseScraper):
+    def __init__(self, datasetinfo, today, adminone, countryiso3s=None):
         super().__init__(
             "iom_dtm",
             datasetinfo,
@@ -17,6 +19,7 @@ class IOMDTM(BaseScraper):
         )
         self.today = today
         self.adminone = adminone
+        self.countryiso3s = countryiso3s
 
     def run(self) -> None:
         iom_url = self.datasetinfo["url"]
@@ -28,6 +31,8 @@ class IOMDTM(BaseScraper):
         idpsdict = dict()
         for ds_row in rows:
             countryiso3 = ds_row["Country ISO"]
+            if self.countryiso3s is not None and countryiso3 not in self.countryiso3s:
+                continue
             dataset_name = ds_row["Dataset Name"]
             if not dataset_name:
                 logger.warning(f"No IOM DTM data for {countryiso3}.")
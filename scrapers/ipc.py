@@ -5,10 +5,12 @@ from dateutil.relativedelta import relativedelta
 from hdx.location.country import Country
 from hdx.scraper.framework.base_scraper import BaseScraper
 
+from .utilities.values import ValuesScraper
+
 logger = logging.getLogger(__name__)
 
 
-class IPC(BaseScraper):
+class IPC(ValuesScraper, BaseScraper):
     def __init__(self, datasetinfo, today, countryiso3s, adminone):
         self.phases = ["3", "4", "5"]
         self.projections = ["Current", "First Projection", "Second Projection"]
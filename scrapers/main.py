@@ -1,31 +1,69 @@
 import logging
+from importlib import import_module
 from os.path import join
 
-from hdx.location.adminlevel import AdminLevel
-from hdx.location.country import Country
-from hdx.scraper.framework.runner import Runner
-from hdx.scraper.framework.utilities.fallbacks import Fallbacks
 from hdx.scraper.framework.utilities.region_lookup import RegionLookup
 from hdx.scraper.framework.utilities.sources import Sources
-from hdx.scraper.framework.utilities.writer import Writer
 
-from .covax_deliveries import CovaxDeliveries
-from .education_closures import EducationClosures
-from .education_enrolment import EducationEnrolment
-from .food_prices import FoodPrices
-from .fts import FTS
-from .inform import Inform
-from .iom_dtm import IOMDTM
-from .ipc import IPC
 from .report import get_report_source
-from .unhcr import UNHCR
 from .unhcr_myanmar_idps import idps_post_run
-from .vaccination_campaigns import VaccinationCampaigns
-from .who_covid import WHOCovid
-from .whowhatwhere import WhoWhatWhere
+from .utilities.adminlevel import IndexedAdminLevel
+from .utilities.aggregation import add_aggregators
+from .utilities.checkpoint import CheckpointRunner
+from .utilities.configurable import add_configurables
+from .utilities.fallbacks import add_fallbacks
+from .utilities.incremental import IncrementalDownloader
+from .utilities.series import SeriesFiles
+from .utilities.shared_sources import SharedSources
+from .utilities.snapshot import setup_countries
+from .utilities.workbooks import WorkbookParser
+from .utilities.writer import DirtyWriter
 
 logger = logging.getLogger(__name__)
 
+# Scraper modules are only imported if the scraper is selected
+scraper_classes = {
+    "who_covid": ("who_covid", "WHOCovid"),
+    "ipc": ("ipc", "IPC"),
+    "fts": ("fts", "FTS"),
+    "food_prices": ("food_prices", "FoodPrices"),
+    "vaccination_campaigns": ("vaccination_campaigns", "VaccinationCampaigns"),
+    "unhcr": ("unhcr", "UNHCR"),
+    "inform": ("inform", "Inform"),
+    "covax_deliveries": ("covax_deliveries", "CovaxDeliveries"),
+    "education_closures": ("education_closures", "EducationClosures"),
+    "education_enrolment": ("education_enrolment", "EducationEnrolment"),
+    "whowhatwhere": ("whowhatwhere", "WhoWhatWhere"),
+    "iom_dtm": ("iom_dtm", "IOMDTM"),
+}
+# Scrapers that read the results of other scrapers
+scraper_dependencies = {"education_enrolment": ("education_closures",)}
+# Scrapers that make requests per country and can be split into shards
+sharded_scrapers = ("food_prices", "unhcr", "ipc", "whowhatwhere", "iom_dtm")
+
+
+def is_selected(name, scrapers_to_run):
+    # Same matching as Runner.run_scraper
+    if not scrapers_to_run:
+        return True
+    return any(x in name for x in scrapers_to_run)
+
+
+def get_selected_scrapers(scrapers_to_run):
+    selected = {
+        name for name in scraper_classes if is_selected(name, scrapers_to_run)
+    }
+    for name, dependencies in scraper_dependencies.items():
+        if name in selected:
+            selected.update(dependencies)
+    return selected
+
+
+def get_scraper_class(name):
+    module_name, class_name = scraper_classes[name]
+    module = import_module(f".{module_name}", __package__)
+    return getattr(module, class_name)
+
 
 def get_indicators(
     configuration,
@@ -38,12 +76,13 @@ def get_indicators(
     errors_on_exit=None,
     use_live=True,
     fallbacks_root="",
+    snapshot_folder=None,
+    checkpoint=None,
+    shard=None,
+    deadlines=None,
+    series_folder=None,
 ):
-    Country.countriesdata(
-        use_live=use_live,
-        country_name_overrides=configuration["country_name_overrides"],
-        country_name_mappings=configuration["country_name_mappings"],
-    )
+    setup_countries(configuration, use_live, today, snapshot_folder)
 
     if gho_countries_override:
         gho_countries = gho_countries_override
@@ -54,142 +93,217 @@ def get_indicators(
     else:
         hrp_countries = configuration["HRPs"]
     configuration["countries_fuzzy_try"] = hrp_countries
-    adminlevel = AdminLevel(configuration)
-    adminlevel.setup_from_admin_info(configuration["admin_info"])
-    regional_configuration = configuration["regional"]
-    RegionLookup.load(regional_configuration, gho_countries, {"HRPs": hrp_countries})
-    if fallbacks_root is not None:
-        fallbacks_path = join(fallbacks_root, configuration["json"]["output"])
-        levels_mapping = {
-            "global": "world_data",
-            "regional": "regional_data",
-            "national": "national_data",
-            "subnational": "subnational_data",
+    if shard:
+        # A shard only runs the scrapers that can be split by country. The
+        # others run when the shards are merged.
+        scrapers_to_run = [
+            name for name in sharded_scrapers if is_selected(name, scrapers_to_run)
+        ]
+        shard_countries = shard.get_countries(gho_countries)
+        logger.info(f"Shard {shard.number} countries: {', '.join(shard_countries)}")
+    else:
+        shard_countries = gho_countries
+    shared_sources = SharedSources(configuration)
+    configurations = dict()
+    configurable_scrapers = dict()
+    for level_name in "national", "subnational", "global":
+        suffix = f"_{level_name}"
+        level_configuration = configuration[f"scraper{suffix}"]
+        configurations[level_name] = {
+            name: datasetinfo
+            for name, datasetinfo in level_configuration.items()
+            if not shard and is_selected(f"{name}{suffix}", scrapers_to_run)
         }
-        Fallbacks.add(
-            fallbacks_path,
-            levels_mapping=levels_mapping,
-            sources_key="sources_data",
+        configurable_scrapers[level_name] = [
+            f"{name}{suffix}" for name in level_configuration
+        ]
+    selected_scrapers = get_selected_scrapers(scrapers_to_run)
+    national_names = configurable_scrapers["national"] + [
+        "food_prices",
+        "vaccination_campaigns",
+        "fts",
+        "unhcr",
+        "inform",
+        "ipc",
+        "covax_deliveries",
+        "education_closures",
+        "education_enrolment",
+    ]
+    national_names.insert(1, "who_covid")
+    global_names = ["who_covid", "fts"] + configurable_scrapers["global"]
+    subnational_names = configurable_scrapers["subnational"] + [
+        "whowhatwhere",
+        "iom_dtm",
+    ]
+    subnational_names.insert(1, "ipc")
+
+    # Admin and region lookups are only set up if a selected scraper or the
+    # output sections for its level need them
+    needs_regions = (
+        configurations["national"]
+        or configurations["global"]
+        or any(name in selected_scrapers for name in national_names)
+    )
+    needs_subnational = configurations["subnational"] or any(
+        name in selected_scrapers for name in subnational_names
+    )
+    if needs_subnational:
+        adminlevel = IndexedAdminLevel(configuration)
+        adminlevel.setup_from_admin_info(configuration["admin_info"])
+    else:
+        adminlevel = None
+    regional_configuration = configuration["regional"]
+    if needs_regions:
+        RegionLookup.load(
+            regional_configuration, gho_countries, {"HRPs": hrp_countries}
         )
+    if fallbacks_root is not None:
+        add_fallbacks(join(fallbacks_root, configuration["json"]["output"]))
     Sources.set_default_source_date_format("%Y-%m-%d")
-    runner = Runner(
+    runner = CheckpointRunner(
         gho_countries,
         today,
         errors_on_exit=errors_on_exit,
         scrapers_to_run=scrapers_to_run,
+        checkpoint=checkpoint,
+        deadlines=deadlines,
     )
-    configurable_scrapers = dict()
+    if checkpoint:
+        scraper_outputs = checkpoint.record_outputs(outputs)
+    else:
+        scraper_outputs = outputs
     for level_name in "national", "subnational", "global":
         if level_name == "global":
             level = "single"
         else:
             level = level_name
-        suffix = f"_{level_name}"
-        configurable_scrapers[level_name] = runner.add_configurables(
-            configuration[f"scraper{suffix}"],
+        add_configurables(
+            runner,
+            configurations[level_name],
             level,
             adminlevel,
             level_name,
-            suffix=suffix,
+            suffix=f"_{level_name}",
         )
-    runner.add_instance_variables(
-        "idps_national", overrideinfo=configuration["unhcr_myanmar_idps"]
-    )
-    runner.add_post_run("idps_national", idps_post_run)
+    if "idps" in configurations["national"]:
+        runner.add_instance_variables(
+            "idps_national", overrideinfo=configuration["unhcr_myanmar_idps"]
+        )
+        runner.add_post_run("idps_national", idps_post_run)
+
+    def add_custom(name, *args):
+        if name not in selected_scrapers:
+            return None
+        scraper = get_scraper_class(name)(*args)
+        # Dependencies of selected scrapers must run even if not selected
+        runner.add_custom(
+            scraper, force_add_to_run=not is_selected(name, scrapers_to_run)
+        )
+        return scraper
 
-    who_covid = WHOCovid(
+    if snapshot_folder:
+        # Files of append-only sources are kept with the other snapshots
+        incremental_downloader = IncrementalDownloader(snapshot_folder)
+    else:
+        incremental_downloader = None
+    if series_folder:
+        series_files = SeriesFiles(series_folder)
+    else:
+        series_files = None
+    add_custom(
+        "who_covid",
         configuration["who_covid"],
-        outputs,
+        scraper_outputs,
         hrp_countries,
         gho_countries,
         RegionLookup.iso3_to_region,
+        incremental_downloader,
+        series_files,
     )
-    ipc = IPC(configuration["ipc"], today, gho_countries, adminlevel)
-
-    fts = FTS(configuration["fts"], today, outputs, gho_countries)
-    food_prices = FoodPrices(configuration["food_prices"], today, gho_countries)
-    vaccination_campaigns = VaccinationCampaigns(
+    add_custom("ipc", configuration["ipc"], today, shard_countries, adminlevel)
+    add_custom("fts", configuration["fts"], today, scraper_outputs, gho_countries)
+    add_custom("food_prices", configuration["food_prices"], today, shard_countries)
+    add_custom(
+        "vaccination_campaigns",
         configuration["vaccination_campaigns"],
         gho_countries,
-        outputs,
+        scraper_outputs,
+    )
+    add_custom("unhcr", configuration["unhcr"], today, shard_countries)
+    add_custom("inform", configuration["inform"], today, gho_countries)
+    add_custom(
+        "covax_deliveries", configuration["covax_deliveries"], gho_countries
     )
-    unhcr = UNHCR(configuration["unhcr"], today, gho_countries)
-    inform = Inform(configuration["inform"], today, gho_countries)
-    covax_deliveries = CovaxDeliveries(configuration["covax_deliveries"], gho_countries)
-    education_closures = EducationClosures(
+    if needs_regions:
+        gho_iso3_to_regions = RegionLookup.iso3_to_regions["GHO"]
+    else:
+        gho_iso3_to_regions = None
+    education_closures = add_custom(
+        "education_closures",
         configuration["education_closures"],
         today,
         gho_countries,
-        RegionLookup.iso3_to_regions["GHO"],
+        gho_iso3_to_regions,
     )
-    education_enrolment = EducationEnrolment(
+    add_custom(
+        "education_enrolment",
         configuration["education_enrolment"],
         education_closures,
         gho_countries,
-        RegionLookup.iso3_to_regions["GHO"],
+        gho_iso3_to_regions,
     )
-    national_names = configurable_scrapers["national"] + [
-        "food_prices",
-        "vaccination_campaigns",
-        "fts",
-        "unhcr",
-        "inform",
-        "ipc",
-        "covax_deliveries",
-        "education_closures",
-        "education_enrolment",
-    ]
-    national_names.insert(1, "who_covid")
-
-    whowhatwhere = WhoWhatWhere(configuration["whowhatwhere"], today, adminlevel)
-    iomdtm = IOMDTM(configuration["iom_dtm"], today, adminlevel)
-    global_names = ["who_covid", "fts"] + configurable_scrapers["global"]
-
-    subnational_names = configurable_scrapers["subnational"] + [
-        "whowhatwhere",
-        "iom_dtm",
-    ]
-    subnational_names.insert(1, "ipc")
+    add_custom(
+        "whowhatwhere", configuration["whowhatwhere"], today, adminlevel, shard
+    )
+    add_custom("iom_dtm", configuration["iom_dtm"], today, adminlevel, shard)
 
-    runner.add_customs(
-        (
-            who_covid,
-            ipc,
-            fts,
-            food_prices,
-            vaccination_campaigns,
-            unhcr,
-            inform,
-            covax_deliveries,
-            education_closures,
-            education_enrolment,
-            whowhatwhere,
-            iomdtm,
+    if needs_regions and not shard:
+        regional_names_gho = add_aggregators(
+            runner,
+            True,
+            regional_configuration["aggregate_gho"],
+            "national",
+            "regional",
+            gho_iso3_to_regions,
+            force_add_to_run=True,
         )
-    )
-    regional_names_gho = runner.add_aggregators(
-        True,
-        regional_configuration["aggregate_gho"],
-        "national",
-        "regional",
-        RegionLookup.iso3_to_regions["GHO"],
-        force_add_to_run=True,
-    )
-    regional_names_hrp = runner.add_aggregators(
-        True,
-        regional_configuration["aggregate_hrp"],
-        "national",
-        "regional",
-        RegionLookup.iso3_to_regions["HRPs"],
-        force_add_to_run=True,
-    )
-    runner.run(
-        prioritise_scrapers=(
-            "population_national",
-            "population_subnational",
-            "population_regional",
+        regional_names_hrp = add_aggregators(
+            runner,
+            True,
+            regional_configuration["aggregate_hrp"],
+            "national",
+            "regional",
+            RegionLookup.iso3_to_regions["HRPs"],
+            force_add_to_run=True,
         )
-    )
+    else:
+        regional_names_gho = list()
+        regional_names_hrp = list()
+    if snapshot_folder:
+        # Parsed workbooks are cached with the other snapshots
+        workbook_parser = WorkbookParser(snapshot_folder)
+    else:
+        workbook_parser = None
+    shared_sources.setup_readers(workbook_parser)
+    try:
+        runner.run(
+            prioritise_scrapers=(
+                "population_national",
+                "population_subnational",
+                "population_regional",
+            )
+        )
+    finally:
+        if workbook_parser:
+            workbook_parser.close()
+        shared_sources.close()
+    if shard:
+        # Outputs are written when the shards are merged
+        if needs_subnational:
+            adminlevel.output_matches()
+            adminlevel.output_ignored()
+            adminlevel.output_errors()
+        return hrp_countries
 
     regional_names = list()
     for name in regional_names_gho:
@@ -198,13 +312,16 @@ def get_indicators(
         regional_names.append(name)
     regional_names.extend(["education_closures", "education_enrolment"])
 
-    writer = Writer(runner, outputs)
-    regional_rows = writer.get_regional_rows(
-        RegionLookup.regions + ["global"],
-        names=regional_names,
-    )
+    writer = DirtyWriter(runner, outputs)
+    if needs_regions:
+        regional_rows = writer.get_regional_rows(
+            RegionLookup.regions + ["global"],
+            names=regional_names,
+        )
+    else:
+        regional_rows = list()
 
-    if "national" in tabs:
+    if "national" in tabs and needs_regions:
         flag_countries = {
             "header": "ishrp",
             "hxltag": "#meta+ishrp",
@@ -214,7 +331,7 @@ def get_indicators(
             gho_countries,
             names=national_names,
             flag_countries=flag_countries,
-            iso3_to_region=RegionLookup.iso3_to_regions["GHO"],
+            iso3_to_region=gho_iso3_to_regions,
             ignore_regions=("GHO",),
         )
     if "regional" in tabs:
@@ -240,12 +357,13 @@ def get_indicators(
             regional_adm="GHO",
             regional_hxltags=configuration["regional"]["global_from_regional"],
         )
-    if "subnational" in tabs:
-        writer.update_subnational(adminlevel, names=subnational_names)
+    if needs_subnational:
+        if "subnational" in tabs:
+            writer.update_subnational(adminlevel, names=subnational_names)
 
-    adminlevel.output_matches()
-    adminlevel.output_ignored()
-    adminlevel.output_errors()
+        adminlevel.output_matches()
+        adminlevel.output_ignored()
+        adminlevel.output_errors()
 
     names = national_names
     for name in global_names:
@@ -260,4 +378,6 @@ def get_indicators(
             names=names,
             custom_sources=(get_report_source(configuration),),
         )
+    if checkpoint:
+        checkpoint.save_published()
     return hrp_countries
@@ -5,10 +5,12 @@ from dateutil.relativedelta import relativedelta
 from hdx.scraper.framework.base_scraper import BaseScraper
 from hdx.utilities.dateparse import parse_date
 
+from .utilities.values import ValuesScraper
+
 logger = logging.getLogger(__name__)
 
 
-class UNHCR(BaseScraper):
+class UNHCR(ValuesScraper, BaseScraper):
     def __init__(self, datasetinfo, today, countryiso3s):
         super().__init__(
             "unhcr",
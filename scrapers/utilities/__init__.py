@@ -1,3 +1,8 @@
+from contextlib import contextmanager
+from operator import itemgetter
+from os import replace
+
+from hdx.utilities.saver import save_json
 from hdx.utilities.text import get_fraction_str
 
 
@@ -10,3 +15,37 @@ def calculate_ratios(ratios, items_per_country, affected_items_per_country):
         else:
             ratios[countryiso] = "0.0"
     return ratios
+
+
+def get_hxltag_columns(hxlrow):
+    # Like building a dict keyed on HXL tag, a later column wins over an earlier
+    # one with the same tag
+    return {hxltag: header for header, hxltag in hxlrow.items() if hxltag}
+
+
+def get_row_projector(hxlrow, hxltags):
+    columns = get_hxltag_columns(hxlrow)
+    getter = itemgetter(*(columns[hxltag] for hxltag in hxltags))
+    if len(hxltags) == 1:
+        return lambda row: (getter(row),)
+    return getter
+
+
+def project_hxl_rows(iterator, hxlrow, hxltags):
+    projector = get_row_projector(hxlrow, hxltags)
+    for row in iterator:
+        yield projector(row)
+
+
+@contextmanager
+def atomic_write(path):
+    # Yields a temporary path to write to which replaces path once written so
+    # that a reader never sees a partly written file
+    temp_path = f"{path}.tmp"
+    yield temp_path
+    replace(temp_path, path)
+
+
+def save_json_file(obj, path):
+    with atomic_write(path) as temp_path:
+        save_json(obj, temp_path, pretty=False)
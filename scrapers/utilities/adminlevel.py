@@ -0,0 +1,318 @@
+import re
+from bisect import bisect_right
+from collections import Counter
+
+from hdx.location.adminlevel import AdminLevel
+from pyphonetics.distance_metrics import levenshtein_distance
+
+# Maximum distance between the phonetic codes of a name and an admin name for
+# them to match in Phonetics.match
+threshold = 2
+# Length of q-grams of phonetic codes in the index
+gram_length = 3
+gram_padding = "\x00" * (gram_length - 1)
+
+
+def al_transform_1(name):
+    prefix = name[:3]
+    if prefix == "al ":
+        return f"ad {name[3:]}"
+    elif prefix == "ad ":
+        return f"al {name[3:]}"
+    else:
+        return None
+
+
+def al_transform_2(name):
+    prefix = name[:3]
+    if prefix == "al " or prefix == "ad ":
+        return name[3:]
+    else:
+        return None
+
+
+# Transforms of admin names tried by AdminLevel.fuzzy_pcode in order
+transforms = (lambda x: x, al_transform_1, al_transform_2)
+
+
+def get_grams(code):
+    padded = f"{gram_padding}{code}{gram_padding}"
+    return Counter(
+        padded[i : i + gram_length] for i in range(len(padded) - gram_length + 1)
+    )
+
+
+def get_replacer(replacements):
+    """Get a function doing the same as multiple_replace with replacements
+    with the pattern compiled once
+
+    Args:
+        replacements (Dict[str, str]): Replacements dictionary
+
+    Returns:
+        Callable[[str], str]: Function replacing strings in a string
+    """
+    if not replacements:
+        return lambda string: string
+    pattern = re.compile(
+        "|".join(
+            [re.escape(k) for k in sorted(replacements, key=len, reverse=True)]
+        ),
+        flags=re.DOTALL,
+    )
+    return lambda string: pattern.sub(lambda x: replacements[x.group(0)], string)
+
+
+class FuzzyIndex:
+    """Index of the admin names of a country (or parent) for fuzzy matching.
+    The phonetic codes of the names and their transforms are computed once and
+    an inverted index of the q-grams of the codes finds those that could be
+    within the match threshold of a name. Codes within edit distance k of each
+    other share at least max(length) - 1 - (k - 1) * q padded q-grams, so no
+    code that could match is missed and the match is the same as from
+    Phonetics.match over all names.
+
+    Args:
+        phonetics (Phonetics): Phonetics object
+        name_to_pcode (Dict[str, str]): Mapping from normalised admin name to pcode
+    """
+
+    def __init__(self, phonetics, name_to_pcode):
+        self.phonetics = phonetics
+        self.map_names = list(name_to_pcode)
+        # Names joined so that the first name containing a string can be found
+        # with one search
+        self.joined_names = "\x00".join(self.map_names)
+        self.name_starts = list()
+        start = 0
+        for map_name in self.map_names:
+            self.name_starts.append(start)
+            start += len(map_name) + 1
+        # Codes in the order that Phonetics.match checks them
+        self.codes = list()
+        self.indices = list()
+        self.grams = dict()
+        self.short = list()
+        try:
+            self.add_codes()
+        except Exception:
+            # Names without a phonetic code are left to Phonetics.match
+            self.codes = None
+
+    def add_codes(self):
+        for i, map_name in enumerate(self.map_names):
+            for transform in transforms:
+                transformed_name = transform(map_name)
+                if not transformed_name:
+                    continue
+                entry = len(self.codes)
+                code = self.phonetics.phonetics(transformed_name)
+                self.codes.append(code)
+                self.indices.append(i)
+                if self.get_min_shared(len(code), 0) <= 0:
+                    self.short.append(entry)
+                for gram, count in get_grams(code).items():
+                    self.grams.setdefault(gram, list()).append((entry, count))
+
+    @staticmethod
+    def get_min_shared(length1, length2):
+        return max(length1, length2) - 1 - (threshold - 1) * gram_length
+
+    def find_substring(self, string):
+        """Get the first admin name containing a string
+
+        Args:
+            string (str): String
+
+        Returns:
+            Optional[str]: Admin name or None
+        """
+        position = self.joined_names.find(string)
+        if position == -1:
+            return None
+        i = bisect_right(self.name_starts, position) - 1
+        return self.map_names[i]
+
+    def get_candidates(self, code):
+        shared = dict()
+        for gram, count in get_grams(code).items():
+            for entry, entry_count in self.grams.get(gram, ()):
+                shared[entry] = shared.get(entry, 0) + min(count, entry_count)
+        if self.get_min_shared(len(code), 0) <= 0:
+            for entry in self.short:
+                shared.setdefault(entry, 0)
+        length = len(code)
+        codes = self.codes
+        for entry, no_shared in shared.items():
+            entry_length = len(codes[entry])
+            if abs(entry_length - length) > threshold:
+                continue
+            if no_shared < self.get_min_shared(length, entry_length):
+                continue
+            yield entry
+
+    def match(self, name, alternative_name=None):
+        """Match name to one of the admin names in the same way as
+        Phonetics.match with the al transforms of AdminLevel.fuzzy_pcode
+
+        Args:
+            name (str): Name to match
+            alternative_name (str): Alternative name to match. Defaults to None.
+
+        Returns:
+            Optional[str]: Matching admin name or None
+        """
+        if self.codes is None:
+            index = self.phonetics.match(
+                self.map_names,
+                name,
+                alternative_name=alternative_name,
+                transform_possible_names=list(transforms[1:]),
+            )
+            if index is None:
+                return None
+            return self.map_names[index]
+        names = [name]
+        if alternative_name:
+            names.append(alternative_name)
+        best = None
+        for name in names:
+            code = self.phonetics.phonetics(name)
+            for entry in self.get_candidates(code):
+                distance = levenshtein_distance(code, self.codes[entry])
+                if distance > threshold:
+                    continue
+                # The first name with the smallest distance is the match
+                key = distance, self.indices[entry]
+                if best is None or key < best:
+                    best = key
+        if best is None:
+            return None
+        return self.map_names[best[1]]
+
+
+class IndexedAdminLevel(AdminLevel):
+    """AdminLevel whose fuzzy matching uses a FuzzyIndex per country (or
+    parent) built from the admin names the first time that a name of the
+    country is fuzzy matched. The relevant admin name replacements and the
+    admin_fuzzy_dont names are also only worked out once. Matches and what is
+    logged are the same as from AdminLevel.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fuzzy_indices = dict()
+        self.replacers = dict()
+        self.fuzzy_dont = None
+
+    def setup_row(self, *args, **kwargs):
+        super().setup_row(*args, **kwargs)
+        self.fuzzy_indices = dict()
+
+    def get_fuzzy_index(self, key, name_to_pcode):
+        fuzzy_index = self.fuzzy_indices.get(key)
+        if fuzzy_index is None:
+            fuzzy_index = FuzzyIndex(self.phonetics, name_to_pcode)
+            self.fuzzy_indices[key] = fuzzy_index
+        return fuzzy_index
+
+    def get_replacer(self, countryiso3, parent):
+        key = countryiso3, parent
+        replacer = self.replacers.get(key)
+        if replacer is None:
+            replacer = get_replacer(
+                self.get_admin_name_replacements(countryiso3, parent)
+            )
+            self.replacers[key] = replacer
+        return replacer
+
+    def fuzzy_pcode(self, countryiso3, name, normalised_name, **kwargs):
+        """Fuzzy match name to pcode in the same way as AdminLevel.fuzzy_pcode
+
+        Args:
+            countryiso3 (str): ISO3 country code
+            name (str): Name to match
+            normalised_name (str): Normalised name
+            **kwargs:
+            parent (Optional[str]): Parent admin code
+            logname (str): Log using this identifying name. Defaults to not logging.
+
+        Returns:
+            Optional[str]: Matched P code or None if no match
+        """
+        logname = kwargs.get("logname")
+        if (
+            self.countries_fuzzy_try is not None
+            and countryiso3 not in self.countries_fuzzy_try
+        ):
+            if logname:
+                self.ignored.add((logname, countryiso3))
+            return None
+        if self.use_parent:
+            parent = kwargs.get("parent")
+        else:
+            parent = None
+        if parent is None:
+            name_to_pcode = self.name_to_pcode.get(countryiso3)
+            if not name_to_pcode:
+                if logname:
+                    self.errors.add((logname, countryiso3))
+                return None
+        else:
+            name_parent_to_pcode = self.name_parent_to_pcode.get(countryiso3)
+            if not name_parent_to_pcode:
+                if logname:
+                    self.errors.add((logname, countryiso3))
+                return None
+            name_to_pcode = name_parent_to_pcode.get(parent)
+            if not name_to_pcode:
+                if logname:
+                    self.errors.add((logname, countryiso3, parent))
+                return None
+        alt_normalised_name = self.get_replacer(countryiso3, parent)(normalised_name)
+        pcode = name_to_pcode.get(
+            normalised_name, name_to_pcode.get(alt_normalised_name)
+        )
+        if self.fuzzy_dont is None:
+            self.fuzzy_dont = set(self.admin_fuzzy_dont)
+        if not pcode and name.lower() in self.fuzzy_dont:
+            if logname:
+                self.ignored.add((logname, countryiso3, name))
+            return None
+        if not pcode:
+            fuzzy_index = self.get_fuzzy_index((countryiso3, parent), name_to_pcode)
+            for substring in (normalised_name, alt_normalised_name):
+                map_name = fuzzy_index.find_substring(substring)
+                if map_name is None:
+                    continue
+                pcode = name_to_pcode[map_name]
+                if logname:
+                    self.matches.add(
+                        (
+                            logname,
+                            countryiso3,
+                            name,
+                            self.pcode_to_name[pcode],
+                            "substring",
+                        )
+                    )
+        if not pcode:
+            map_name = fuzzy_index.match(
+                normalised_name, alternative_name=alt_normalised_name
+            )
+            if map_name is None:
+                if logname:
+                    self.errors.add((logname, countryiso3, name))
+                return None
+            pcode = name_to_pcode[map_name]
+            if logname:
+                self.matches.add(
+                    (
+                        logname,
+                        countryiso3,
+                        name,
+                        self.pcode_to_name[pcode],
+                        "fuzzy",
+                    )
+                )
+        return pcode
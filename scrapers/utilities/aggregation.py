@@ -0,0 +1,373 @@
+import logging
+from itertools import repeat
+from operator import is_
+
+import numpy as np
+from hdx.scraper.framework.scrapers.aggregator import Aggregator
+from hdx.utilities.text import number_format
+
+from .expressions import (
+    NotLiteral,
+    TextFormula,
+    UnsupportedExpression,
+    aggregator_globals,
+    get_literal,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AggregationMatrix:
+    """Computes all sum and mean aggregates of a group of aggregators at once.
+    National values are put in a country x input matrix and the mapping from
+    countries to regions in a country x region membership matrix so that totals
+    and counts of values for every region are matrix products. Values are
+    interpreted in the same way as Aggregator.process so that the results match.
+
+    Args:
+        adm_aggregation (Dict): Mapping from input admins to aggregated output admins
+    """
+
+    def __init__(self, adm_aggregation):
+        self.adm_aggregation = adm_aggregation
+        self.input_values = None
+        self.input_sourcesinfo = None
+        self.have_run = None
+        self.results = None
+
+    def set_input_values_sources(self, input_values, input_sourcesinfo):
+        self.input_values = input_values
+        self.input_sourcesinfo = input_sourcesinfo
+        self.results = None
+
+    @staticmethod
+    def get_value(value):
+        # Returns (numeric value, is float) or None if the value is not counted
+        if isinstance(value, (int, float)):
+            return value, isinstance(value, float)
+        if not value:
+            return None
+        value = Aggregator.get_numeric(value)
+        if value == "":
+            return None
+        return value, isinstance(value, float)
+
+    def get_column(self, inputs):
+        # Same precedence as Aggregator.run: the first input with a value
+        # that is not None is used for each country
+        column = dict()
+        for input_header_or_hxltag in inputs:
+            input_values = self.input_values[input_header_or_hxltag]
+            if not input_values.keys() <= self.adm_aggregation.keys():
+                for adm in input_values:
+                    self.adm_aggregation[adm]
+            for adm, value in input_values.items():
+                if value is not None and adm not in column:
+                    column[adm] = value
+        return column
+
+    def compute(self, aggregators):
+        # Aggregators with missing inputs are left to fail in Aggregator.run
+        aggregators = [
+            aggregator
+            for aggregator in aggregators
+            if all(
+                x in self.input_values for x in aggregator.datasetinfo["input"]
+            )
+        ]
+        columns = [
+            self.get_column(aggregator.datasetinfo["input"])
+            for aggregator in aggregators
+        ]
+        countries = dict()
+        for column in columns:
+            for adm in column:
+                countries.setdefault(adm, len(countries))
+        regions = dict()
+        for adm in countries:
+            for region in self.adm_aggregation[adm]:
+                regions.setdefault(region, len(regions))
+        membership = np.zeros((len(countries), len(regions)), dtype=np.int64)
+        for adm, i in countries.items():
+            for region in self.adm_aggregation[adm]:
+                membership[i, regions[region]] = 1
+
+        # Country indices of each input in the order of its values
+        orders = list()
+        rows = list()
+        column_indices = list()
+        values = list()
+        for j, column in enumerate(columns):
+            order = [countries[adm] for adm in column]
+            orders.append(order)
+            rows.extend(order)
+            column_indices.extend([j] * len(order))
+            values.extend(column.values())
+        types = list(map(type, values))
+        counted_values = np.ones(len(values), dtype=np.int64)
+        numeric_types = {int, float}
+        if not numeric_types.issuperset(types):
+            for k, value_type in enumerate(types):
+                if value_type in numeric_types:
+                    continue
+                value = self.get_value(values[k])
+                if value is None:
+                    values[k] = 0
+                    types[k] = int
+                    counted_values[k] = 0
+                else:
+                    values[k] = value[0]
+                    types[k] = type(value[0])
+        values = np.array(values, dtype=np.float64)
+        float_flags = np.fromiter(
+            map(is_, types, repeat(float)), dtype=np.int64, count=len(types)
+        )
+        if np.any((np.abs(values) >= 2**40) & (float_flags == 0)):
+            # Integer totals could overflow so leave it to Aggregator
+            return None
+        shape = (len(countries), len(columns))
+        indices = np.ravel_multi_index(
+            (np.array(rows), np.array(column_indices, dtype=np.int64)), shape
+        )
+        present = np.zeros(shape, dtype=np.int64)
+        present.flat[indices] = 1
+        counted = np.zeros(shape, dtype=np.int64)
+        counted.flat[indices] = counted_values
+        is_float = np.zeros(shape, dtype=np.int64)
+        is_float.flat[indices] = float_flags
+        float_values = np.zeros(shape, dtype=np.float64)
+        float_values.flat[indices] = values
+        int_values = np.where(is_float, 0, float_values).astype(np.int64)
+
+        # Input x region matrices
+        present = present.T @ membership
+        counts = counted.T @ membership
+        floats = is_float.T @ membership
+        int_totals = int_values.T @ membership
+        # Floating point totals are accumulated value by value in the order of
+        # the input values as in Aggregator.process so that rounding is the same.
+        # Each input's values and their region memberships are arranged by
+        # position in that order, padding with a country that is in no region.
+        padding = len(countries)
+        positions = np.full(
+            (max(map(len, orders), default=0), len(columns)), padding
+        )
+        for j, rows in enumerate(orders):
+            positions[: len(rows), j] = rows
+        float_values = np.vstack((float_values, np.zeros(len(columns))))
+        membership = np.vstack((membership, np.zeros(len(regions), np.int64)))
+        values = float_values[positions, np.arange(len(columns))]
+        float_totals = np.zeros((len(columns), len(regions)))
+        for position_values, position_rows in zip(values, positions):
+            # Values are selected rather than multiplied by membership so that
+            # a nan or inf does not affect regions its country is not in
+            float_totals += np.where(
+                membership[position_rows], position_values[:, np.newaxis], 0
+            )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = float_totals / counts
+
+        region_names = list(regions)
+        results = dict()
+        for j, aggregator in enumerate(aggregators):
+            action = aggregator.datasetinfo["action"]
+            output_values = dict()
+            for k, region in enumerate(region_names):
+                if not present[j, k]:
+                    continue
+                count = int(counts[j, k])
+                if count == 0:
+                    output_values[region] = ""
+                    continue
+                if floats[j, k]:
+                    if action == "mean":
+                        total = float(means[j, k])
+                    else:
+                        total = float(float_totals[j, k])
+                    output_values[region] = number_format(
+                        total, trailing_zeros=False
+                    )
+                    continue
+                total = int(int_totals[j, k])
+                if action == "mean":
+                    quotient, remainder = divmod(total, count)
+                    if remainder == 0:
+                        total = quotient
+                    else:
+                        output_values[region] = number_format(
+                            total / count, trailing_zeros=False
+                        )
+                        continue
+                output_values[region] = total
+            results[aggregator.name] = output_values
+        return results
+
+    def get_results(self, aggregators):
+        if self.results is None:
+            try:
+                self.results = self.compute(aggregators) or False
+            except (KeyError, TypeError, ValueError):
+                # Let each aggregator fail (and fall back) as it would have
+                self.results = False
+        return self.results
+
+
+class MatrixAggregator(Aggregator):
+    """Aggregator whose sum and mean actions are computed for all aggregators in
+    the same group by one AggregationMatrix. The formula of the eval action is
+    compiled once rather than evaluated as a string for each admin. Other
+    actions are processed by Aggregator.
+    """
+
+    matrix_actions = ("sum", "mean")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.matrix = None
+        self.group = None
+        self.input_level = None
+
+    def run(self) -> None:
+        if self.datasetinfo["action"] not in self.matrix_actions:
+            super().run()
+            return
+        results = self.matrix.get_results(self.group)
+        if not results or self.name not in results:
+            super().run()
+            return
+        output_level = next(iter(self.headers.keys()))
+        self.get_values(output_level)[0].update(results[self.name])
+        self.aggregation_scrapers.append(self)
+
+    def process(self, output_level, output_values):
+        """Perform aggregation putting results in output_values as in
+        Aggregator.process but calling a compiled formula for the eval action.
+        Admins whose values are not numbers are evaluated as strings.
+
+        Args:
+            output_level (str): Output level of aggregated data like regional
+            output_values (Dict): Mapping from admin name to value
+
+        Returns:
+            None
+        """
+        if self.datasetinfo["action"] != "eval":
+            super().process(output_level, output_values)
+            return
+        population_key = self.datasetinfo.get("population_key")
+        if population_key is None:
+            population_str = "self.population_lookup[output_adm]"
+        else:
+            population_str = "self.population_lookup[population_key]"
+        index = 1 if self.use_hxl else 0
+        headers_or_hxltags = [
+            aggregation_scraper.get_headers(output_level)[index][0]
+            for aggregation_scraper in self.aggregation_scrapers
+        ]
+        try:
+            formula = TextFormula(
+                self.datasetinfo["formula"],
+                headers_or_hxltags,
+                population_str,
+                ("self", "output_adm", "population_key"),
+                aggregator_globals,
+            )
+        except UnsupportedExpression:
+            super().process(output_level, output_values)
+            return
+        all_values = [
+            self.aggregation_scrapers[i].get_values(output_level)[0]
+            for i in formula.indices
+        ]
+        for output_adm in output_values:
+            values = [values.get(output_adm, "") for values in all_values]
+            try:
+                literals = list(map(get_literal, values))
+            except NotLiteral:
+                output_value = {output_adm: output_values[output_adm]}
+                super().process(output_level, output_value)
+                output_values[output_adm] = output_value[output_adm]
+                continue
+            output_values[output_adm] = formula.function(
+                self, output_adm, population_key, *literals
+            )
+
+
+def add_aggregators(
+    runner,
+    use_hxl,
+    configuration,
+    input_level,
+    output_level,
+    adm_aggregation,
+    force_add_to_run=False,
+):
+    """Add aggregators to the run in the same way as Runner.add_aggregators, but
+    computing the sum and mean aggregates together with matrix products. Input
+    values are read once per run rather than once per aggregator.
+
+    Args:
+        runner (Runner): Runner object
+        use_hxl (bool): Whether keys should be HXL hashtags or column headers
+        configuration (Dict): Mapping from scraper name to information about datasets
+        input_level (str): Input level to aggregate like national
+        output_level (str): Output level of aggregated data like regional
+        adm_aggregation (Dict): Mapping from input admins to aggregated output admins
+        force_add_to_run (bool): Whether to force include the scraper in the next run
+
+    Returns:
+        List[str]: scraper names
+    """
+    input_headers = runner.get_headers(None, [input_level]).get(input_level)
+    if not input_headers:
+        return list()
+    matrix = AggregationMatrix(adm_aggregation)
+    scrapers = list()
+    for header_or_hxltag, datasetinfo in configuration.items():
+        scraper = MatrixAggregator.get_scraper(
+            use_hxl,
+            header_or_hxltag,
+            datasetinfo,
+            input_level,
+            output_level,
+            adm_aggregation,
+            input_headers,
+            aggregation_scrapers=scrapers,
+        )
+        if scraper:
+            scrapers.append(scraper)
+    group = [
+        scraper
+        for scraper in scrapers
+        if scraper.datasetinfo["action"] in MatrixAggregator.matrix_actions
+    ]
+
+    def get_have_run():
+        return tuple(
+            name
+            for name, scraper in runner.scrapers.items()
+            if scraper.has_run and input_level in scraper.headers
+        )
+
+    def pre_run(scraper):
+        # Input values are read again if this is the first aggregator of a run
+        # or other scrapers have run since they were read (for example if
+        # aggregators were prioritised)
+        have_run = get_have_run()
+        if scraper is scrapers[0] or have_run != matrix.have_run:
+            matrix.set_input_values_sources(
+                *runner.get_values_sourcesinfo_by_header(
+                    input_level, None, {}, True, use_hxl
+                )
+            )
+            matrix.have_run = have_run
+        scraper.set_input_values_sources(
+            matrix.input_values, matrix.input_sourcesinfo
+        )
+
+    for scraper in scrapers:
+        scraper.matrix = matrix
+        scraper.group = group
+        scraper.input_level = input_level
+        scraper.pre_run = lambda scraper=scraper: pre_run(scraper)
+    return runner.add_customs(scrapers, force_add_to_run)
@@ -0,0 +1,343 @@
+import logging
+import pickle
+from os.path import exists, join
+
+from hdx.scraper.framework.runner import Runner
+from hdx.scraper.framework.scrapers.aggregator import Aggregator
+
+from .snapshot import get_hash, load_snapshot, save_snapshot
+from .values import get_value_rows
+
+logger = logging.getLogger(__name__)
+
+
+class RecordingOutput:
+    """Wraps an output so that the calls made on it while a scraper is running
+    are recorded in the checkpoint and can be replayed when resuming
+    """
+
+    def __init__(self, checkpoint, key, output):
+        self.checkpoint = checkpoint
+        self.key = key
+        self.output = output
+
+    def __getattr__(self, attr):
+        function = getattr(self.output, attr)
+        if not callable(function):
+            return function
+
+        def call(*args, **kwargs):
+            calls = self.checkpoint.calls
+            if calls is not None:
+                calls.append((self.key, attr, args, kwargs))
+            return function(*args, **kwargs)
+
+        return call
+
+
+class Checkpoint:
+    """Stores the state of each scraper of a run when it completes so that a
+    failed run can be resumed without running those scrapers again. The state
+    is the values, sources and source urls of the scraper, any attributes
+    given by its checkpoint_attributes and the calls it made on the outputs.
+
+    A hash of each state is kept once it has been published by the Writer so
+    that scrapers whose state has not changed since can be found. Calls made by
+    those scrapers on published outputs are not replayed.
+
+    Args:
+        folder (str): Folder for checkpoints
+        run_id (str): Identifier of run
+        today (datetime): Value to use for today for the run
+    """
+
+    run_id_format = "%Y%m%dT%H%M%S"
+    published_outputs = ("gsheets",)
+
+    def __init__(self, folder, run_id, today):
+        self.folder = join(folder, run_id)
+        self.run_id = run_id
+        self.today = today
+        self.outputs = dict()
+        self.calls = None
+        self.hashes = dict()
+        self.published = load_snapshot(self.folder, "published", "hashes") or dict()
+
+    @classmethod
+    def start(cls, folder, today):
+        """Start checkpointing a new run. The run id is made from today.
+
+        Args:
+            folder (str): Folder for checkpoints
+            today (datetime): Value to use for today for the run
+
+        Returns:
+            Checkpoint: Checkpoint object
+        """
+        run_id = today.strftime(cls.run_id_format)
+        checkpoint = cls(folder, run_id, today)
+        save_snapshot(checkpoint.folder, "run", "info", {"today": today})
+        logger.info(f"Checkpointing run {run_id} in {folder}")
+        return checkpoint
+
+    @classmethod
+    def resume(cls, folder, run_id):
+        """Resume the run with the given id. Its today is used for the resumed
+        run.
+
+        Args:
+            folder (str): Folder for checkpoints
+            run_id (str): Identifier of run to resume
+
+        Returns:
+            Checkpoint: Checkpoint object
+        """
+        info = load_snapshot(join(folder, run_id), "run", "info")
+        if info is None:
+            raise ValueError(f"No checkpoint for run {run_id} in {folder}!")
+        logger.info(f"Resuming run {run_id} from {folder}")
+        return cls(folder, run_id, info["today"])
+
+    def record_outputs(self, outputs):
+        """Wrap outputs so that calls made on them by scrapers are recorded
+
+        Args:
+            outputs (Dict[str, BaseOutput]): Mapping from names to outputs
+
+        Returns:
+            Dict[str, RecordingOutput]: Mapping from names to wrapped outputs
+        """
+        self.outputs = outputs
+        return {
+            key: RecordingOutput(self, key, output) for key, output in outputs.items()
+        }
+
+    def load_scraper(self, name):
+        """Load the saved state of a scraper
+
+        Args:
+            name (str): Name of scraper in runner
+
+        Returns:
+            Optional[Dict]: State of scraper or None if there is none
+        """
+        if not exists(join(self.folder, f"scraper_{name}.pickle")):
+            return None
+        return load_snapshot(self.folder, "scraper", name)
+
+    def save_scraper(self, name, scraper, calls):
+        """Save the state of a scraper that has run
+
+        Args:
+            name (str): Name of scraper in runner
+            scraper (BaseScraper): Scraper that has run
+            calls (List[Tuple]): Calls made on outputs by the scraper
+
+        Returns:
+            bool: Whether the state has changed since it was last published
+        """
+        attributes = {
+            attr: getattr(scraper, attr)
+            for attr in getattr(scraper, "checkpoint_attributes", ())
+        }
+        state = {
+            "values": scraper.values,
+            "sources": scraper.sources,
+            "source_urls": scraper.source_urls,
+            "fallbacks_used": scraper.fallbacks_used,
+            "attributes": attributes,
+            "calls": calls,
+            "today": self.today,
+        }
+        state["hash"] = get_hash(
+            pickle.dumps(
+                (
+                    scraper.values,
+                    scraper.sources,
+                    sorted(scraper.source_urls),
+                    attributes,
+                    calls,
+                )
+            )
+        )
+        save_snapshot(self.folder, "scraper", name, state)
+        self.hashes[name] = state["hash"]
+        return self.is_changed(name)
+
+    def skip_scraper(self, name):
+        """Record that a scraper has run without getting its values. Its state
+        is not saved so that it is run again when the run is resumed.
+
+        Args:
+            name (str): Name of scraper in runner
+
+        Returns:
+            None
+        """
+        logger.info(f"Not saving {name} to checkpoint")
+
+    def restore_scraper(self, name, scraper):
+        """Restore the state of a scraper from the checkpoint, replaying the
+        calls it made on the outputs
+
+        Args:
+            name (str): Name of scraper in runner
+            scraper (BaseScraper): Scraper to restore
+
+        Returns:
+            bool: Whether the scraper was restored
+        """
+        state = self.load_scraper(name)
+        if state is None:
+            return False
+        scraper.values = state["values"]
+        scraper.sources = state["sources"]
+        scraper.source_urls = state["source_urls"]
+        scraper.fallbacks_used = state["fallbacks_used"]
+        for attr, value in state["attributes"].items():
+            setattr(scraper, attr, value)
+        scraper.add_population()
+        self.hashes[name] = state["hash"]
+        changed = self.is_changed(name)
+        for key, attr, args, kwargs in state["calls"]:
+            if not changed and key in self.published_outputs:
+                continue
+            getattr(self.outputs[key], attr)(*args, **kwargs)
+        scraper.has_run = True
+        return True
+
+    def is_changed(self, name):
+        """Check if the state of a scraper in this run differs from the state
+        that was last published
+
+        Args:
+            name (str): Name of scraper in runner
+
+        Returns:
+            bool: Whether the state has changed
+        """
+        return self.hashes[name] != self.published.get(name)
+
+    def save_published(self):
+        """Record that the states of the scrapers in this run have been
+        published. Should be called once the Writer has updated the outputs.
+
+        Returns:
+            None
+        """
+        self.published = dict(self.hashes)
+        save_snapshot(self.folder, "published", "hashes", self.published)
+
+
+class CheckpointRunner(Runner):
+    """Runner that saves the state of each scraper to a checkpoint after it has
+    run and restores scrapers found in the checkpoint instead of running them.
+    Aggregators are always run since they only read the values of other
+    scrapers. The names of scrapers whose values have changed since they were
+    last published are kept in changed (all scrapers that run if there is no
+    checkpoint). Aggregators are not included. Rows for the Writer are built
+    column by column so that values in Values are taken by admin id.
+
+    If there are deadlines, scrapers (not aggregators) run within their time
+    budgets. A scraper that goes over budget is stopped and its fallbacks are
+    used. If it has none, it is left without values so that the rest of the
+    run still happens and it is not saved to the checkpoint so that it is run
+    again. Either way, the miss is added to errors_on_exit.
+
+    Args:
+        *args: Arguments for Runner
+        checkpoint (Optional[Checkpoint]): Checkpoint object. Defaults to None.
+        deadlines (Optional[Deadlines]): Deadlines object. Defaults to None.
+        **kwargs: Keyword arguments for Runner
+    """
+
+    def __init__(self, *args, checkpoint=None, deadlines=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkpoint = checkpoint
+        self.deadlines = deadlines
+        self.changed = set()
+        self.over_budget = set()
+
+    def run_within_deadline(self, name, force_run):
+        if self.deadlines is None:
+            return super().run_one(name, force_run)
+        scraper = self.get_scraper_exception(name)
+        with self.deadlines.start(name) as deadline:
+            if deadline is None:
+                return super().run_one(name, force_run)
+            run = scraper.run
+
+            def run_within_deadline():
+                run()
+                # Values are incomplete if a request was stopped at the
+                # deadline even if the scraper carried on
+                if deadline.exceeded:
+                    deadline.exceed()
+
+            scraper.run = run_within_deadline
+            try:
+                return super().run_one(name, force_run)
+            except Exception:
+                if not deadline.exceeded:
+                    raise
+                if self.errors_on_exit:
+                    self.errors_on_exit.add(
+                        f"{name} exceeded its time budget of {deadline.budget}s "
+                        f"and has no fallbacks!"
+                    )
+                scraper.initialise_values_sources(scraper.source_configuration)
+                scraper.has_run = True
+                scraper.post_run()
+                self.over_budget.add(name)
+                return True
+            finally:
+                del scraper.run
+
+    def run_one(self, name: str, force_run: bool = False) -> bool:
+        checkpoint = self.checkpoint
+        scraper = self.get_scraper_exception(name)
+        if isinstance(scraper, Aggregator):
+            return super().run_one(name, force_run)
+        if checkpoint is None:
+            has_run = self.run_within_deadline(name, force_run)
+            if has_run:
+                self.changed.add(name)
+            return has_run
+        if scraper.has_run is False and checkpoint.restore_scraper(name, scraper):
+            logger.info(f"Restored {name} from checkpoint")
+            if checkpoint.is_changed(name):
+                self.changed.add(name)
+            return True
+        checkpoint.calls = list()
+        try:
+            has_run = self.run_within_deadline(name, force_run)
+            calls = checkpoint.calls
+        finally:
+            checkpoint.calls = None
+        if name in self.over_budget:
+            checkpoint.skip_scraper(name)
+            self.changed.add(name)
+        elif has_run:
+            if checkpoint.save_scraper(name, scraper, calls):
+                self.changed.add(name)
+            else:
+                logger.info(f"{name} is unchanged since last published")
+        return has_run
+
+    def get_rows(
+        self,
+        level,
+        adms,
+        headers=(tuple(), tuple()),
+        row_fns=tuple(),
+        names=None,
+        overrides={},
+    ):
+        results = self.get_results(names, [level], overrides=overrides).get(level)
+        rows = list()
+        if results:
+            all_headers = results["headers"]
+            rows.append(list(headers[0]) + all_headers[0])
+            rows.append(list(headers[1]) + all_headers[1])
+            rows.extend(get_value_rows(adms, row_fns, results["values"]))
+        return rows
@@ -0,0 +1,462 @@
+import ast
+import copy
+import logging
+import operator
+
+import numpy as np
+import pandas as pd
+from hdx.scraper.framework.utilities import match_template
+
+from .rowparser import CompiledRowParser
+
+logger = logging.getLogger(__name__)
+
+unary_operators = {ast.Not: operator.not_, ast.USub: operator.neg}
+binary_operators = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+compare_operators = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda x, y: x in y,
+    ast.NotIn: lambda x, y: x not in y,
+}
+get_truth = np.frompyfunc(bool, 1, 1)
+
+
+def get_object_array(values, count):
+    return np.fromiter(values, dtype=object, count=count)
+
+
+def is_true(values):
+    return get_truth(values).astype(bool)
+
+
+class ColumnarExpression:
+    """Filter expression evaluated over arrays of column values. Each operator
+    is applied element by element with Python semantics (including the short
+    circuiting of and, or and chained comparisons) so that the result for each
+    row is the same as evaluating the expression for that row.
+
+    Args:
+        code (str): Expression with columns replaced by row lookups
+    """
+
+    def __init__(self, code):
+        self.tree = ast.parse(code, mode="eval").body
+        self.columns = list()
+        self.check(self.tree)
+
+    def check(self, node):
+        if isinstance(node, ast.Subscript):
+            if not (
+                isinstance(node.value, ast.Name)
+                and node.value.id == "row"
+                and isinstance(node.slice, ast.Constant)
+            ):
+                raise ValueError(f"Unsupported lookup {ast.unparse(node)}")
+            if node.slice.value not in self.columns:
+                self.columns.append(node.slice.value)
+            return
+        if isinstance(node, ast.Constant):
+            return
+        if isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+            # Only literal collections
+            ast.literal_eval(node)
+            return
+        if isinstance(node, ast.BoolOp):
+            children = node.values
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in unary_operators:
+            children = (node.operand,)
+        elif isinstance(node, ast.BinOp) and type(node.op) in binary_operators:
+            children = (node.left, node.right)
+        elif isinstance(node, ast.Compare) and all(
+            type(op) in compare_operators for op in node.ops
+        ):
+            children = (node.left, *node.comparators)
+        else:
+            raise ValueError(f"Unsupported expression {ast.unparse(node)}")
+        for child in children:
+            self.check(child)
+
+    def evaluate(self, columns, positions):
+        """Evaluate expression for rows
+
+        Args:
+            columns (Callable[[str], np.ndarray]): Function returning the values of a column for all rows
+            positions (np.ndarray): Positions of rows for which to evaluate
+
+        Returns:
+            np.ndarray: Value of expression for each row
+        """
+        return self.evaluate_node(self.tree, columns, positions)
+
+    def evaluate_node(self, node, columns, positions):
+        if isinstance(node, ast.Subscript):
+            return columns(node.slice.value)[positions]
+        if isinstance(node, (ast.Constant, ast.Tuple, ast.List, ast.Set)):
+            values = np.empty(len(positions), dtype=object)
+            values.fill(ast.literal_eval(node))
+            return values
+        if isinstance(node, ast.BoolOp):
+            values = self.evaluate_node(node.values[0], columns, positions)
+            for child in node.values[1:]:
+                # Python returns the first falsy (and) or truthy (or) value
+                if isinstance(node.op, ast.And):
+                    remaining = np.flatnonzero(is_true(values))
+                else:
+                    remaining = np.flatnonzero(~is_true(values))
+                values[remaining] = self.evaluate_node(
+                    child, columns, positions[remaining]
+                )
+            return values
+        if isinstance(node, ast.UnaryOp):
+            function = np.frompyfunc(unary_operators[type(node.op)], 1, 1)
+            return function(
+                self.evaluate_node(node.operand, columns, positions)
+            )
+        if isinstance(node, ast.BinOp):
+            function = np.frompyfunc(binary_operators[type(node.op)], 2, 1)
+            return function(
+                self.evaluate_node(node.left, columns, positions),
+                self.evaluate_node(node.right, columns, positions),
+            )
+        left = self.evaluate_node(node.left, columns, positions)
+        values = np.empty(len(positions), dtype=object)
+        remaining = np.arange(len(positions))
+        for op, comparator in zip(node.ops, node.comparators):
+            right = self.evaluate_node(
+                comparator, columns, positions[remaining]
+            )
+            function = np.frompyfunc(compare_operators[type(op)], 2, 1)
+            result = function(left, right)
+            values[remaining] = result
+            # Chained comparisons stop at the first false one
+            true = is_true(result)
+            remaining = remaining[true]
+            left = right[true]
+        return values
+
+
+class ColumnarRowParser(CompiledRowParser):
+    """RowParser that works out which rows would be processed using operations
+    on whole columns instead of one row at a time. Prefilter, sort, external
+    filter, admin lookup, subset filters and date selection are applied to
+    arrays of column values and then only the rows that would be processed are
+    parsed row by row as usual to produce the output values. Admin names and
+    dates are looked up once per distinct value.
+
+    A row is processed for a subset if its date is the latest so far for its
+    admin (RowParser keeps a running maximum), which is a cumulative maximum
+    by admin over the rows. The rows that set each running maximum are kept,
+    so parsing only the kept rows gives the same results as parsing them all.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.columnar_error = None
+        self.prefilter_expression = None
+        self.subset_expressions = list()
+        try:
+            if self.prefilter_str is not None:
+                self.prefilter_expression = ColumnarExpression(
+                    self.prefilter_str
+                )
+            for filter in self.subset_filter_strs:
+                if filter is None:
+                    self.subset_expressions.append(None)
+                else:
+                    self.subset_expressions.append(ColumnarExpression(filter))
+        except (SyntaxError, ValueError) as ex:
+            self.columnar_error = str(ex)
+
+    def filter_sort_rows(self, iterator):
+        """Apply prefilter and sort the input data and return the rows that
+        would be processed
+
+        Args:
+            iterator (Iterator[Dict]): Input data
+
+        Returns:
+            Iterator[Dict]: Rows to process
+        """
+        if self.columnar_error:
+            logger.info(
+                f"{self.name}: processing rows one by one as {self.columnar_error}"
+            )
+            return super().filter_sort_rows(iterator)
+        return self.select_rows(iterator)
+
+    def get_sort(self):
+        if self.sort:
+            return self.sort
+        if self.datecol:
+            for subset in self.subsets:
+                apply_sort = subset.get(
+                    "sum",
+                    subset.get("process", subset.get("input_append")),
+                )
+                if apply_sort:
+                    logger.warning(
+                        "sum or process used without sorting. Applying sort by date to ensure correct results!"
+                    )
+                    self.sort = {"keys": [self.datecol], "reverse": True}
+                    break
+        return self.sort
+
+    def get_admin_columns(self):
+        admin_columns = list()
+        for admcol in self.admcols:
+            if isinstance(admcol, str):
+                admcol = [admcol]
+            elif not isinstance(admcol, list):
+                continue
+            for admcl in admcol:
+                template_string, match_string = match_template(admcl)
+                if template_string and self.headers:
+                    admcl = self.headers[int(match_string)]
+                if admcl not in admin_columns:
+                    admin_columns.append(admcl)
+        return admin_columns
+
+    @staticmethod
+    def lookup(function, names, columns, positions):
+        # Call function with a row of the given columns once per distinct
+        # combination of values
+        results = np.empty(len(positions), dtype=object)
+        if not names:
+            results.fill(function(dict()))
+            return results
+        cache = dict()
+        values = zip(*(columns(name)[positions] for name in names))
+        for j, key in enumerate(values):
+            try:
+                result = cache.get(key)
+                if result is None and key not in cache:
+                    result = function(dict(zip(names, key)))
+                    cache[key] = result
+            except TypeError:
+                # Unhashable values
+                result = function(dict(zip(names, key)))
+            results[j] = result
+        return results
+
+    def select_rows(self, iterator):
+        rows = list(iterator)
+        if not rows:
+            return rows
+        header_to_hxltag = self.header_to_hxltag
+        if header_to_hxltag:
+            # Later headers with the same HXL hashtag replace earlier ones
+            keys = {header_to_hxltag[header]: header for header in rows[0]}
+        else:
+            keys = {header: header for header in rows[0]}
+        no_rows = len(rows)
+        raw_columns = dict()
+
+        def raw_column(name):
+            values = raw_columns.get(name)
+            if values is None:
+                key = keys[name]
+                values = get_object_array((row[key] for row in rows), no_rows)
+                raw_columns[name] = values
+            return values
+
+        if self.stop_row:
+            stop = np.ones(no_rows, dtype=bool)
+            for key, value in self.stop_row.items():
+                equal = np.frompyfunc(lambda x, value=value: x == value, 1, 1)
+                stop &= is_true(equal(raw_column(key)))
+            stops = np.flatnonzero(stop)
+            if len(stops) != 0:
+                no_rows = int(stops[0])
+                rows = rows[:no_rows]
+                raw_columns.clear()
+
+        flattened = dict()
+        if self.flatteninfo:
+            templates = list()
+            for flatten in self.flatteninfo:
+                colname = flatten["original"]
+                template_string, replace_string = match_template(colname)
+                if not template_string:
+                    raise ValueError(
+                        "Column name for flattening lacks an incrementing number!"
+                    )
+                templates.append((colname, template_string, int(replace_string)))
+            colnames = list()
+            while True:
+                k = len(colnames)
+                iteration = list()
+                for colname, template_string, start in templates:
+                    colname = colname.replace(template_string, f"{start + k}")
+                    if colname not in keys:
+                        break
+                    iteration.append(colname)
+                else:
+                    colnames.append(iteration)
+                    continue
+                break
+            no_copies = len(colnames)
+            sources = np.repeat(np.arange(no_rows), no_copies)
+            for i, flatten in enumerate(self.flatteninfo):
+                names = [iteration[i] for iteration in colnames]
+                flattened[flatten["new"]] = ("column", names)
+                extracol = flatten.get("extracol")
+                if extracol:
+                    flattened[extracol] = ("name", names)
+        else:
+            no_copies = 1
+            sources = np.arange(no_rows)
+        no_long_rows = len(sources)
+        long_columns = dict()
+
+        def columns(name):
+            values = long_columns.get(name)
+            if values is not None:
+                return values
+            flatten = flattened.get(name)
+            if flatten is None:
+                values = raw_column(name)[sources]
+            elif no_rows == 0 or no_copies == 0:
+                values = np.empty(0, dtype=object)
+            elif flatten[0] == "column":
+                values = np.stack(
+                    [raw_column(x) for x in flatten[1]], axis=1
+                ).ravel()
+            else:
+                names = get_object_array(flatten[1], no_copies)
+                values = np.tile(names, no_rows)
+            long_columns[name] = values
+            return values
+
+        positions = np.arange(no_long_rows)
+        if self.prefilter_expression:
+            prefilter = self.prefilter_expression.evaluate(columns, positions)
+            positions = positions[is_true(prefilter)]
+
+        sort = self.get_sort()
+        if sort and len(positions) != 0:
+            codes = list()
+            for key in sort["keys"]:
+                _, inverse = np.unique(
+                    columns(key)[positions], return_inverse=True
+                )
+                if sort.get("reverse", False):
+                    inverse = -inverse
+                codes.append(inverse)
+            positions = positions[np.lexsort(codes[::-1])]
+
+        for header, values in self.filters.items():
+            if header not in keys and header not in flattened:
+                continue
+            allowed = np.frompyfunc(values.__contains__, 1, 1)
+            positions = positions[is_true(allowed(columns(header)[positions]))]
+
+        admin_columns = self.get_admin_columns()
+        adms = self.lookup(self.get_adms, admin_columns, columns, positions)
+        valid = np.flatnonzero(adms != None)  # noqa: E711
+        positions = positions[valid]
+        adms = adms[valid]
+
+        subset_masks = list()
+        for expression in self.subset_expressions:
+            if expression is None:
+                subset_masks.append(np.ones(len(positions), dtype=bool))
+            else:
+                subset_masks.append(
+                    is_true(expression.evaluate(columns, positions))
+                )
+        if subset_masks:
+            processed = np.logical_or.reduce(subset_masks)
+        else:
+            processed = np.zeros(len(positions), dtype=bool)
+
+        if self.datecol:
+            if isinstance(self.datecol, list):
+                date_columns = list(self.datecol)
+            else:
+                date_columns = [self.datecol]
+            dates = self.lookup(self.get_date, date_columns, columns, positions)
+            current = np.flatnonzero(dates != None)  # noqa: E711
+            positions = positions[current]
+            adms = adms[current]
+            dates = dates[current]
+            processed = processed[current]
+            subset_masks = [mask[current] for mask in subset_masks]
+            # Rows dated before the initial maximum date are never processed
+            unique_dates = sorted(set(dates))
+            ranks = dict(zip(unique_dates, range(len(unique_dates))))
+            ranks = np.fromiter(
+                (ranks[date] for date in dates), dtype=np.int64, count=len(dates)
+            )
+            current = np.fromiter(
+                (date >= self.maxdate for date in dates),
+                dtype=bool,
+                count=len(dates),
+            )
+            counted = processed & current
+            is_latest = np.zeros(len(positions), dtype=bool)
+            is_latest[counted] = ranks[counted] == np.maximum.accumulate(
+                ranks[counted]
+            )
+            if self.datelevel is None:
+                groups = np.zeros(len(positions), dtype=np.int64)
+            else:
+                admins = [adm[self.datelevel] for adm in adms]
+                for admin in set(admins):
+                    # Same error as RowParser for unknown admins
+                    for maxdates in self.maxdates.values():
+                        maxdates[admin]
+                groups, _ = pd.factorize(
+                    get_object_array(admins, len(admins))
+                )
+            for i, mask in enumerate(subset_masks):
+                counted = mask & current
+                latest = np.zeros(len(positions), dtype=bool)
+                if self.maxdateonly:
+                    group_maxima = (
+                        pd.Series(ranks[counted])
+                        .groupby(groups[counted])
+                        .cummax()
+                        .to_numpy()
+                    )
+                    latest[counted] = ranks[counted] == group_maxima
+                else:
+                    latest[counted] = True
+                if self.single_maxdate:
+                    latest &= is_latest
+                subset_masks[i] = latest
+            if subset_masks:
+                processed = np.logical_or.reduce(subset_masks)
+
+        positions = positions[processed]
+        if not self.flatteninfo:
+            selected_rows = [rows[j] for j in positions]
+            if header_to_hxltag:
+                selected_rows = self.header_to_hxltag_rows(selected_rows)
+            return list(selected_rows)
+        selected_rows = list()
+        for j in positions:
+            source, k = divmod(int(j), no_copies)
+            row = rows[source]
+            if header_to_hxltag:
+                row = next(self.header_to_hxltag_rows((row,)))
+            newrow = copy.deepcopy(row)
+            for i, flatten in enumerate(self.flatteninfo):
+                colname = colnames[k][i]
+                newrow[flatten["new"]] = row[colname]
+                extracol = flatten.get("extracol")
+                if extracol:
+                    newrow[extracol] = colname
+            selected_rows.append(newrow)
+        return selected_rows
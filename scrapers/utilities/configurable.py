@@ -0,0 +1,436 @@
+import logging
+
+import regex
+from hdx.scraper.framework.scrapers.configurable_scraper import ConfigurableScraper
+from hdx.scraper.framework.utilities import get_rowval
+from hdx.scraper.framework.utilities.sources import Sources
+from hdx.utilities.dictandlist import dict_of_lists_add
+
+from .columnar import ColumnarRowParser
+from .expressions import (
+    NotLiteral,
+    TextFormula,
+    UnsupportedExpression,
+    compile_function,
+    get_bracket_indices,
+    get_literal,
+    replace_columns,
+    scraper_globals,
+)
+from .rowparser import CompiledRowParser
+from .values import ValuesScraper
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledConfigurableScraper(ValuesScraper, ConfigurableScraper):
+    """ConfigurableScraper that parses rows with a CompiledRowParser or with a
+    ColumnarRowParser if columnar is True in the dataset information and that
+    stores its values in Values. Transform, process and sum expressions are
+    compiled into functions once rather than evaluated as strings for each
+    row or admin. If any cannot be compiled, they are all evaluated as strings.
+    """
+
+    rowparser_class = CompiledRowParser
+    columnar_rowparser_class = ColumnarRowParser
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Inputs found from HXL hashtags are only known when the scraper runs
+        self.expressions = None
+        if all(subset["input"] for subset in self.subsets):
+            self.expressions = self.compile_expressions()
+
+    def get_population_str(self, subset):
+        if subset.get("population_key") is None:
+            return "self.population_lookup[adm]"
+        return "self.population_lookup[population_key]"
+
+    def compile_expressions(self):
+        """Compile the transform, process and sum expressions of each subset
+
+        Returns:
+            Union[List[Dict], bool]: Compiled expressions of each subset or False if any cannot be compiled
+        """
+        all_expressions = list()
+        try:
+            for subset in self.subsets:
+                valcols = subset["input"]
+                population_str = self.get_population_str(subset)
+                expressions = {"transform": dict(), "process": list(), "sum": list()}
+                input_transforms = subset.get("transform", {})
+                for valcol in valcols:
+                    input_transform = input_transforms.get(valcol)
+                    if input_transform:
+                        expressions["transform"][valcol] = compile_function(
+                            input_transform.replace(valcol, "val"),
+                            ("val",),
+                            scraper_globals,
+                        )
+                for process_col in subset.get("process") or ():
+                    brackets = list()
+                    matches = regex.search(
+                        self.brackets, process_col, flags=regex.VERBOSE
+                    )
+                    if matches:
+                        for bracketed_str in matches.captures("rec"):
+                            if any(bracketed_str in x for x in valcols):
+                                continue
+                            brackets.append(get_bracket_indices(bracketed_str, valcols))
+                    formula = TextFormula(
+                        process_col,
+                        valcols,
+                        population_str,
+                        ("self", "adm", "population_key"),
+                        scraper_globals,
+                    )
+                    expressions["process"].append((formula, brackets))
+                for sum_col in subset.get("sum") or ():
+                    formula, _ = replace_columns(
+                        sum_col["formula"],
+                        valcols,
+                        lambda j: f"newvaldicts[{j}][adm]",
+                    )
+                    formula = formula.replace("#pzbgvjh", population_str)
+                    expressions["sum"].append(
+                        compile_function(
+                            formula,
+                            ("newvaldicts", "adm", "self", "population_key"),
+                            scraper_globals,
+                        )
+                    )
+                all_expressions.append(expressions)
+        except UnsupportedExpression as ex:
+            logger.info(f"{self.name}: evaluating expressions as strings ({ex})")
+            return False
+        return all_expressions
+
+    def run(self) -> None:
+        """Runs one configurable scraper given dataset information. Copy of
+        ConfigurableScraper.run (pinned in tests/test_configurable.py) apart
+        from the choice of row parser class.
+
+        Returns:
+            None
+        """
+        file_headers, iterator = self.get_iterator()
+        header_to_hxltag = self.use_hxl(None, file_headers, iterator)
+        if "source_url" not in self.datasetinfo:
+            self.datasetinfo["source_url"] = self.datasetinfo["url"]
+        source_date = Sources.standardise_datasetinfo_source_date(
+            self.datasetinfo
+        )
+        if not source_date or self.datasetinfo.get("force_date_today", False):
+            source_date = self.today
+            self.datasetinfo["source_date"] = {
+                "default_date": {"end": source_date}
+            }
+        if self.datasetinfo.get("columnar", False):
+            rowparser_class = self.columnar_rowparser_class
+        else:
+            rowparser_class = self.rowparser_class
+        self.rowparser = rowparser_class(
+            self.name,
+            self.countryiso3s,
+            self.adminlevel,
+            self.level,
+            self.datelevel,
+            self.today,
+            self.datasetinfo,
+            file_headers,
+            header_to_hxltag,
+            self.subsets,
+        )
+        self.run_scraper(iterator)
+
+    def run_scraper(self, iterator):
+        """Run one configurable scraper given an iterator over the rows in the
+        same way as ConfigurableScraper.run_scraper but calling compiled
+        expressions. Process columns of an admin whose values are not numbers
+        are evaluated as strings. The framework method is copied rather than
+        called and is pinned in tests/test_configurable.py.
+
+        Args:
+            iterator (Iterator[Dict]): Iterator over the rows
+
+        Returns:
+            None
+        """
+        if self.expressions is None:
+            self.expressions = self.compile_expressions()
+        if self.expressions is False:
+            super().run_scraper(iterator)
+            return
+
+        valuedicts = dict()
+        for subset in self.subsets:
+            for _ in subset["input"]:
+                dict_of_lists_add(valuedicts, subset["filter"], dict())
+        subset_details = [
+            (
+                subset["filter"],
+                subset.get("input_ignore_vals", []),
+                expressions["transform"],
+                subset.get("list"),
+                subset.get("sum") or subset.get("process"),
+                subset.get("input_append", []),
+                subset.get("input_keep", []),
+                subset["input"],
+            )
+            for subset, expressions in zip(self.subsets, self.expressions)
+        ]
+
+        def add_row(row):
+            adm, should_process_subset = self.rowparser.parse(row)
+            if not adm:
+                return
+            for i, details in enumerate(subset_details):
+                if not should_process_subset[i]:
+                    continue
+                (
+                    filter,
+                    input_ignore_vals,
+                    transforms,
+                    list_cols,
+                    sum_or_process_cols,
+                    input_append,
+                    input_keep,
+                    valcols,
+                ) = details
+                for j, valcol in enumerate(valcols):
+                    valuedict = valuedicts[filter][j]
+                    val = get_rowval(row, valcol)
+                    transform = transforms.get(valcol)
+                    if transform and val not in input_ignore_vals:
+                        val = transform(val)
+                    if sum_or_process_cols:
+                        dict_of_lists_add(valuedict, adm, val)
+                    elif list_cols and valcol in list_cols:
+                        dict_of_lists_add(valuedict, adm, val)
+                    else:
+                        curval = valuedict.get(adm)
+                        if valcol in input_append:
+                            if curval:
+                                val = curval + val
+                        elif valcol in input_keep:
+                            if curval:
+                                val = curval
+                        valuedict[adm] = val
+
+        for row in self.rowparser.filter_sort_rows(iterator):
+            add_row(row)
+
+        values = self.values[self.level_name]
+        values_pos = 0
+        for subset, expressions in zip(self.subsets, self.expressions):
+            valdicts = valuedicts[subset["filter"]]
+            population_key = subset.get("population_key")
+            population_str = self.get_population_str(subset)
+            process_cols = subset.get("process")
+            input_keep = subset.get("input_keep", [])
+            sum_cols = subset.get("sum")
+            input_ignore_vals = subset.get("input_ignore_vals", [])
+            valcols = subset["input"]
+
+            if process_cols:
+
+                def get_value(j, adm):
+                    # Value put into the formula and whether it counts as a value
+                    if valcols[j] in input_keep:
+                        input_keep_index = 0
+                    else:
+                        input_keep_index = -1
+                    val = valdicts[j][adm][input_keep_index]
+                    if val is None or val == "" or val in input_ignore_vals:
+                        return 0, False
+                    return val, True
+
+                def get_literals(indices, adm):
+                    literals = list()
+                    hasvalues = False
+                    for j in indices:
+                        val, hasvalue = get_value(j, adm)
+                        literals.append(get_literal(val))
+                        hasvalues = hasvalues or hasvalue
+                    return literals, hasvalues
+
+                def get_args(formula, brackets, adm):
+                    for indices in brackets:
+                        _, hasvalues = get_literals(indices, adm)
+                        if not hasvalues:
+                            return None
+                    literals, hasvalues = get_literals(formula.indices, adm)
+                    if not hasvalues:
+                        return None
+                    return literals
+
+                def evaluate_string(formula, brackets, adm):
+                    # As ConfigurableScraper.run_scraper does
+                    def text_replacement(string):
+                        hasvalues = False
+
+                        def get_replacement(j):
+                            nonlocal hasvalues
+                            val, hasvalue = get_value(j, adm)
+                            hasvalues = hasvalues or hasvalue
+                            return str(val)
+
+                        string, _ = replace_columns(string, valcols, get_replacement)
+                        return string.replace("#pzbgvjh", "#population"), hasvalues
+
+                    for bracketed_str in brackets:
+                        _, hasvalues = text_replacement(bracketed_str)
+                        if not hasvalues:
+                            return ""
+                    formula, hasvalues = text_replacement(formula)
+                    if not hasvalues:
+                        return ""
+                    formula = formula.replace("#population", population_str)
+                    return eval(
+                        formula,
+                        scraper_globals,
+                        {"self": self, "adm": adm, "population_key": population_key},
+                    )
+
+                for i, process_col in enumerate(process_cols):
+                    formula, brackets = expressions["process"][i]
+                    bracketed_strs = list()
+                    matches = regex.search(
+                        self.brackets, process_col, flags=regex.VERBOSE
+                    )
+                    if matches:
+                        for bracketed_str in matches.captures("rec"):
+                            if not any(bracketed_str in x for x in valcols):
+                                bracketed_strs.append(bracketed_str)
+                    for adm in valdicts[0]:
+                        try:
+                            literals = get_args(formula, brackets, adm)
+                        except (NotLiteral, LookupError):
+                            value = evaluate_string(process_col, bracketed_strs, adm)
+                        else:
+                            if literals is None:
+                                value = ""
+                            else:
+                                value = formula.function(
+                                    self, adm, population_key, *literals
+                                )
+                        values[values_pos][adm] = value
+                    values_pos += 1
+            elif sum_cols:
+                for ind, sum_col in enumerate(sum_cols):
+                    mustbepopulated = sum_col.get("mustbepopulated", False)
+                    newvaldicts = [dict() for _ in valdicts]
+                    valdict0 = valdicts[0]
+                    for adm in valdict0:
+                        for i, val in enumerate(valdict0[adm]):
+                            if not val or val in input_ignore_vals:
+                                exists = False
+                            else:
+                                exists = True
+                                for valdict in valdicts[1:]:
+                                    val = valdict[adm][i]
+                                    if (
+                                        val is None
+                                        or val == ""
+                                        or val in input_ignore_vals
+                                    ):
+                                        exists = False
+                                        break
+                            if mustbepopulated and not exists:
+                                continue
+                            for j, valdict in enumerate(valdicts):
+                                val = valdict[adm][i]
+                                if (
+                                    val is None
+                                    or val == ""
+                                    or val in input_ignore_vals
+                                ):
+                                    continue
+                                newvaldict = newvaldicts[j]
+                                try:
+                                    literal = get_literal(val)
+                                except NotLiteral:
+                                    newvaldict[adm] = eval(
+                                        f"newvaldicts[j].get(adm, 0.0) + {str(val)}",
+                                        scraper_globals,
+                                        {
+                                            "newvaldicts": newvaldicts,
+                                            "j": j,
+                                            "adm": adm,
+                                        },
+                                    )
+                                else:
+                                    newvaldict[adm] = newvaldict.get(adm, 0.0) + literal
+                    function = expressions["sum"][ind]
+                    for adm in valdicts[0]:
+                        try:
+                            val = function(newvaldicts, adm, self, population_key)
+                        except (ValueError, TypeError, KeyError):
+                            val = ""
+                        values[values_pos][adm] = val
+                    values_pos += 1
+            else:
+                for valdict in valdicts:
+                    for adm in valdict:
+                        values[values_pos][adm] = valdict[adm]
+                    values_pos += 1
+
+
+def add_configurables(
+    runner,
+    configuration,
+    level,
+    adminlevel=None,
+    level_name=None,
+    source_configuration={},
+    suffix=None,
+    force_add_to_run=False,
+    countryiso3s=None,
+):
+    """Add configurable scrapers to the run in the same way as
+    Runner.add_configurables, but with subset filters compiled once per
+    scraper rather than evaluated from strings for every row.
+
+    Args:
+        runner (Runner): Runner object
+        configuration (Dict): Mapping from scraper name to information about datasets
+        level (str): Can be national, subnational or single
+        adminlevel (Optional[AdminLevel]): AdminLevel object from HDX Python Country. Defaults to None.
+        level_name (Optional[str]): Customised level_name name. Defaults to None (level_name).
+        source_configuration (Dict): Configuration for sources. Defaults to empty dict (use defaults).
+        suffix (Optional[str]): Suffix to add to the scraper name
+        force_add_to_run (bool): Whether to force include the scraper in the next run
+        countryiso3s (Optional[List[str]]): Override list of country iso3s. Defaults to None.
+
+    Returns:
+        List[str]: scraper names (including suffix if set)
+    """
+    if not countryiso3s:
+        countryiso3s = runner.countryiso3s
+    scraper_names = list()
+    for name, datasetinfo in configuration.items():
+        if suffix:
+            scraper_name = f"{name}{suffix}"
+        else:
+            scraper_name = name
+        runner.scrapers[scraper_name] = CompiledConfigurableScraper(
+            name,
+            datasetinfo,
+            level,
+            countryiso3s,
+            adminlevel,
+            level_name,
+            source_configuration,
+            runner.today,
+            runner.errors_on_exit,
+        )
+        if scraper_name not in runner.scraper_names:
+            runner.scraper_names.append(scraper_name)
+        if (
+            force_add_to_run
+            and runner.scrapers_to_run is not None
+            and scraper_name not in runner.scrapers_to_run
+        ):
+            runner.scrapers_to_run.append(scraper_name)
+        scraper_names.append(scraper_name)
+    return scraper_names
@@ -0,0 +1,142 @@
+import logging
+from contextlib import contextmanager
+from copy import copy
+from threading import local
+from time import monotonic
+
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    """Time budget of a scraper that is running
+
+    Args:
+        name (str): Name of scraper
+        budget (float): Seconds the scraper has to run
+        clock (Callable[[], float]): Function giving seconds. Defaults to time.monotonic.
+    """
+
+    def __init__(self, name, budget, clock=monotonic):
+        self.name = name
+        self.budget = budget
+        self.clock = clock
+        self.end = clock() + budget
+        self.exceeded = False
+
+    def get_remaining(self):
+        return self.end - self.clock()
+
+    def check(self, wait=0):
+        """Raise DeadlineExceeded if the budget will be used up after waiting
+        for a number of seconds. The deadline is marked as exceeded.
+
+        Args:
+            wait (float): Seconds to wait. Defaults to 0.
+
+        Returns:
+            None
+        """
+        if self.get_remaining() <= wait:
+            self.exceed()
+
+    def exceed(self):
+        self.exceeded = True
+        raise DeadlineExceeded(
+            f"{self.name} exceeded its time budget of {self.budget}s!"
+        )
+
+    def get_timeout(self, timeout):
+        """Get a timeout for a request that ends at the deadline at the latest
+
+        Args:
+            timeout (Union[None, float, Tuple]): Timeout of request
+
+        Returns:
+            Union[float, Tuple]: Timeout bounded by remaining time
+        """
+        self.check()
+        remaining = self.get_remaining()
+        if isinstance(timeout, tuple):
+            return tuple(remaining if x is None else min(x, remaining) for x in timeout)
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+
+class DeadlineRetry(Retry):
+    """Retry that stops retrying once the deadline of the scraper that is
+    running has passed so that retries after timeouts do not go over budget
+    """
+
+    @classmethod
+    def from_retry(cls, retry):
+        deadline_retry = copy(retry)
+        deadline_retry.__class__ = cls
+        return deadline_retry
+
+    def increment(self, *args, **kwargs):
+        deadline = Deadlines.get_current()
+        if deadline is not None:
+            deadline.check()
+        return super().increment(*args, **kwargs)
+
+
+class Deadlines:
+    """Per scraper time budgets for a run. The budget of a scraper is given
+    in scrapers by name or else by default (none if there is no default).
+    Requests made through the shared connection pool while a scraper is
+    running time out at its deadline and once it has passed fail with
+    DeadlineExceeded so that the scraper stops and its fallbacks are used.
+    The deadline only applies in the thread that runs the scraper so that
+    requests from other threads are unaffected.
+
+    Args:
+        configuration (Dict): Configuration with default and scrapers (mapping from name to seconds)
+    """
+
+    state = local()
+
+    def __init__(self, configuration):
+        self.default = configuration.get("default")
+        self.budgets = configuration.get("scrapers", dict())
+
+    def get_budget(self, name):
+        return self.budgets.get(name, self.default)
+
+    @classmethod
+    def get_current(cls):
+        """Get the deadline of the scraper running in this thread
+
+        Returns:
+            Optional[Deadline]: Deadline or None if there is none
+        """
+        return getattr(cls.state, "deadline", None)
+
+    @contextmanager
+    def start(self, name):
+        """Run the scraper with given name within its time budget
+
+        Args:
+            name (str): Name of scraper
+
+        Returns:
+            Optional[Deadline]: Deadline of scraper or None if it has no budget
+        """
+        budget = self.get_budget(name)
+        if budget is None:
+            yield None
+            return
+        deadline = Deadline(name, budget)
+        Deadlines.state.deadline = deadline
+        try:
+            yield deadline
+        finally:
+            Deadlines.state.deadline = None
+            if deadline.exceeded:
+                logger.error(f"{name} exceeded its time budget of {budget}s!")
@@ -0,0 +1,187 @@
+import json
+import logging
+from os import listdir, makedirs, remove
+from os.path import join, splitext
+
+from . import save_json_file
+from .snapshot import load_snapshot, save_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Tabs in the delta feed and the HXL hashtag that identifies each row
+delta_tabs = {
+    "world": None,
+    "regional": "#region+name",
+    "national": "#country+code",
+    "subnational": "#adm1+code",
+}
+
+
+def get_delta_folder(path):
+    return f"{splitext(path)[0]}_delta"
+
+
+def escape(key):
+    # JSON Pointer escaping
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def get_keyed_rows(rows, key_hxltag):
+    """Get rows of a tab as a mapping from the value of key_hxltag (or the
+    row number if key_hxltag is None) to row
+
+    Args:
+        rows (List[Dict]): Rows of tab
+        key_hxltag (Optional[str]): HXL hashtag that identifies each row
+
+    Returns:
+        Dict[str, Dict]: Mapping from key to row
+    """
+    if key_hxltag is None:
+        return {str(i): row for i, row in enumerate(rows)}
+    return {row[key_hxltag]: row for row in rows}
+
+
+def get_patch(old, new):
+    """Get the JSON Patch (RFC 6902) operations that change one document of
+    keyed tabs into another. Rows and values are added, replaced and removed
+    individually.
+
+    Args:
+        old (Dict[str, Dict[str, Dict]]): Previous document
+        new (Dict[str, Dict[str, Dict]]): New document
+
+    Returns:
+        List[Dict]: Patch operations
+    """
+    patch = list()
+    for tab, old_rows in old.items():
+        if tab not in new:
+            patch.append({"op": "remove", "path": f"/{escape(tab)}"})
+    for tab, rows in new.items():
+        tab_path = f"/{escape(tab)}"
+        old_rows = old.get(tab)
+        if old_rows is None:
+            patch.append({"op": "add", "path": tab_path, "value": rows})
+            continue
+        for key in old_rows:
+            if key not in rows:
+                patch.append({"op": "remove", "path": f"{tab_path}/{escape(key)}"})
+        for key, row in rows.items():
+            row_path = f"{tab_path}/{escape(key)}"
+            old_row = old_rows.get(key)
+            if old_row is None:
+                patch.append({"op": "add", "path": row_path, "value": row})
+                continue
+            for hxltag in old_row:
+                if hxltag not in row:
+                    path = f"{row_path}/{escape(hxltag)}"
+                    patch.append({"op": "remove", "path": path})
+            for hxltag, value in row.items():
+                path = f"{row_path}/{escape(hxltag)}"
+                if hxltag not in old_row:
+                    patch.append({"op": "add", "path": path, "value": value})
+                elif old_row[hxltag] != value:
+                    patch.append({"op": "replace", "path": path, "value": value})
+    return patch
+
+
+class DeltaFeed:
+    """Feed of the changes to the world, regional, national and subnational
+    tabs of the JSON output between runs, stored in a folder next to the
+    output. Tabs are documents keyed by row (country code, region name, admin
+    1 pcode or row number for world). Each run that changes them gets the
+    next version and a JSON Patch from the previous version is saved to
+    delta_{version}.json. Every full_every versions, the whole document is
+    also saved to full_{version}.json and files from before the previous full
+    document are removed. latest.json gives the version, the version of the
+    latest full document and the versions of the deltas that are available so
+    that clients can catch up with small downloads. Tabs that are not in the
+    JSON output keep their previous rows.
+
+    Args:
+        path (str): Path of JSON output
+        full_every (int): Number of versions between full documents
+    """
+
+    def __init__(self, path, full_every):
+        self.folder = get_delta_folder(path)
+        self.full_every = full_every
+
+    def save(self, output_json):
+        """Save the changes in the JSON output since the last run
+
+        Args:
+            output_json (Dict): JSON that was written
+
+        Returns:
+            int: Version of feed
+        """
+        makedirs(self.folder, exist_ok=True)
+        state = load_snapshot(self.folder, "delta", "state")
+        # Values are passed through JSON so that they are compared as written.
+        # Tabs that were not updated are unchanged.
+        document = dict()
+        for tab, key_hxltag in delta_tabs.items():
+            rows = output_json.get(f"{tab}_data")
+            if rows is not None:
+                rows = json.loads(json.dumps(rows))
+                document[tab] = get_keyed_rows(rows, key_hxltag)
+            elif state is not None and tab in state["document"]:
+                document[tab] = state["document"][tab]
+        if state is None:
+            version = 1
+            patch = None
+            full_versions = list()
+            deltas = list()
+        else:
+            patch = get_patch(state["document"], document)
+            if not patch:
+                logger.info(f"No changes for delta feed version {state['version']}")
+                return state["version"]
+            version = state["version"] + 1
+            full_versions = state["full_versions"]
+            deltas = state["deltas"]
+        if patch is not None:
+            delta = {"version": version, "from_version": version - 1, "patch": patch}
+            save_json_file(delta, join(self.folder, f"delta_{version}.json"))
+            deltas.append(version)
+            logger.info(f"Saved delta feed version {version} with {len(patch)} changes")
+        if not full_versions or version - full_versions[-1] >= self.full_every:
+            full = {"version": version, "document": document}
+            save_json_file(full, join(self.folder, f"full_{version}.json"))
+            full_versions.append(version)
+            logger.info(f"Saved full document for delta feed version {version}")
+        if len(full_versions) > 2:
+            self.remove_before(full_versions[-2])
+            full_versions = full_versions[-2:]
+            deltas = [x for x in deltas if x > full_versions[0]]
+        save_snapshot(
+            self.folder,
+            "delta",
+            "state",
+            {
+                "version": version,
+                "document": document,
+                "full_versions": full_versions,
+                "deltas": deltas,
+            },
+        )
+        latest = {
+            "version": version,
+            "full_version": full_versions[-1],
+            "deltas": deltas,
+        }
+        save_json_file(latest, join(self.folder, "latest.json"))
+        return version
+
+    def remove_before(self, version):
+        for filename in listdir(self.folder):
+            name, extension = splitext(filename)
+            prefix, _, file_version = name.rpartition("_")
+            if extension != ".json" or prefix not in ("delta", "full"):
+                continue
+            if int(file_version) < version or (
+                prefix == "delta" and int(file_version) == version
+            ):
+                remove(join(self.folder, filename))
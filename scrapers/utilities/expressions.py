@@ -0,0 +1,200 @@
+import ast
+import builtins
+import math
+import re
+
+from hdx.scraper.framework.scrapers import aggregator, configurable_scraper
+
+# Expressions are evaluated with the same globals as in the modules that
+# evaluate them as strings
+scraper_globals = vars(configurable_scraper)
+aggregator_globals = vars(aggregator)
+
+int_pattern = re.compile(r"-?(?:0|[1-9][0-9]*)", re.ASCII)
+float_pattern = re.compile(
+    r"-?(?:(?:[0-9]+\.[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?|[0-9]+[eE][+-]?[0-9]+)",
+    re.ASCII,
+)
+# Characters that can be in the text of a number or constant put into a formula
+literal_characters = set("0123456789.+-_eEjJxXoObBaAcCdDfF")
+literal_words = ("True", "False", "None")
+population_placeholder = "#pzbgvjh"
+
+
+class UnsupportedExpression(Exception):
+    pass
+
+
+class NotLiteral(Exception):
+    pass
+
+
+def get_literal(value):
+    """Get what the text of a value evaluates to if put into a formula when
+    that text is a number or constant (optionally negative) so that it can be
+    passed to a compiled formula instead. The placement of values in
+    TextFormula makes the sign bind in the same way.
+
+    Args:
+        value (Any): Value
+
+    Returns:
+        Union[int, float, complex, bool, None]: Value of text of value
+    """
+    kind = type(value)
+    if kind is int or kind is bool:
+        return value
+    if kind is float:
+        if math.isfinite(value):
+            return value
+        raise NotLiteral
+    text = str(value)
+    if int_pattern.fullmatch(text):
+        return int(text)
+    if float_pattern.fullmatch(text):
+        return float(text)
+    try:
+        node = ast.parse(text, mode="eval").body
+    except SyntaxError:
+        raise NotLiteral
+    if isinstance(node, ast.Constant):
+        if type(node.value) in (int, float, complex, bool) or node.value is None:
+            return node.value
+    elif (
+        isinstance(node, ast.UnaryOp)
+        and isinstance(node.op, (ast.USub, ast.UAdd))
+        and isinstance(node.operand, ast.Constant)
+        and type(node.operand.value) in (int, float, complex)
+    ):
+        return ast.literal_eval(node)
+    raise NotLiteral
+
+
+def compile_function(expression, args, globals):
+    """Compile an expression into a function of args checking that every other
+    name in it is a global or builtin
+
+    Args:
+        expression (str): Expression
+        args (ListTuple[str]): Names of arguments
+        globals (Dict): Globals for expression
+
+    Returns:
+        Callable: Function
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        raise UnsupportedExpression(expression)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name in args or name in globals or hasattr(builtins, name):
+                continue
+            raise UnsupportedExpression(expression)
+        if isinstance(node, (ast.Lambda, ast.NamedExpr, ast.comprehension)):
+            raise UnsupportedExpression(expression)
+    return eval(f"lambda {', '.join(args)}: ({expression})", globals)
+
+
+def replace_columns(string, columns, get_replacement):
+    """Replace columns in a string in the same way as ConfigurableScraper and
+    Aggregator: longer columns first and only those still in the string after
+    earlier replacements. #population is hidden while replacing.
+
+    Args:
+        string (str): String
+        columns (ListTuple[str]): Columns
+        get_replacement (Callable[[int], str]): Function giving the replacement for the column with an index
+
+    Returns:
+        Tuple[str, List[int]]: (String with population placeholder, indices of columns replaced)
+    """
+    sorted_len_indices = sorted(
+        range(len(columns)), key=lambda k: len(columns[k]), reverse=True
+    )
+    indices = list()
+    string = string.replace("#population", population_placeholder)
+    for j in sorted_len_indices:
+        if columns[j] not in string:
+            continue
+        indices.append(j)
+        string = string.replace(columns[j], get_replacement(j))
+    return string, indices
+
+
+def get_placeholder(j):
+    return f"_pzbgvjh{j}_"
+
+
+def check_columns(columns):
+    for column in columns:
+        if not column or set(column) <= literal_characters:
+            raise UnsupportedExpression(column)
+        if any(column in word for word in literal_words):
+            raise UnsupportedExpression(column)
+        if any(column in get_placeholder(k) for k in range(len(columns))):
+            raise UnsupportedExpression(column)
+
+
+class TextFormula:
+    """Formula in which columns are replaced by the text of their values before
+    it is evaluated (as for process columns of configurable scrapers and eval
+    aggregators) compiled once into a function of the values. The function is
+    only used where replacing the text must give the same result: each column
+    becomes a whole operand that is not the base of a power or of an
+    attribute, subscript or call, and no column could be found in the text of
+    a value.
+
+    Args:
+        formula (str): Formula
+        columns (ListTuple[str]): Columns in formula
+        population_str (str): Replacement for #population
+        args (ListTuple[str]): Names used by population_str
+        globals (Dict): Globals for formula
+    """
+
+    def __init__(self, formula, columns, population_str, args, globals):
+        check_columns(columns)
+        string, self.indices = replace_columns(formula, columns, get_placeholder)
+        string = string.replace(population_placeholder, population_str)
+        used = [get_placeholder(j) for j in self.indices]
+        try:
+            tree = ast.parse(string, mode="eval")
+        except SyntaxError:
+            raise UnsupportedExpression(formula)
+        counts = dict.fromkeys(used, 0)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and node.id in counts:
+                counts[node.id] += 1
+            if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+                base = node.left
+            elif isinstance(node, (ast.Attribute, ast.Subscript)):
+                base = node.value
+            elif isinstance(node, ast.Call):
+                base = node.func
+            else:
+                continue
+            if isinstance(base, ast.Name) and base.id in counts:
+                raise UnsupportedExpression(formula)
+        if any(string.count(name) != count for name, count in counts.items()):
+            raise UnsupportedExpression(formula)
+        self.function = compile_function(string, tuple(args) + tuple(used), globals)
+
+    def __call__(self, *args, values):
+        """Evaluate the formula
+
+        Args:
+            *args: Values of args
+            values (List): Values of columns in indices
+
+        Returns:
+            Any: Result of formula
+        """
+        return self.function(*args, *map(get_literal, values))
+
+
+def get_bracket_indices(string, columns):
+    check_columns(columns)
+    _, indices = replace_columns(string, columns, get_placeholder)
+    return indices
@@ -0,0 +1,240 @@
+import json
+import logging
+from os import replace, stat
+from os.path import exists, splitext
+from shutil import rmtree
+
+from hdx.scraper.framework.utilities.fallbacks import Fallbacks
+from hdx.utilities.loader import load_json
+
+from .snapshot import get_hash, load_snapshot, save_snapshot
+
+logger = logging.getLogger(__name__)
+
+levels_mapping = {
+    "global": "world_data",
+    "regional": "regional_data",
+    "national": "national_data",
+    "subnational": "subnational_data",
+}
+sources_key = "sources_data"
+sources_hxltags = ["#indicator+name", "#date", "#meta+source", "#meta+url"]
+
+
+def get_index_folder(path):
+    return f"{splitext(path)[0]}_fallbacks"
+
+
+def get_file_info(path):
+    info = stat(path)
+    return info.st_size, info.st_mtime_ns
+
+
+class FallbackOutput:
+    """JSON output that the index was made from. It is only loaded if a file
+    of the index is missing or unreadable.
+
+    Args:
+        path (str): Path of JSON output
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.json = None
+
+    def get(self, key):
+        if self.json is None:
+            self.json = load_json(self.path)
+        return self.json[key]
+
+    def get_column(self, level, hxltag):
+        rows = self.get(levels_mapping[level])
+        return {index: row[hxltag] for index, row in enumerate(rows) if hxltag in row}
+
+
+class FallbackColumns:
+    """Columns of a level of the index that are loaded the first time they are
+    used
+
+    Args:
+        folder (str): Index folder
+        level (str): Level
+        keys (Dict[str, str]): Mapping from HXL hashtag to key of column file
+        output (FallbackOutput): Output to read columns missing from the index
+    """
+
+    def __init__(self, folder, level, keys, output):
+        self.folder = folder
+        self.level = level
+        self.keys = keys
+        self.output = output
+        self.columns = dict()
+
+    def get(self, hxltag):
+        column = self.columns.get(hxltag)
+        if column is None:
+            key = self.keys.get(hxltag)
+            if key is None:
+                column = dict()
+            else:
+                column = load_snapshot(self.folder, self.level, key)
+                if column is None:
+                    logger.error(
+                        f"Fallback column {hxltag} missing from index! "
+                        f"Reading {self.output.path}."
+                    )
+                    column = self.output.get_column(self.level, hxltag)
+            self.columns[hxltag] = column
+        return column
+
+
+class FallbackRow:
+    """Row of a level of the index that looks up values column by column"""
+
+    __slots__ = ("columns", "index")
+
+    def __init__(self, columns, index):
+        self.columns = columns
+        self.index = index
+
+    def get(self, hxltag, default=None):
+        return self.columns.get(hxltag).get(self.index, default)
+
+    def __getitem__(self, hxltag):
+        column = self.columns.get(hxltag)
+        if self.index not in column:
+            raise KeyError(hxltag)
+        return column[self.index]
+
+
+class FallbackRows:
+    """Rows of a level of the index. Iterating does not load anything until a
+    value is looked up in a row.
+
+    Args:
+        columns (FallbackColumns): Columns of level
+        no_rows (int): Number of rows
+    """
+
+    def __init__(self, columns, no_rows):
+        self.columns = columns
+        self.no_rows = no_rows
+
+    def __len__(self):
+        return self.no_rows
+
+    def __iter__(self):
+        for index in range(self.no_rows):
+            yield FallbackRow(self.columns, index)
+
+
+class FallbackSources:
+    """Sources of the index that are loaded the first time they are iterated
+
+    Args:
+        folder (str): Index folder
+        output (FallbackOutput): Output to read sources from if missing from the index
+    """
+
+    def __init__(self, folder, output):
+        self.folder = folder
+        self.output = output
+        self.rows = None
+
+    def __iter__(self):
+        if self.rows is None:
+            self.rows = load_snapshot(self.folder, "sources", "data")
+            if self.rows is None:
+                logger.error(
+                    f"Fallback sources missing from index! Reading {self.output.path}."
+                )
+                self.rows = self.output.get(sources_key)
+        return iter(self.rows)
+
+
+def save_fallbacks_index(path, output_json):
+    """Save an index of the fallbacks in the JSON output that has just been
+    written to path. Each level is stored by HXL hashtag so that fallbacks
+    for a scraper only need the columns of its outputs. Values are passed
+    through JSON so that they are the same as if read from the output. If
+    the output does not have every level, any existing index is removed.
+
+    Args:
+        path (str): Path of JSON output
+        output_json (Dict): JSON that was written
+
+    Returns:
+        None
+    """
+    folder = get_index_folder(path)
+    temp_folder = f"{folder}.tmp"
+    if exists(temp_folder):
+        rmtree(temp_folder)
+    output_keys = list(levels_mapping.values()) + [sources_key]
+    if any(key not in output_json for key in output_keys):
+        logger.info(f"Not indexing fallbacks as {path} does not have every level")
+        if exists(folder):
+            rmtree(folder)
+        return
+    levels = dict()
+    for level, output_key in levels_mapping.items():
+        rows = json.loads(json.dumps(output_json[output_key]))
+        columns = dict()
+        for index, row in enumerate(rows):
+            for hxltag, value in row.items():
+                column = columns.get(hxltag)
+                if column is None:
+                    column = dict()
+                    columns[hxltag] = column
+                column[index] = value
+        keys = dict()
+        for hxltag, column in columns.items():
+            key = get_hash(hxltag.encode("utf-8"))
+            save_snapshot(temp_folder, level, key, column)
+            keys[hxltag] = key
+        levels[level] = {"rows": len(rows), "keys": keys}
+    rows = json.loads(json.dumps(output_json[sources_key]))
+    save_snapshot(temp_folder, "sources", "data", rows)
+    index = {"file": get_file_info(path), "levels": levels}
+    save_snapshot(temp_folder, "fallbacks", "index", index)
+    if exists(folder):
+        rmtree(folder)
+    replace(temp_folder, folder)
+    logger.info(f"Indexed fallbacks of {path}")
+
+
+def add_fallbacks(path):
+    """Set up fallbacks from the index of the JSON output at path without
+    loading any values. The index is only used if it was made from the
+    current output. Otherwise the output is loaded by Fallbacks.add. If a
+    file of the index turns out to be missing or unreadable, the output is
+    loaded when it is needed.
+
+    Args:
+        path (str): Path of JSON output
+
+    Returns:
+        None
+    """
+    folder = get_index_folder(path)
+    index = None
+    if exists(path):
+        index = load_snapshot(folder, "fallbacks", "index")
+        if index is not None and index["file"] != get_file_info(path):
+            logger.info(f"Fallbacks index is older than {path}")
+            index = None
+    if index is None:
+        Fallbacks.add(path, levels_mapping=levels_mapping, sources_key=sources_key)
+        return
+    output = FallbackOutput(path)
+    sources = FallbackSources(folder, output)
+    fallbacks = dict()
+    for level, level_index in index["levels"].items():
+        columns = FallbackColumns(folder, level, level_index["keys"], output)
+        fallbacks[level] = {
+            "data": FallbackRows(columns, level_index["rows"]),
+            "admin name": Fallbacks.default_admin_name_mapping[level],
+            "sources": sources,
+            "sources hxltags": sources_hxltags,
+        }
+    Fallbacks.fallbacks = fallbacks
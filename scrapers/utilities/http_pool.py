@@ -0,0 +1,215 @@
+import logging
+from collections import Counter
+from threading import Lock
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from hdx.scraper.framework.utilities.reader import Read
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+from .deadlines import DeadlineRetry, Deadlines
+from .rate_limits import RateLimiter, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+# The same as the retries of sessions from hdx.utilities.session.get_session
+default_retries = Retry(
+    total=5,
+    backoff_factor=1,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=("HEAD", "TRACE", "GET", "PUT", "OPTIONS", "DELETE"),
+    raise_on_redirect=True,
+    raise_on_status=True,
+)
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that counts requests and new connections per host and that
+    is only closed by close_pool so that it can be shared by sessions that are
+    closed separately. If there is a rate limiter, requests are spaced out by
+    host and responses with retryable statuses are retried by the limiter
+    rather than by urllib3. Requests made while a scraper with a deadline is
+    running time out at the deadline and fail once it has passed.
+
+    Args:
+        *args: Arguments for HTTPAdapter
+        rate_limiter (Optional[RateLimiter]): RateLimiter object. Defaults to None.
+        **kwargs: Keyword arguments for HTTPAdapter
+    """
+
+    def __init__(self, *args, rate_limiter=None, **kwargs):
+        self.lock = Lock()
+        self.requests = Counter()
+        self.pools = dict()
+        self.connections = Counter()
+        self.rate_limiter = rate_limiter
+        super().__init__(*args, **kwargs)
+
+    def send_once(self, request, *args, **kwargs):
+        deadline = Deadlines.get_current()
+        if deadline is not None:
+            kwargs["timeout"] = deadline.get_timeout(kwargs.get("timeout"))
+        response = super().send(request, *args, **kwargs)
+        pool = getattr(response.raw, "_pool", None)
+        if pool is not None:
+            host = f"{pool.scheme}://{pool.host}"
+            with self.lock:
+                self.requests[host] += 1
+                self.pools[id(pool)] = host, pool
+        return response
+
+    def send(self, request, *args, **kwargs):
+        if self.rate_limiter is None:
+            return self.send_once(request, *args, **kwargs)
+        limiter = self.rate_limiter.get(urlsplit(request.url).netloc)
+        attempt = 0
+        while True:
+            limiter.acquire()
+            start = perf_counter()
+            response = self.send_once(request, *args, **kwargs)
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            limiter.update(response.status_code, perf_counter() - start, retry_after)
+            delay = limiter.get_retry_delay(
+                response.status_code, request.method, attempt, retry_after
+            )
+            if delay is None:
+                return response
+            logger.info(
+                f"Retrying {request.url} in {delay:.1f}s after status {response.status_code}"
+            )
+            response.close()
+            deadline = Deadlines.get_current()
+            if deadline is not None:
+                deadline.check(delay)
+            limiter.pause(delay)
+            attempt += 1
+
+    def get_stats(self):
+        """Get requests and new connections per host since the last reset
+
+        Returns:
+            Dict[str, Tuple[int, int]]: Mapping from host to (requests, new connections)
+        """
+        with self.lock:
+            connections = Counter()
+            for host, pool in self.pools.values():
+                connections[host] += pool.num_connections
+            connections.subtract(self.connections)
+            return {
+                host: (requests, connections[host])
+                for host, requests in self.requests.items()
+            }
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests.clear()
+            self.connections.clear()
+            for host, pool in self.pools.values():
+                self.connections[host] += pool.num_connections
+
+    def close(self):
+        pass
+
+    def close_pool(self):
+        super().close()
+
+
+class HTTPPool:
+    """Connection pool shared by the sessions of all readers so that
+    connections to a host are kept alive and reused across readers, scrapers
+    and scheduled cycles rather than each session opening its own. Sessions
+    also accept every compression that can be decoded. All sessions using the
+    pool have the retry policy set up with it rather than their own.
+    """
+
+    adapter = None
+
+    @classmethod
+    def setup(cls, configuration):
+        """Set up the shared connection pool and the per host rate limits if
+        there is a rate_limits section. Retries are those of the readers'
+        sessions except that retries on status are left to the rate limiter if
+        there is one and there are no retries after a deadline.
+
+        Args:
+            configuration (Dict): Pool configuration with pool_connections (hosts), pool_maxsize (connections per host) and optionally rate_limits
+
+        Returns:
+            None
+        """
+        cls.close()
+        rate_limits = configuration.get("rate_limits")
+        max_retries = default_retries
+        if rate_limits is None:
+            rate_limiter = None
+        else:
+            rate_limiter = RateLimiter(rate_limits)
+            max_retries = max_retries.new(
+                status_forcelist=None, respect_retry_after_header=False
+            )
+        cls.adapter = CountingAdapter(
+            pool_connections=configuration["pool_connections"],
+            pool_maxsize=configuration["pool_maxsize"],
+            max_retries=DeadlineRetry.from_retry(max_retries),
+            rate_limiter=rate_limiter,
+        )
+
+    @classmethod
+    def close(cls):
+        if cls.adapter is not None:
+            cls.adapter.close_pool()
+            cls.adapter = None
+
+    @classmethod
+    def mount(cls, session):
+        """Use the shared connection pool for http and https in a session.
+        The session then has the retries of the pool rather than its own.
+
+        Args:
+            session (requests.Session): Session
+
+        Returns:
+            None
+        """
+        adapter = cls.adapter
+        if adapter is None:
+            return
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+    @classmethod
+    def mount_readers(cls):
+        """Use the shared connection pool in the sessions of the readers
+        created by Read.create_readers
+
+        Returns:
+            None
+        """
+        for reader in Read.retrievers.values():
+            cls.mount(reader.downloader.session)
+        if cls.adapter is not None:
+            cls.adapter.reset_stats()
+            if cls.adapter.rate_limiter is not None:
+                cls.adapter.rate_limiter.reset_stats()
+
+    @classmethod
+    def report(cls):
+        """Log requests, new connections and connection reuse per host and
+        any throttling since readers were last mounted
+
+        Returns:
+            None
+        """
+        if cls.adapter is None:
+            return
+        for host, (requests, connections) in sorted(cls.adapter.get_stats().items()):
+            reused = requests - connections
+            logger.info(
+                f"{host}: {requests} requests, {connections} new connections, "
+                f"{reused / requests:.0%} reused"
+            )
+        if cls.adapter.rate_limiter is not None:
+            cls.adapter.rate_limiter.report()
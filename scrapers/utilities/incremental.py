@@ -0,0 +1,134 @@
+import hashlib
+import logging
+from os import makedirs
+from os.path import exists, getsize, join
+
+from hdx.utilities.downloader import DownloadError
+from requests import RequestException
+
+from . import atomic_write
+from .snapshot import get_hash, load_snapshot, save_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def get_tail_hash(path, length, tail_size):
+    with open(path, "rb") as f:
+        f.seek(length - tail_size)
+        return hashlib.sha256(f.read(tail_size)).hexdigest()
+
+
+class IncrementalDownloader:
+    """Downloads files from sources that only ever append to them. The
+    previous download of each url is kept in folder with its length and a
+    hash of its last tail_size bytes. Only the bytes from the start of that
+    tail are requested with a Range request and the tail is checked against
+    the hash before the new bytes are appended. If the server does not
+    support ranges or the file has changed other than by appending, the file
+    is downloaded in full. If the server ignores the range, the response is
+    used as the full download.
+
+    Args:
+        folder (str): Folder for downloaded files
+        tail_size (int): Number of bytes at end of file that must be unchanged. Defaults to 65536.
+    """
+
+    def __init__(self, folder, tail_size=65536):
+        self.folder = folder
+        self.tail_size = tail_size
+        self.bytes_downloaded = 0
+
+    def get_info(self, path):
+        length = getsize(path)
+        tail_size = min(self.tail_size, length)
+        return {
+            "length": length,
+            "tail_size": tail_size,
+            "tail_hash": get_tail_hash(path, length, tail_size),
+        }
+
+    def download_file(self, reader, url):
+        """Download file from url using the downloader of reader. If the
+        reader is saving or using saved data, reader.download_file is used.
+
+        Args:
+            reader (Read): Reader
+            url (str): URL to download
+
+        Returns:
+            str: Path of downloaded file
+        """
+        if reader.save or reader.use_saved:
+            return reader.download_file(url)
+        key = get_hash(url.encode())
+        path = join(self.folder, f"incremental_{key}")
+        downloader = reader.downloader
+        info = load_snapshot(self.folder, "incremental", key)
+        if info is not None and exists(path) and getsize(path) >= info["length"]:
+            try:
+                info = self.append(downloader, url, path, info)
+            except (DownloadError, RequestException):
+                logger.exception(f"Range request for {url} failed!")
+                info = None
+        else:
+            info = None
+        if info is None:
+            logger.info(f"Downloading all of {url}")
+            makedirs(self.folder, exist_ok=True)
+            with atomic_write(path) as temp_path:
+                downloader.download_file(url, path=temp_path, overwrite=True)
+            info = self.get_info(path)
+            self.bytes_downloaded += info["length"]
+        save_snapshot(self.folder, "incremental", key, info)
+        return path
+
+    def append(self, downloader, url, path, info):
+        # Returns None if the file must be downloaded in full
+        length = info["length"]
+        tail_size = info["tail_size"]
+        start = length - tail_size
+        # Ranges are of the encoded content so the content must not be encoded
+        headers = {"Range": f"bytes={start}-", "Accept-Encoding": "identity"}
+        response = downloader.setup(url, stream=True, headers=headers)
+        try:
+            chunks = response.iter_content(chunk_size=65536)
+            if response.status_code == 200:
+                # The server ignored the range and is sending the whole file
+                logger.info(f"{url} does not support range requests")
+                with atomic_write(path) as temp_path:
+                    with open(temp_path, "wb") as f:
+                        for chunk in chunks:
+                            f.write(chunk)
+                info = self.get_info(path)
+                self.bytes_downloaded += info["length"]
+                return info
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code != 206 or not content_range.startswith(
+                f"bytes {start}-"
+            ):
+                logger.info(f"Unexpected range {content_range} for {url}")
+                return None
+            tail = bytearray()
+            for chunk in chunks:
+                tail.extend(chunk)
+                if len(tail) >= tail_size:
+                    break
+            new = tail[tail_size:]
+            tail = tail[:tail_size]
+            if hashlib.sha256(tail).hexdigest() != info["tail_hash"]:
+                logger.info(f"{url} has changed other than by appending")
+                return None
+            with open(path, "r+b") as f:
+                # Bytes after length are from an append that did not complete
+                f.seek(length)
+                f.truncate()
+                f.write(new)
+                no_bytes = len(new)
+                for chunk in chunks:
+                    f.write(chunk)
+                    no_bytes += len(chunk)
+        finally:
+            response.close()
+        self.bytes_downloaded += tail_size + no_bytes
+        logger.info(f"Appended {no_bytes} bytes to {url}")
+        return self.get_info(path)
@@ -0,0 +1,213 @@
+import gzip
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from os import remove
+from os.path import exists, join
+from time import perf_counter
+
+from hdx.scraper.framework.outputs.json import JsonFile
+from hdx.scraper.framework.utilities import match_template
+
+from . import atomic_write
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+def encode_canonical(obj):
+    # The same bytes as hdx.utilities.saver.save_json
+    return json.dumps(obj, separators=(", ", ": ")).encode("utf-8")
+
+
+def encode_fast(obj):
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def compress_gz(data, level):
+    # mtime is fixed so that the same JSON gives the same file
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_br(data, level):
+    return brotli.compress(data, quality=level)
+
+
+encoders = {"canonical": encode_canonical}
+if orjson is not None:
+    encoders["fast"] = encode_fast
+
+compressors = {"gz": compress_gz}
+if brotli is not None:
+    compressors["br"] = compress_br
+
+
+def write_file(path, data):
+    with atomic_write(path) as temp_path:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+
+
+class CompressedJsonFile(JsonFile):
+    """JsonFile that serialises each output once with a chosen encoder and
+    writes it along with compressed copies (.gz and, if brotli is installed,
+    .br) so that they can be served without compressing on the fly. The
+    canonical encoder gives the same bytes as JsonFile. The fast encoder uses
+    orjson if it is installed (falling back to canonical if not) and is not
+    byte-identical: separators, non-ASCII characters and NaN differ. Files
+    are written and compressed in worker threads while the next output is
+    serialised. Timings are logged by report.
+
+    Args:
+        configuration (Dict): JSON configuration with optional compression (mapping from extension to level) and compression_workers
+        updatetabs (List[str]): Tabs to update
+        encoder (str): canonical or fast. Defaults to canonical.
+    """
+
+    def __init__(self, configuration, updatetabs, encoder="canonical"):
+        super().__init__(configuration, updatetabs)
+        if encoder not in encoders:
+            logger.warning(f"JSON encoder {encoder} is not available!")
+            encoder = "canonical"
+        self.encoder = encoder
+        self.compression = configuration.get("compression", dict())
+        for extension in self.compression:
+            if extension not in compressors:
+                logger.warning(f"Compression to .{extension} is not available!")
+        self.workers = configuration.get("compression_workers", 4)
+        self.timings = list()
+
+    def get_outputs(self, **kwargs):
+        """Get the JSON and the subsets defined in the additional outputs
+        configuration in the same way as JsonFile
+
+        Args:
+            **kwargs: Variables to use when evaluating template arguments
+
+        Returns:
+            List[Tuple[str, Dict]]: List of (file path, JSON)
+        """
+        outputs = [(self.configuration["output"], self.json)]
+        for filedetails in self.configuration.get("additional_outputs", []):
+            output_json = dict()
+            remove_tabs = filedetails.get("remove")
+            if remove_tabs is None:
+                tabs = filedetails["tabs"]
+            else:
+                tabs = list()
+                for key in self.json:
+                    tab = key.replace(self.suffix, "")
+                    if tab not in remove_tabs:
+                        tabs.append({"tab": tab})
+            for tabdetails in tabs:
+                key = f"{tabdetails['tab']}{self.suffix}"
+                newjson = self.json.get(key)
+                filters = tabdetails.get("filters", dict())
+                hxltags = tabdetails.get("output")
+                if (filters or hxltags or remove_tabs) and isinstance(newjson, list):
+                    rows = list()
+                    for row in newjson:
+                        if self.is_filtered(row, filters, kwargs):
+                            continue
+                        if hxltags is None:
+                            newrow = row
+                        else:
+                            newrow = dict()
+                            for hxltag in hxltags:
+                                if hxltag in row:
+                                    newrow[hxltag] = row[hxltag]
+                        rows.append(newrow)
+                    newjson = rows
+                output_json[tabdetails.get("key", key)] = newjson
+            if output_json:
+                outputs.append((filedetails["filepath"], output_json))
+        return outputs
+
+    @staticmethod
+    def is_filtered(row, filters, variables):
+        for hxltag, allowed_values in filters.items():
+            value = row.get(hxltag)
+            if not value:
+                continue
+            if isinstance(allowed_values, str):
+                template_string, match_string = match_template(allowed_values)
+                if template_string:
+                    allowed_values = eval(
+                        allowed_values.replace(template_string, match_string),
+                        dict(),
+                        variables,
+                    )
+            if isinstance(allowed_values, list):
+                if value not in allowed_values:
+                    return True
+            elif value != allowed_values:
+                return True
+        return False
+
+    def write(self, filepath, data):
+        # Runs in a worker thread
+        start = perf_counter()
+        write_file(filepath, data)
+        self.timings.append((filepath, "write", perf_counter() - start, len(data)))
+        for extension, level in self.compression.items():
+            path = f"{filepath}.{extension}"
+            compressor = compressors.get(extension)
+            if compressor is None:
+                # Do not leave a stale compressed copy
+                if exists(path):
+                    remove(path)
+                continue
+            start = perf_counter()
+            compressed = compressor(data, level)
+            write_file(path, compressed)
+            seconds = perf_counter() - start
+            self.timings.append((filepath, extension, seconds, len(compressed)))
+
+    def save(self, folder=None, **kwargs):
+        """Save JSON file and any additional subsets of that JSON defined in
+        the additional configuration along with compressed copies
+
+        Args:
+            folder (Optional[str]): Folder to save to. Defaults to None.
+            **kwargs: Variables to use when evaluating template arguments
+
+        Returns:
+            List[str]: List of file paths
+        """
+        encode = encoders[self.encoder]
+        self.timings = list()
+        filepaths = list()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = list()
+            for filepath, output_json in self.get_outputs(**kwargs):
+                if folder:
+                    filepath = join(folder, filepath)
+                logger.info(f"Writing JSON to {filepath}")
+                start = perf_counter()
+                data = encode(output_json)
+                seconds = perf_counter() - start
+                self.timings.append((filepath, self.encoder, seconds, len(data)))
+                futures.append(executor.submit(self.write, filepath, data))
+                filepaths.append(filepath)
+            for future in futures:
+                future.result()
+        return filepaths
+
+    def report(self):
+        """Log serialisation, write and compression times and sizes of the
+        last save
+
+        Returns:
+            None
+        """
+        for filepath, step, seconds, no_bytes in self.timings:
+            logger.info(f"{filepath} {step}: {seconds:.2f}s, {no_bytes} bytes")
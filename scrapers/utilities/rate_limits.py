@@ -0,0 +1,197 @@
+import logging
+import random
+import time
+from threading import Lock
+
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+defaults = {
+    "min_interval": 0,
+    "max_interval": 30,
+    "throttle_interval": 0.5,
+    "latency_factor": 3,
+    "retries": 5,
+    "backoff_factor": 0.5,
+    "retry_statuses": (429, 500, 502, 503, 504),
+}
+throttle_statuses = (429, 503)
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return Retry().parse_retry_after(value)
+    except Exception:
+        return None
+
+
+class HostLimiter:
+    """Spaces out requests to a host. The interval between requests doubles
+    (starting from at least throttle_interval) when the host responds with 429
+    or 503, grows by half (to at least the average latency) when a response
+    takes more than latency_factor times the average and otherwise shrinks back
+    towards min_interval. Retry-After
+    headers pause the host for the time given. Waiting for a host only holds
+    up requests to that host.
+
+    Args:
+        host (str): Host including port
+        configuration (Dict): Limits for host
+        clock (Callable[[], float]): Function giving seconds. Defaults to time.monotonic.
+        sleep (Callable[[float], None]): Function to sleep for seconds. Defaults to time.sleep.
+    """
+
+    def __init__(self, host, configuration, clock=time.monotonic, sleep=time.sleep):
+        self.host = host
+        self.min_interval = configuration["min_interval"]
+        self.max_interval = configuration["max_interval"]
+        self.throttle_interval = configuration["throttle_interval"]
+        self.latency_factor = configuration["latency_factor"]
+        self.retries = configuration["retries"]
+        self.backoff_factor = configuration["backoff_factor"]
+        self.retry_statuses = frozenset(configuration["retry_statuses"])
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = Lock()
+        self.interval = self.min_interval
+        self.next_time = 0
+        self.latency = None
+        self.requests = 0
+        self.throttled = 0
+        self.retried = 0
+        self.waited = 0
+
+    def acquire(self):
+        """Wait until a request can be made to the host
+
+        Returns:
+            None
+        """
+        with self.lock:
+            now = self.clock()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+            self.requests += 1
+            wait = start - now
+            self.waited += wait
+        if wait > 0:
+            self.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.next_time = max(self.next_time, self.clock() + seconds)
+
+    def update(self, status, latency, retry_after=None):
+        """Adapt the interval from a response
+
+        Args:
+            status (int): HTTP status of response
+            latency (float): Seconds taken by response
+            retry_after (Optional[float]): Seconds from Retry-After header. Defaults to None.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if status in throttle_statuses:
+                self.throttled += 1
+                interval = max(self.interval * 2, self.throttle_interval)
+            elif self.latency is not None and latency > self.latency_factor * self.latency:
+                interval = max(self.interval * 1.5, self.latency)
+            else:
+                interval = max(self.interval * 0.9, self.min_interval)
+            self.interval = min(interval, self.max_interval)
+            if status < 400:
+                if self.latency is None:
+                    self.latency = latency
+                else:
+                    self.latency = 0.8 * self.latency + 0.2 * latency
+        if retry_after:
+            self.pause(retry_after)
+
+    def get_retry_delay(self, status, method, attempt, retry_after=None):
+        """Get the delay before retrying a request or None if it should not be
+        retried. The delay is exponential backoff with jitter or the
+        Retry-After time if longer.
+
+        Args:
+            status (int): HTTP status of response
+            method (str): HTTP method of request
+            attempt (int): Number of retries so far
+            retry_after (Optional[float]): Seconds from Retry-After header. Defaults to None.
+
+        Returns:
+            Optional[float]: Seconds to wait or None
+        """
+        if status not in self.retry_statuses or attempt >= self.retries:
+            return None
+        if method not in Retry.DEFAULT_ALLOWED_METHODS:
+            return None
+        backoff = self.backoff_factor * 2**attempt * random.uniform(0.5, 1.5)
+        with self.lock:
+            self.retried += 1
+        return max(backoff, retry_after or 0)
+
+
+class RateLimiter:
+    """Registry of HostLimiters. Limits are the defaults overridden by the
+    default section of the configuration and then by any section for the
+    host.
+
+    Args:
+        configuration (Dict): Rate limit configuration
+        clock (Callable[[], float]): Function giving seconds. Defaults to time.monotonic.
+        sleep (Callable[[float], None]): Function to sleep for seconds. Defaults to time.sleep.
+    """
+
+    def __init__(self, configuration, clock=time.monotonic, sleep=time.sleep):
+        self.default = dict(defaults)
+        self.default.update(configuration.get("default", {}))
+        self.hosts = configuration.get("hosts", {})
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = Lock()
+        self.limiters = dict()
+
+    def get(self, host):
+        """Get the limiter for a host
+
+        Args:
+            host (str): Host optionally followed by a colon and port
+
+        Returns:
+            HostLimiter: Limiter for host
+        """
+        with self.lock:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                configuration = dict(self.default)
+                hostname = host.split(":")[0]
+                configuration.update(self.hosts.get(host, self.hosts.get(hostname, {})))
+                limiter = HostLimiter(host, configuration, self.clock, self.sleep)
+                self.limiters[host] = limiter
+            return limiter
+
+    def reset_stats(self):
+        with self.lock:
+            for limiter in self.limiters.values():
+                limiter.requests = 0
+                limiter.throttled = 0
+                limiter.retried = 0
+                limiter.waited = 0
+
+    def report(self):
+        """Log throttling statistics per host
+
+        Returns:
+            None
+        """
+        for host, limiter in sorted(self.limiters.items()):
+            logger.info(
+                f"{host}: {limiter.requests} requests, {limiter.throttled} throttled, "
+                f"{limiter.retried} retried, waited {limiter.waited:.1f}s, "
+                f"interval now {limiter.interval:.2f}s"
+            )
@@ -0,0 +1,302 @@
+import ast
+import logging
+from datetime import datetime
+
+from hdx.location.country import Country
+from hdx.scraper.framework.scrapers import rowparser
+from hdx.scraper.framework.scrapers.rowparser import RowParser
+from hdx.scraper.framework.utilities import match_template
+from hdx.utilities.dateparse import parse_date
+
+logger = logging.getLogger(__name__)
+
+# Filters are evaluated with the same globals as in RowParser
+filter_globals = vars(rowparser)
+
+# Filter expression nodes whose result only depends on the values of the
+# columns that they read
+dispatch_nodes = (
+    ast.Expression,
+    ast.BoolOp,
+    ast.And,
+    ast.Or,
+    ast.UnaryOp,
+    ast.Not,
+    ast.Compare,
+    ast.Eq,
+    ast.NotEq,
+    ast.In,
+    ast.NotIn,
+    ast.Is,
+    ast.IsNot,
+    ast.Constant,
+    ast.Tuple,
+    ast.List,
+    ast.Load,
+)
+
+
+def get_filter_columns(code, filter_cols):
+    """Get the columns read by a filter expression if its result only depends
+    on the values of filter columns compared with == and != or with literal
+    collections or None. Otherwise returns None.
+
+    Args:
+        code (str): Filter expression with columns replaced by row lookups
+        filter_cols (List[str]): Filter columns
+
+    Returns:
+        Optional[Set[str]]: Columns read by the filter or None
+    """
+    try:
+        tree = ast.parse(code, mode="eval")
+    except SyntaxError:
+        return None
+    columns = set()
+    lookups = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Subscript):
+            if not (
+                isinstance(node.value, ast.Name)
+                and node.value.id == "row"
+                and isinstance(node.slice, ast.Constant)
+                and node.slice.value in filter_cols
+            ):
+                return None
+            columns.add(node.slice.value)
+            lookups.add(node.value)
+            lookups.add(node.slice)
+            continue
+        if node in lookups or isinstance(node, ast.Subscript):
+            continue
+        if not isinstance(node, dispatch_nodes):
+            return None
+        if isinstance(node, ast.Compare):
+            for op, comparator in zip(node.ops, node.comparators):
+                # Identity is only meaningful when comparing with None
+                if isinstance(op, (ast.Is, ast.IsNot)) and not (
+                    isinstance(comparator, ast.Constant)
+                    and comparator.value is None
+                ):
+                    return None
+    return columns
+
+
+class CompiledRowParser(RowParser):
+    """RowParser that compiles prefilter and subset filter expressions once.
+    Filters that only compare filter columns with literals are combined into a
+    dispatch table from the values of those columns to the subsets that a row
+    belongs to, so that each distinct combination of values is evaluated once.
+    Other filters are evaluated per row from their compiled code.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Filter strings are kept for parsers that evaluate them differently
+        self.prefilter_str = self.prefilter
+        self.subset_filter_strs = list()
+        if self.prefilter is not None:
+            try:
+                self.prefilter = compile(self.prefilter, "<prefilter>", "eval")
+            except SyntaxError:
+                pass
+        self.subset_filters = list()
+        dispatch_columns = set()
+        dispatch_indices = list()
+        for i, subset in enumerate(self.subsets):
+            filter = subset["filter"]
+            if not filter:
+                self.subset_filters.append(None)
+                self.subset_filter_strs.append(None)
+                continue
+            filter = self.get_filter_str_for_eval(filter)
+            self.subset_filter_strs.append(filter)
+            columns = None
+            if self.filter_cols:
+                columns = get_filter_columns(filter, self.filter_cols)
+            if columns is not None:
+                dispatch_columns.update(columns)
+                dispatch_indices.append(i)
+            try:
+                filter = compile(filter, "<filter>", "eval")
+            except SyntaxError:
+                # Fail per row as RowParser does
+                dispatch_indices = [x for x in dispatch_indices if x != i]
+            self.subset_filters.append(filter)
+        self.dispatch_columns = sorted(dispatch_columns)
+        self.dispatch_indices = dispatch_indices
+        self.dispatch_table = dict()
+
+    def get_dispatch(self, row, adms):
+        key = tuple(row[col] for col in self.dispatch_columns)
+        dispatch = self.dispatch_table.get(key)
+        if dispatch is None:
+            values = {"row": row, "self": self, "adms": adms}
+            dispatch = {
+                i: bool(eval(self.subset_filters[i], filter_globals, values))
+                for i in self.dispatch_indices
+            }
+            self.dispatch_table[key] = dispatch
+        return dispatch
+
+    def get_should_process_subset(self, row, adms):
+        dispatch = None
+        if self.dispatch_indices:
+            try:
+                dispatch = self.get_dispatch(row, adms)
+            except (KeyError, TypeError):
+                # Missing or unhashable values: evaluate each filter so that
+                # any error is raised by the same filter as in RowParser
+                pass
+        values = None
+        should_process_subset = list()
+        for i, filter in enumerate(self.subset_filters):
+            if filter is None:
+                should_process_subset.append(True)
+                continue
+            if dispatch is not None and i in dispatch:
+                should_process_subset.append(dispatch[i])
+                continue
+            if values is None:
+                values = {"row": row, "self": self, "adms": adms}
+            should_process_subset.append(
+                bool(eval(filter, filter_globals, values))
+            )
+        return should_process_subset
+
+    def get_adms(self, row):
+        """Get the admin names of a row in the same way as RowParser.parse
+
+        Args:
+            row (Dict): Row to parse
+
+        Returns:
+            Optional[List[Optional[str]]]: Admin names or None if the row is not for an admin being processed
+        """
+        adms = [None for _ in range(len(self.admcols))]
+
+        def get_adm(admcol, i):
+            template_string, match_string = match_template(admcol)
+            if template_string and self.headers:
+                admcol = self.headers[int(match_string)]
+            adm = row[admcol]
+            if not adm:
+                return False
+            adm = adm.strip()
+            adms[i] = adm
+            if adm in self.adms[i]:
+                return True
+            exact = False
+            if self.admexact:
+                adms[i] = None
+            else:
+                if i == 0:
+                    adms[i], exact = Country.get_iso3_country_code_fuzzy(adm)
+                elif i == 1:
+                    adms[i], exact = self.adminlevel.get_pcode(
+                        adms[0], adm, logname=self.name
+                    )
+                if adms[i] not in self.adms[i]:
+                    adms[i] = None
+            return exact
+
+        for i, admcol in enumerate(self.admcols):
+            if admcol is None:
+                continue
+            if isinstance(admcol, str):
+                admcol = [admcol]
+            elif isinstance(admcol, dict):
+                value = admcol.get("value")
+                if not value:
+                    continue
+                adms[i] = value
+                continue
+            for admcl in admcol:
+                exact = get_adm(admcl, i)
+                if adms[i] and exact:
+                    break
+            if not adms[i]:
+                return None
+        return adms
+
+    def get_date(self, row):
+        """Get the date of a row in the same way as RowParser.parse
+
+        Args:
+            row (Dict): Row to parse
+
+        Returns:
+            Union[datetime, int, None]: Date or None if it is in the future and future dates are ignored
+        """
+        if isinstance(self.datecol, list):
+            dates = [str(row[x]) for x in self.datecol]
+            date = "".join(dates)
+        else:
+            date = row[self.datecol]
+        if self.datetype == "date":
+            if not isinstance(date, datetime):
+                date = parse_date(date)
+            if date > self.today and self.ignore_future_date:
+                return None
+        elif self.datetype == "year":
+            date = int(date)
+            if date > self.today.year and self.ignore_future_date:
+                return None
+        else:
+            date = int(date)
+        return date
+
+    def parse(self, row):
+        """Parse row checking for valid admin information and if the row should
+        be filtered out in each subset given its definition. Same as
+        RowParser.parse (pinned in tests/test_configurable.py) apart from how
+        the subset filters are evaluated.
+
+        Args:
+            row (Dict): Row to parse
+
+        Returns:
+            Tuple[Optional[str], Optional[List[bool]]]: (admin name, should process subset list) or (None, None)
+        """
+        if self.filtered(row):
+            return None, None
+
+        adms = self.get_adms(row)
+        if adms is None:
+            return None, None
+
+        should_process_subset = self.get_should_process_subset(row, adms)
+
+        if self.datecol:
+            date = self.get_date(row)
+            if date is None:
+                return None, None
+            for i, process in enumerate(should_process_subset):
+                if not process:
+                    continue
+                if date < self.maxdate:
+                    if self.single_maxdate:
+                        should_process_subset[i] = False
+                else:
+                    self.maxdate = date
+                if self.datelevel is None:
+                    if self.maxdateonly:
+                        if date < self.maxdates[i]:
+                            should_process_subset[i] = False
+                        else:
+                            self.maxdates[i] = date
+                    else:
+                        self.maxdates[i] = date
+                else:
+                    if self.maxdateonly:
+                        if date < self.maxdates[i][adms[self.datelevel]]:
+                            should_process_subset[i] = False
+                        else:
+                            self.maxdates[i][adms[self.datelevel]] = date
+                    else:
+                        self.maxdates[i][adms[self.datelevel]] = date
+        if self.level is None:
+            return "value", should_process_subset
+        if self.admsingle:
+            return self.admsingle, should_process_subset
+        return adms[self.level], should_process_subset
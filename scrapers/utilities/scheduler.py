@@ -0,0 +1,152 @@
+import logging
+import time
+from datetime import timedelta
+
+from hdx.utilities.dateparse import now_utc
+from hdx.utilities.errors_onexit import ErrorsOnExit
+
+from .checkpoint import Checkpoint
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledCheckpoint(Checkpoint):
+    """Checkpoint for one cycle of a scheduled run. Scrapers whose saved state
+    is older than their cadence are run again and the others are restored.
+
+    Args:
+        scheduler (Scheduler): Scheduler object
+        today (datetime): Value to use for today for the cycle
+    """
+
+    def __init__(self, scheduler, today):
+        super().__init__(scheduler.folder, "scheduled", today)
+        self.scheduler = scheduler
+
+    def load_scraper(self, name):
+        state = super().load_scraper(name)
+        if state is None:
+            return None
+        due = self.scheduler.get_due(name, state["today"], state["fallbacks_used"])
+        if due <= self.today:
+            logger.info(f"{name} is due (last run {state['today'].isoformat()})")
+            return None
+        self.scheduler.due[name] = due
+        return state
+
+    def save_scraper(self, name, scraper, calls):
+        changed = super().save_scraper(name, scraper, calls)
+        self.scheduler.due[name] = self.scheduler.get_due(
+            name, self.today, scraper.fallbacks_used
+        )
+        return changed
+
+    def skip_scraper(self, name):
+        super().skip_scraper(name)
+        # Tried again after the minimum wait like a scraper that used fallbacks
+        self.scheduler.due[name] = self.scheduler.get_due(name, self.today, True)
+
+
+class Scheduler:
+    """Runs cycles in the same process, sleeping until the next scraper is due.
+    Each scraper is run again once its cadence has passed since it last ran or
+    after the minimum wait if it used fallbacks. Cadences are in days and are
+    looked up by scraper name or by a prefix of the name followed by an
+    underscore, the longest match winning.
+
+    Args:
+        folder (str): Folder for scraper state
+        configuration (Dict): Schedule configuration
+        now (Callable[[], datetime]): Function giving the current time. Defaults to now_utc.
+        sleep (Callable[[float], None]): Function to sleep for seconds. Defaults to time.sleep.
+    """
+
+    def __init__(self, folder, configuration, now=now_utc, sleep=time.sleep):
+        self.folder = folder
+        self.default_cadence = timedelta(days=configuration["default"])
+        self.cadences = {
+            name: timedelta(days=days)
+            for name, days in configuration.get("cadences", {}).items()
+        }
+        self.minimum_wait = timedelta(
+            hours=configuration.get("minimum_wait_hours", 1)
+        )
+        self.now = now
+        self.sleep = sleep
+        self.due = dict()
+
+    def get_cadence(self, name):
+        """Get the cadence of a scraper
+
+        Args:
+            name (str): Name of scraper in runner
+
+        Returns:
+            timedelta: Time between runs of scraper
+        """
+        cadence = self.cadences.get(name)
+        if cadence is not None:
+            return cadence
+        prefixes = [key for key in self.cadences if name.startswith(f"{key}_")]
+        if not prefixes:
+            return self.default_cadence
+        return self.cadences[max(prefixes, key=len)]
+
+    def get_due(self, name, last_run, fallbacks_used):
+        """Get when a scraper is next due
+
+        Args:
+            name (str): Name of scraper in runner
+            last_run (datetime): When scraper last ran
+            fallbacks_used (bool): Whether scraper used fallbacks
+
+        Returns:
+            datetime: When scraper is next due
+        """
+        if fallbacks_used:
+            return last_run + self.minimum_wait
+        return last_run + self.get_cadence(name)
+
+    def get_wait(self, failed):
+        """Get time until the next scraper is due. This is at least the minimum
+        wait and is the minimum wait if the cycle failed.
+
+        Args:
+            failed (bool): Whether the cycle failed
+
+        Returns:
+            timedelta: Time to wait
+        """
+        if failed or not self.due:
+            return self.minimum_wait
+        return max(min(self.due.values()) - self.now(), self.minimum_wait)
+
+    def run(self, run_cycle, cycles=None):
+        """Run cycles until stopped or the number of cycles given. run_cycle
+        is called with today, the checkpoint for the cycle and an ErrorsOnExit
+        object. Errors are logged at the end of each cycle.
+
+        Args:
+            run_cycle (Callable[[datetime, ScheduledCheckpoint, ErrorsOnExit], None]): Function to run a cycle
+            cycles (Optional[int]): Number of cycles to run. Defaults to None (no limit).
+
+        Returns:
+            None
+        """
+        cycle = 0
+        while cycles is None or cycle < cycles:
+            checkpoint = ScheduledCheckpoint(self, self.now())
+            errors_on_exit = ErrorsOnExit()
+            failed = False
+            try:
+                run_cycle(checkpoint.today, checkpoint, errors_on_exit)
+            except Exception:
+                logger.exception("Scheduled cycle failed!")
+                failed = True
+            errors_on_exit.log()
+            cycle += 1
+            if cycles is not None and cycle == cycles:
+                break
+            wait = self.get_wait(failed)
+            logger.info(f"Next cycle in {wait}")
+            self.sleep(wait.total_seconds())
@@ -0,0 +1,83 @@
+import logging
+from os import listdir, makedirs, remove
+from os.path import getsize, join
+
+from . import save_json_file
+
+logger = logging.getLogger(__name__)
+
+
+class SeriesFiles:
+    """Writes time series that the JSON output keys by country to one small
+    file per country in a subfolder of folder named after the series so that
+    clients can download only the countries they show. The rows are the same
+    as under each key in the JSON output. A manifest.json in the subfolder
+    gives for each country the key in the JSON output, the file, its size in
+    bytes, the number of rows and the first and last dates.
+
+    Args:
+        folder (str): Folder for series files
+        date_hxltag (str): HXL hashtag of date in rows. Defaults to "#date+reported".
+    """
+
+    def __init__(self, folder, date_hxltag="#date+reported"):
+        self.folder = folder
+        self.date_hxltag = date_hxltag
+        self.series = dict()
+
+    def add_data_rows_by_key(self, name, key, countryiso3, rows, hxltags=None):
+        """Add rows for a country in the same way as the JSON output's
+        add_data_rows_by_key
+
+        Args:
+            name (str): Name of series
+            key (str): Key in JSON output
+            countryiso3 (str): Country (or region) code used for file name
+            rows (List[Dict]): List of dictionaries
+            hxltags (Optional[Dict]): HXL tag mapping. Defaults to None.
+
+        Returns:
+            None
+        """
+        if hxltags:
+            rows = [
+                {hxltag: row[header] for header, hxltag in hxltags.items()}
+                for row in rows
+            ]
+        self.series.setdefault(name, dict())[countryiso3] = (key, rows)
+
+    def save(self, name):
+        """Save the files and manifest of a series. Files of countries that
+        are no longer in the series are removed.
+
+        Args:
+            name (str): Name of series
+
+        Returns:
+            Dict: Manifest
+        """
+        folder = join(self.folder, name)
+        makedirs(folder, exist_ok=True)
+        countries = dict()
+        for countryiso3, (key, rows) in self.series.pop(name, dict()).items():
+            filename = f"{countryiso3}.json"
+            path = join(folder, filename)
+            save_json_file(rows, path)
+            dates = [row[self.date_hxltag] for row in rows]
+            countries[countryiso3] = {
+                "key": key,
+                "file": filename,
+                "size": getsize(path),
+                "rows": len(rows),
+                "start_date": min(dates, default=None),
+                "end_date": max(dates, default=None),
+            }
+        manifest = {"name": name, "countries": countries}
+        save_json_file(manifest, join(folder, "manifest.json"))
+        for filename in listdir(folder):
+            if filename == "manifest.json" or not filename.endswith(".json"):
+                continue
+            if filename[:-5] not in countries:
+                remove(join(folder, filename))
+        logger.info(f"Saved {len(countries)} files for {name} series")
+        return manifest
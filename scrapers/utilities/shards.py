@@ -0,0 +1,191 @@
+import logging
+import re
+import zlib
+from os import listdir
+from os.path import isdir, join
+
+from .checkpoint import Checkpoint
+from .snapshot import get_hash, load_snapshot, save_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class Shard:
+    """One of the parts of a run split by country. The GHO countries are split
+    into consecutive runs of countries of as equal size as possible so that
+    values merged in shard order are in the same order as for a run that is
+    not split. Other countries go to a shard given by a hash of their code.
+    A Shard can be used as a container of the countries in it.
+
+    Args:
+        number (int): Number of shard from 1 to no_shards
+        no_shards (int): Number of shards
+        gho_countries (ListTuple[str]): GHO countries of the whole run
+    """
+
+    run_id_format = "shard_{}_of_{}"
+    run_id_pattern = re.compile(r"shard_([0-9]+)_of_([0-9]+)")
+
+    def __init__(self, number, no_shards, gho_countries):
+        if not 1 <= number <= no_shards:
+            raise ValueError(f"Shard {number} is not between 1 and {no_shards}!")
+        self.number = number
+        self.no_shards = no_shards
+        self.gho_shards = dict()
+        no_countries = len(gho_countries)
+        for i, countryiso3 in enumerate(gho_countries):
+            self.gho_shards[countryiso3] = i * no_shards // no_countries + 1
+        self.run_id = self.run_id_format.format(number, no_shards)
+
+    @classmethod
+    def parse(cls, string, gho_countries):
+        """Get the shard given by a string of the form number/no_shards like 2/4
+
+        Args:
+            string (str): Shard number and number of shards
+            gho_countries (ListTuple[str]): GHO countries of the whole run
+
+        Returns:
+            Shard: Shard object
+        """
+        try:
+            number, no_shards = (int(x) for x in string.split("/"))
+        except ValueError:
+            raise ValueError(f"Shard {string} is not of the form 2/4!")
+        return cls(number, no_shards, gho_countries)
+
+    def get_shard_number(self, countryiso3):
+        number = self.gho_shards.get(countryiso3)
+        if number is None:
+            number = zlib.crc32(countryiso3.encode()) % self.no_shards + 1
+        return number
+
+    def __contains__(self, countryiso3):
+        return self.get_shard_number(countryiso3) == self.number
+
+    def get_countries(self, countryiso3s):
+        """Get the countries in the shard keeping their order
+
+        Args:
+            countryiso3s (ListTuple[str]): Countries
+
+        Returns:
+            List[str]: Countries in shard
+        """
+        return [countryiso3 for countryiso3 in countryiso3s if countryiso3 in self]
+
+
+def start_shard(folder, shard, today):
+    """Start or resume checkpointing the run of a shard. The state of each
+    scraper that runs is saved for the merge. A shard that is run again
+    restores the scrapers that completed and keeps its today.
+
+    Args:
+        folder (str): Folder for shards
+        shard (Shard): Shard to run
+        today (datetime): Value to use for today if the shard has not been started
+
+    Returns:
+        Checkpoint: Checkpoint object
+    """
+    info = load_snapshot(join(folder, shard.run_id), "run", "info")
+    if info is None:
+        checkpoint = Checkpoint(folder, shard.run_id, today)
+        save_snapshot(checkpoint.folder, "run", "info", {"today": today})
+        logger.info(f"Running shard {shard.number} of {shard.no_shards} in {folder}")
+    else:
+        checkpoint = Checkpoint(folder, shard.run_id, info["today"])
+        logger.info(f"Resuming shard {shard.number} of {shard.no_shards} in {folder}")
+    return checkpoint
+
+
+def merge_states(states):
+    """Merge the states of a scraper saved by the shards of a run. Values are
+    merged in shard order and sources are taken from the first shard.
+
+    Args:
+        states (List[Dict]): States of scraper in shard order
+
+    Returns:
+        Dict: Merged state
+    """
+    # States are loaded for the merge so the first can be updated in place
+    merged = states[0]
+    values = merged["values"]
+    merged["source_urls"] = set(merged["source_urls"])
+    merged["calls"] = list(merged["calls"])
+    for state in states[1:]:
+        for level, level_values in state["values"].items():
+            for output, input in zip(values[level], level_values):
+                output.update(input.items())
+        if state["sources"] != merged["sources"]:
+            logger.warning("Sources differ between shards! Using those of first shard.")
+        merged["source_urls"].update(state["source_urls"])
+        merged["fallbacks_used"] = merged["fallbacks_used"] or state["fallbacks_used"]
+        merged["calls"].extend(state["calls"])
+    merged["hash"] = get_hash("".join(state["hash"] for state in states).encode())
+    return merged
+
+
+class ShardsCheckpoint(Checkpoint):
+    """Checkpoint that restores the scrapers run by all the shards of a run
+    from their merged states so that the rest of the run (other scrapers,
+    regional aggregation and the Writer) happens once on the combined values.
+    Nothing is saved. The today of the run is that of the first shard.
+
+    Args:
+        folder (str): Folder for shards
+    """
+
+    def __init__(self, folder):
+        shards = dict()
+        if isdir(folder):
+            for filename in listdir(folder):
+                match = Shard.run_id_pattern.fullmatch(filename)
+                if match:
+                    number, no_shards = (int(x) for x in match.groups())
+                    shards.setdefault(no_shards, dict())[number] = filename
+        if len(shards) != 1:
+            raise ValueError(f"Expected shards of one run in {folder}!")
+        no_shards, run_ids = next(iter(shards.items()))
+        todays = list()
+        self.shard_folders = list()
+        for number in range(1, no_shards + 1):
+            run_id = run_ids.get(number)
+            info = None
+            if run_id:
+                shard_folder = join(folder, run_id)
+                info = load_snapshot(shard_folder, "run", "info")
+            if info is None:
+                raise ValueError(f"Shard {number} of {no_shards} is missing in {folder}!")
+            todays.append(info["today"])
+            self.shard_folders.append(shard_folder)
+        if any(today.date() != todays[0].date() for today in todays):
+            logger.warning("Shards were run on different days! Using first shard's.")
+        super().__init__(folder, "merged", todays[0])
+        self.published = dict()
+        self.states = dict()
+        logger.info(f"Merging {no_shards} shards from {folder}")
+
+    def load_scraper(self, name):
+        if name not in self.states:
+            states = list()
+            for shard_folder in self.shard_folders:
+                state = load_snapshot(shard_folder, "scraper", name)
+                if state is None:
+                    break
+                states.append(state)
+            if len(states) == len(self.shard_folders):
+                self.states[name] = merge_states(states)
+            else:
+                self.states[name] = None
+        return self.states[name]
+
+    def save_scraper(self, name, scraper, calls):
+        return True
+
+    def is_changed(self, name):
+        return True
+
+    def save_published(self):
+        pass
@@ -0,0 +1,243 @@
+import logging
+from collections.abc import Mapping
+from os.path import exists, getsize
+from threading import Lock, local
+from time import perf_counter
+
+from hdx.scraper.framework.utilities.reader import Read
+
+logger = logging.getLogger(__name__)
+
+# Options that change how a downloaded file is parsed into rows
+parse_options = (
+    "format",
+    "sheet",
+    "headers",
+    "use_hxl",
+    "xlsx2csv",
+    "compression",
+)
+
+
+def get_source_key(datasetinfo):
+    url = datasetinfo.get("url")
+    if url is None:
+        url = datasetinfo.get("dataset")
+        if not isinstance(url, str):
+            return None
+    elif isinstance(url, list):
+        url = tuple(url)
+    key = [url, datasetinfo.get("resource")]
+    for option in parse_options:
+        value = datasetinfo.get(option)
+        if isinstance(value, list):
+            value = tuple(value)
+        key.append(value)
+    return tuple(key)
+
+
+def find_datasetinfos(configuration):
+    if isinstance(configuration, Mapping):
+        if "format" in configuration and (
+            "url" in configuration or "dataset" in configuration
+        ):
+            yield configuration
+            return
+        for value in configuration.values():
+            yield from find_datasetinfos(value)
+
+
+class SharedSource:
+    def __init__(self, consumers):
+        self.consumers = consumers
+        self.lock = Lock()
+        self.headers = None
+        self.rows = None
+        self.bytes = 0
+        self.seconds = 0
+        self.reads = 0
+
+
+class SharedSources:
+    """Run-scoped registry of tabular sources that are read by more than one
+    scraper. Each shared source is downloaded and parsed once, callers that
+    arrive during the download wait for it and every caller gets its own copy
+    of the parsed rows. Rows are dropped once all expected callers have read
+    them.
+
+    Args:
+        configuration (Dict): Project configuration
+    """
+
+    def __init__(self, configuration):
+        self.lock = Lock()
+        self.sources = dict()
+        self.original_readers = None
+        self.saved_reads = 0
+        self.saved_bytes = 0
+        self.saved_seconds = 0
+        consumers = dict()
+        datasetinfos = list()
+        for datasetinfo in find_datasetinfos(configuration):
+            key = get_source_key(datasetinfo)
+            if key is None:
+                continue
+            consumers[key] = consumers.get(key, 0) + 1
+            datasetinfos.append((key, datasetinfo))
+        self.consumers = dict()
+        for key, datasetinfo in datasetinfos:
+            if consumers[key] == 1:
+                datasetinfo.pop("shared_source", None)
+                continue
+            # The key is kept in the dataset information as scrapers take
+            # copies of it
+            datasetinfo["shared_source"] = key
+            self.consumers[key] = consumers[key]
+
+    def setup_readers(self, workbook_parser=None):
+        """Replace the readers with ones that serve shared sources and, if a
+        WorkbookParser is given, workbooks parsed by it
+
+        Args:
+            workbook_parser (Optional[WorkbookParser]): WorkbookParser object. Defaults to None.
+
+        Returns:
+            None
+        """
+        if not self.consumers and workbook_parser is None:
+            return
+        self.original_readers = Read.retrievers
+        Read.retrievers = {
+            name: SharedRead.from_reader(reader, self, workbook_parser)
+            for name, reader in Read.retrievers.items()
+        }
+
+    def close(self):
+        if self.original_readers is not None:
+            Read.retrievers = self.original_readers
+            self.original_readers = None
+        self.sources.clear()
+        if self.saved_reads:
+            logger.info(
+                f"Shared sources saved {self.saved_reads} downloads: "
+                f"{self.saved_bytes / 1048576:.1f} MB and "
+                f"{self.saved_seconds:.1f} seconds"
+            )
+
+    def get_source(self, key):
+        with self.lock:
+            source = self.sources.get(key)
+            if source is None:
+                source = SharedSource(self.consumers.get(key[0], 1))
+                self.sources[key] = source
+            return source
+
+    def read(self, key, read_fn):
+        source = self.get_source(key)
+        with source.lock:
+            if source.rows is None:
+                start = perf_counter()
+                headers, iterator, paths = read_fn()
+                source.rows = list(iterator)
+                source.headers = headers
+                source.seconds = perf_counter() - start
+                source.bytes = sum(getsize(x) for x in paths if exists(x))
+            else:
+                self.saved_reads += 1
+                self.saved_bytes += source.bytes
+                self.saved_seconds += source.seconds
+            headers = source.headers
+            rows = source.rows
+            source.reads += 1
+            if source.reads >= source.consumers:
+                with self.lock:
+                    del self.sources[key]
+        return list(headers), map(dict, rows)
+
+
+class SharedRead(Read):
+    """Reader that serves tabular sources marked as shared from a
+    SharedSources registry and workbooks from a WorkbookParser if there is one
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shared_sources = None
+        self.workbook_parser = None
+        self.paths = local()
+
+    @classmethod
+    def from_reader(cls, reader, shared_sources, workbook_parser=None):
+        shared_reader = cls(
+            reader.downloader,
+            fallback_dir=reader.fallback_dir,
+            saved_dir=reader.saved_dir,
+            temp_dir=reader.temp_dir,
+            save=reader.save,
+            use_saved=reader.use_saved,
+            prefix=reader.prefix,
+            delete=False,
+            today=reader.today,
+        )
+        shared_reader.shared_sources = shared_sources
+        shared_reader.workbook_parser = workbook_parser
+        return shared_reader
+
+    def add_path(self, path):
+        paths = getattr(self.paths, "paths", None)
+        if paths is not None:
+            paths.append(path)
+
+    def download_file(self, *args, **kwargs):
+        path = super().download_file(*args, **kwargs)
+        self.add_path(path)
+        return path
+
+    def get_tabular_rows(
+        self,
+        url,
+        has_hxl=False,
+        headers=1,
+        dict_form=False,
+        filename=None,
+        logstr=None,
+        fallback=False,
+        **kwargs,
+    ):
+        workbook_parser = self.workbook_parser
+        if workbook_parser is not None and dict_form:
+            # The workbook is downloaded with download_file so its path is
+            # already recorded
+            result = workbook_parser.get_tabular_rows(
+                self, url, has_hxl, headers, filename, logstr, fallback, kwargs
+            )
+            if result is not None:
+                return result
+        return super().get_tabular_rows(
+            url, has_hxl, headers, dict_form, filename, logstr, fallback, **kwargs
+        )
+
+    def read_tabular(self, datasetinfo, **kwargs):
+        shared_key = datasetinfo.get("shared_source")
+        if shared_key is None:
+            return super().read_tabular(datasetinfo, **kwargs)
+        url = datasetinfo["url"]
+        if isinstance(url, list):
+            url = tuple(url)
+        key = [shared_key, url]
+        if self.use_saved:
+            # Saved files are looked up by name so they are part of the source
+            for option in ("filename", "file_prefix"):
+                key.append(kwargs.get(option, datasetinfo.get(option)))
+
+        def read_fn():
+            self.paths.paths = list()
+            try:
+                headers, iterator = super(SharedRead, self).read_tabular(
+                    datasetinfo, **kwargs
+                )
+                return headers, iterator, self.paths.paths
+            finally:
+                self.paths.paths = None
+
+        return self.shared_sources.read(tuple(key), read_fn)
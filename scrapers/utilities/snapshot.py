@@ -0,0 +1,86 @@
+import hashlib
+import logging
+import pickle
+from os import makedirs
+from os.path import exists, join
+
+from hdx.location.country import Country
+from hdx.utilities.loader import load_yaml
+
+from . import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+def get_hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def load_snapshot(folder, name, key):
+    path = join(folder, f"{name}_{key}.pickle")
+    if not exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        logger.exception(f"Ignoring unreadable snapshot {path}!")
+        return None
+
+
+def save_snapshot(folder, name, key, obj):
+    makedirs(folder, exist_ok=True)
+    path = join(folder, f"{name}_{key}.pickle")
+    with atomic_write(path) as temp_path:
+        with open(temp_path, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def read_project_configuration(path, folder):
+    with open(path, "rb") as f:
+        key = get_hash(f.read())
+    configuration = load_snapshot(folder, "configuration", key)
+    if configuration is None:
+        configuration = load_yaml(path)
+        save_snapshot(folder, "configuration", key, configuration)
+        logger.info(f"Saved configuration snapshot {key} for {path}")
+    else:
+        logger.info(f"Loaded configuration snapshot {key} for {path}")
+    return configuration
+
+
+def setup_countries(configuration, use_live, today, folder=None):
+    # Country._countriesdata is private to hdx-python-country, whose version is
+    # pinned in requirements.txt and tests/test_snapshot.py
+    country_name_overrides = configuration["country_name_overrides"]
+    country_name_mappings = configuration["country_name_mappings"]
+    if folder is None or Country._countriesdata is not None:
+        Country.countriesdata(
+            use_live=use_live,
+            country_name_overrides=country_name_overrides,
+            country_name_mappings=country_name_mappings,
+        )
+        return
+    # Live country data is refreshed at most once a day
+    key = get_hash(
+        pickle.dumps(
+            (
+                dict(country_name_overrides),
+                dict(country_name_mappings),
+                today.strftime("%Y-%m-%d") if use_live else None,
+            )
+        )
+    )
+    countriesdata = load_snapshot(folder, "countries", key)
+    if countriesdata is None:
+        countriesdata = Country.countriesdata(
+            use_live=use_live,
+            country_name_overrides=country_name_overrides,
+            country_name_mappings=country_name_mappings,
+        )
+        save_snapshot(folder, "countries", key, countriesdata)
+        return
+    Country.set_country_name_overrides(country_name_overrides)
+    Country.set_country_name_mappings(country_name_mappings)
+    Country._countriesdata = countriesdata
+    logger.info(f"Loaded countries snapshot {key}")
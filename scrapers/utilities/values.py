@@ -0,0 +1,254 @@
+from array import array
+from collections.abc import MutableMapping
+from operator import itemgetter
+from threading import Lock
+
+int_bounds = (-(2**63), 2**63)
+
+
+class AdminIndex:
+    """Admin units of a level (ISO3 codes, pcodes, region names or "value")
+    interned as consecutive ints. There is one index per level name shared by
+    all Values of the level.
+
+    Args:
+        level (str): Level name
+    """
+
+    indices = dict()
+    lock = Lock()
+
+    def __init__(self, level):
+        self.level = level
+        self.ids = dict()
+        self.adms = list()
+
+    @classmethod
+    def get(cls, level):
+        """Get the index for a level
+
+        Args:
+            level (str): Level name
+
+        Returns:
+            AdminIndex: Index for level
+        """
+        index = cls.indices.get(level)
+        if index is None:
+            with cls.lock:
+                index = cls.indices.setdefault(level, cls(level))
+        return index
+
+    def intern(self, adm):
+        id = self.ids.get(adm)
+        if id is None:
+            with self.lock:
+                id = self.ids.get(adm)
+                if id is None:
+                    id = len(self.adms)
+                    self.adms.append(adm)
+                    self.ids[adm] = id
+        return id
+
+    def get_ids(self, adms):
+        return [self.intern(adm) for adm in adms]
+
+
+def get_ids_getter(ids):
+    # Like get_row_projector, always returns a tuple
+    if not ids:
+        return lambda data: ()
+    getter = itemgetter(*ids)
+    if len(ids) == 1:
+        return lambda data: (getter(data),)
+    return getter
+
+
+class Values(MutableMapping):
+    """Mapping from admin unit to value for one HXL hashtag of a scraper that
+    can be used in place of the dict in BaseScraper.values. Values are stored
+    by admin id in a typed array while they are all ints or all floats and in
+    a list otherwise, with a mask of the ids that have a value. The insertion
+    order of admin units is kept so that iterating is the same as for a dict.
+
+    Args:
+        level (str): Level name
+        items (Iterable[Tuple[str, Any]]): Initial admin units and values. Defaults to empty tuple.
+    """
+
+    __slots__ = ("index", "order", "present", "data", "kind")
+
+    def __init__(self, level, items=()):
+        self.index = AdminIndex.get(level)
+        self.order = array("i")
+        self.present = bytearray()
+        self.data = None
+        self.kind = None
+        self.update(items)
+
+    def __reduce__(self):
+        return type(self), (self.index.level, list(self.items()))
+
+    def __repr__(self):
+        return f"Values({self.index.level!r}, {dict(self.items())!r})"
+
+    def grow(self):
+        size = len(self.index.adms)
+        extra = size - len(self.present)
+        self.present.extend(bytes(extra))
+        if self.kind is None:
+            self.data.extend([None] * extra)
+        else:
+            zeros = bytes(extra * self.data.itemsize)
+            self.data.extend(array(self.data.typecode, zeros))
+
+    def use_list(self):
+        self.data = [
+            value if present else None
+            for value, present in zip(self.data, self.present)
+        ]
+        self.kind = None
+
+    def __setitem__(self, adm, value):
+        id = self.index.intern(adm)
+        if self.data is None:
+            kind = type(value)
+            if kind is int and int_bounds[0] <= value < int_bounds[1]:
+                self.data = array("q")
+                self.kind = int
+            elif kind is float:
+                self.data = array("d")
+                self.kind = float
+            else:
+                self.data = list()
+        if id >= len(self.present):
+            self.grow()
+        if self.kind is not None:
+            if type(value) is not self.kind:
+                self.use_list()
+            elif self.kind is int and not int_bounds[0] <= value < int_bounds[1]:
+                self.use_list()
+        self.data[id] = value
+        if not self.present[id]:
+            self.present[id] = 1
+            self.order.append(id)
+
+    def get_id(self, adm):
+        id = self.index.ids.get(adm)
+        if id is None or id >= len(self.present) or not self.present[id]:
+            return None
+        return id
+
+    def __getitem__(self, adm):
+        id = self.get_id(adm)
+        if id is None:
+            raise KeyError(adm)
+        return self.data[id]
+
+    def get(self, adm, default=None):
+        id = self.get_id(adm)
+        if id is None:
+            return default
+        return self.data[id]
+
+    def __contains__(self, adm):
+        return self.get_id(adm) is not None
+
+    def __delitem__(self, adm):
+        id = self.get_id(adm)
+        if id is None:
+            raise KeyError(adm)
+        self.present[id] = 0
+        self.order.remove(id)
+        if self.kind is None:
+            self.data[id] = None
+
+    def __iter__(self):
+        adms = self.index.adms
+        for id in self.order:
+            yield adms[id]
+
+    def __len__(self):
+        return len(self.order)
+
+    def take(self, ids, getter=None):
+        """Get the values of admin ids from the index of the level with None
+        where there is no value
+
+        Args:
+            ids (List[int]): Admin ids
+            getter (Optional[Callable]): get_ids_getter(ids) if already made. Defaults to None.
+
+        Returns:
+            List: Values
+        """
+        if self.data is None:
+            return [None] * len(ids)
+        if len(self.present) < len(self.index.adms):
+            self.grow()
+        if getter is None:
+            getter = get_ids_getter(ids)
+        values = getter(self.data)
+        if self.kind is None:
+            # Ids without a value are None in a list
+            return list(values)
+        mask = getter(self.present)
+        if all(mask):
+            return list(values)
+        return [value if present else None for value, present in zip(values, mask)]
+
+
+def set_values(scraper):
+    """Replace the value dicts of a scraper with Values
+
+    Args:
+        scraper (BaseScraper): Scraper
+
+    Returns:
+        None
+    """
+    scraper.values = {
+        level: tuple(Values(level, values.items()) for values in level_values)
+        for level, level_values in scraper.values.items()
+    }
+
+
+class ValuesScraper:
+    """Mixin for scrapers that stores their values in Values rather than
+    dicts. It must come before BaseScraper in the bases.
+    """
+
+    def initialise_values_sources(self, source_configuration={}):
+        super().initialise_values_sources(source_configuration)
+        set_values(self)
+
+
+def get_value_rows(adms, row_fns, all_values):
+    """Get rows for admin units made up of the results of row_fns followed by
+    the values of each column in all_values. Columns are built one at a time
+    and those in Values are taken by admin id.
+
+    Args:
+        adms (ListTuple[str]): Admin units
+        row_fns (ListTuple[Callable[[str], str]]): Functions to populate additional columns
+        all_values (List[Dict]): Values of each column
+
+    Returns:
+        List[List]: Rows
+    """
+    if not row_fns and not all_values:
+        return [list() for _ in adms]
+    columns = [[fn(adm) for adm in adms] for fn in row_fns]
+    getters = dict()
+    for values in all_values:
+        if isinstance(values, Values):
+            index = values.index
+            ids_getter = getters.get(index.level)
+            if ids_getter is None:
+                ids = index.get_ids(adms)
+                ids_getter = ids, get_ids_getter(ids)
+                getters[index.level] = ids_getter
+            columns.append(values.take(*ids_getter))
+        else:
+            columns.append([values.get(adm) for adm in adms])
+    return list(map(list, zip(*columns)))
@@ -0,0 +1,154 @@
+import logging
+import pickle
+
+from hdx.utilities import __version__ as utilities_version
+
+from .snapshot import get_hash, load_snapshot, save_snapshot
+
+logger = logging.getLogger(__name__)
+
+workbook_formats = ("xls", "xlsx")
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(val) for val in value)
+    hash(value)
+    return value
+
+
+def parse_workbook(downloader, path, has_hxl, headers, kwargs):
+    """Parse a downloaded workbook into rows. Rows are returned as tuples of
+    values with the keys given once rather than as dictionaries so that they
+    can be cached by column.
+
+    Args:
+        downloader (Download): Download object
+        path (str): Path to workbook
+        has_hxl (bool): Whether the workbook has an HXL hashtag row
+        headers (Union[int, ListTuple[int], ListTuple[str]]): Header row(s) or headers
+        kwargs (Dict): Parameters to pass to get_tabular_rows
+
+    Returns:
+        Tuple[List[str], Tuple[str], List[Union[Tuple, Dict]]]: Headers, keys of rows and rows
+    """
+    headers, iterator = downloader.get_tabular_rows(
+        path, has_hxl, headers, True, **kwargs
+    )
+    keys = None
+    rows = list()
+    for row in iterator:
+        if keys is None:
+            keys = tuple(row.keys())
+        if len(row) == len(keys) and tuple(row.keys()) == keys:
+            rows.append(tuple(row.values()))
+        else:
+            rows.append(row)
+    return headers, keys, rows
+
+
+def get_iterator(keys, rows):
+    return (dict(zip(keys, row)) if isinstance(row, tuple) else row for row in rows)
+
+
+class WorkbookCache:
+    """Cache of parsed workbooks in a folder. Entries are keyed by the hash of
+    the contents of the workbook and the options used to parse it so changed
+    workbooks are parsed again. Rows are stored by column.
+
+    Args:
+        folder (str): Folder for cache
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.hits = 0
+
+    @staticmethod
+    def get_key(path, has_hxl, headers, kwargs):
+        with open(path, "rb") as f:
+            content_hash = get_hash(f.read())
+        options = (utilities_version, has_hxl, freeze(headers), freeze(kwargs))
+        return f"{content_hash}_{get_hash(pickle.dumps(options))}"
+
+    def load(self, key):
+        cached = load_snapshot(self.folder, "workbook", key)
+        if cached is None:
+            return None
+        headers, keys, columns, rows = cached
+        if columns is not None:
+            rows = zip(*columns)
+        self.hits += 1
+        return headers, keys, rows
+
+    def save(self, key, parsed):
+        headers, keys, rows = parsed
+        if keys and all(isinstance(row, tuple) for row in rows):
+            cached = headers, keys, list(zip(*rows)), None
+        else:
+            cached = headers, keys, None, rows
+        save_snapshot(self.folder, "workbook", key, cached)
+
+
+class WorkbookParser:
+    """Parses xls and xlsx sources of configurable scrapers, keeping the
+    parsed workbooks in a WorkbookCache so that workbooks found there are not
+    parsed again.
+
+    Args:
+        cache_folder (str): Folder for cache of parsed workbooks
+    """
+
+    def __init__(self, cache_folder):
+        self.cache = WorkbookCache(cache_folder)
+
+    @staticmethod
+    def is_cacheable(url, headers, kwargs):
+        if not isinstance(url, str) or kwargs.get("format") not in workbook_formats:
+            return False
+        try:
+            freeze(headers)
+            freeze(kwargs)
+        except TypeError:
+            return False
+        return True
+
+    def close(self):
+        if self.cache.hits:
+            logger.info(f"Read {self.cache.hits} parsed workbooks from cache")
+
+    def get_tabular_rows(
+        self, reader, url, has_hxl, headers, filename, logstr, fallback, kwargs
+    ):
+        """Get rows of a workbook from the cache, parsing and caching it if it
+        is not there
+
+        Args:
+            reader (Read): Reader object
+            url (str): Url to download
+            has_hxl (bool): Whether the workbook has an HXL hashtag row
+            headers (Union[int, ListTuple[int], ListTuple[str]]): Header row(s) or headers
+            filename (Optional[str]): Filename of saved file
+            logstr (Optional[str]): Text to use in log string to describe download
+            fallback (bool): Whether to use static fallback if download fails
+            kwargs (Dict): Parameters to pass to download_file and get_tabular_rows calls
+
+        Returns:
+            Optional[Tuple[List[str], Iterator[Dict]]]: (headers, iterator) or None to read in the usual way
+        """
+        if not self.is_cacheable(url, headers, kwargs):
+            return None
+        path = reader.download_file(url, filename, logstr, fallback, **kwargs)
+        kwargs.pop("file_prefix", None)
+        cache_key = self.cache.get_key(path, has_hxl, headers, kwargs)
+        parsed = self.cache.load(cache_key)
+        if parsed is None:
+            parsed = parse_workbook(reader.downloader, path, has_hxl, headers, kwargs)
+            try:
+                self.cache.save(cache_key, parsed)
+            except Exception:
+                logger.exception(f"Could not cache parsed workbook {cache_key}!")
+        headers, keys, rows = parsed
+        return headers, get_iterator(keys, rows)
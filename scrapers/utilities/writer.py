@@ -0,0 +1,224 @@
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from hdx.location.adminlevel import AdminLevel
+from hdx.scraper.framework.scrapers.aggregator import Aggregator
+from hdx.scraper.framework.utilities.writer import Writer
+from hdx.utilities.typehint import ListTuple
+
+logger = logging.getLogger(__name__)
+
+
+class DirtyRows(list):
+    """Rows that carry whether any scraper whose values are in them has
+    changed
+
+    Args:
+        rows (List[List]): Rows
+        dirty (bool): Whether any scraper whose values are in the rows has changed
+    """
+
+    def __init__(self, rows, dirty):
+        super().__init__(rows)
+        self.dirty = dirty
+
+
+class DirtyWriter(Writer):
+    """Writer that only updates tabs in published outputs like Google Sheets
+    if a scraper whose values go into the tab has changed. Changed scrapers
+    are given by the changed member variable of the runner. Aggregators have
+    changed if any of the HXL hashtags they take as input have (eval
+    aggregators if anything has). Other outputs are written as whole files so
+    are always updated.
+
+    Args:
+        runner (CheckpointRunner): CheckpointRunner object
+        outputs (Dict[str, BaseOutput]): Mapping from names to outputs
+        published (ListTuple[str]): Names of published outputs. Defaults to ("gsheets",).
+    """
+
+    def __init__(self, runner, outputs, published=("gsheets",)):
+        super().__init__(runner, outputs)
+        self.published = published
+        self.changed = self.get_changed()
+        self.dirty = True
+
+    def get_changed(self):
+        """Get names of scrapers including aggregators whose values have
+        changed
+
+        Returns:
+            Set[str]: Names of changed scrapers
+        """
+        changed = set()
+        hxltags = defaultdict(set)
+
+        def add_changed(name, scraper):
+            changed.add(name)
+            for level, headers in scraper.headers.items():
+                hxltags[level].update(headers[1])
+
+        for name in self.runner.changed:
+            add_changed(name, self.runner.scrapers[name])
+        for name in self.runner.scraper_names:
+            scraper = self.runner.scrapers[name]
+            if not isinstance(scraper, Aggregator) or not scraper.has_run:
+                continue
+            input_level = getattr(scraper, "input_level", None)
+            if input_level is None or scraper.datasetinfo["action"] == "eval":
+                is_changed = bool(changed)
+            else:
+                input_hxltags = hxltags[input_level]
+                is_changed = any(
+                    hxltag in input_hxltags for hxltag in scraper.datasetinfo["input"]
+                )
+            if is_changed:
+                add_changed(name, scraper)
+        return changed
+
+    def is_dirty(self, level, names=None, overrides={}):
+        """Check if any of the given scrapers with values at a level (or
+        overridden to go to the level) has changed
+
+        Args:
+            level (str): Level like national
+            names (Optional[ListTuple[str]]): Names of scrapers. Defaults to None (all scrapers).
+            overrides (Dict[str, Dict]): Dictionary mapping scrapers to level mappings. Defaults to {}.
+
+        Returns:
+            bool: Whether any scraper has changed
+        """
+        if names is None:
+            names = self.runner.scraper_names
+        for name in names:
+            if name not in self.changed:
+                continue
+            scraper = self.runner.scrapers.get(name)
+            if scraper is None:
+                continue
+            if level in scraper.headers:
+                return True
+            if level in overrides.get(name, {}).values():
+                return True
+        return False
+
+    def update(self, name, data):
+        if self.dirty:
+            super().update(name, data)
+            return
+        if not data:
+            return
+        logger.info(f"Updating tab: {name} (unchanged so not published)")
+        for key, output in self.outputs.items():
+            if key not in self.published:
+                output.update_tab(name, data)
+
+    def get_toplevel_rows(
+        self,
+        names: Optional[ListTuple[str]] = None,
+        overrides: Dict[str, Dict] = {},
+        toplevel: str = "allregions",
+    ) -> List[List]:
+        rows = super().get_toplevel_rows(names, overrides, toplevel)
+        return DirtyRows(rows, self.is_dirty(toplevel, names, overrides))
+
+    def get_regional_rows(
+        self,
+        regional: ListTuple[str],
+        names: Optional[ListTuple[str]] = None,
+        overrides: Dict[str, Dict] = {},
+        level: str = "regional",
+    ):
+        rows = super().get_regional_rows(regional, names, overrides, level)
+        return DirtyRows(rows, self.is_dirty(level, names, overrides))
+
+    @staticmethod
+    def is_dirty_rows(*rows_list):
+        # Rows not from get_toplevel_rows or get_regional_rows are dirty
+        return any(getattr(rows, "dirty", True) for rows in rows_list if rows)
+
+    def update_toplevel(
+        self,
+        toplevel_rows: List[List],
+        tab: str = "allregions",
+        regional_rows: Optional[List[List]] = None,
+        regional_adm: str = "ALL",
+        regional_hxltags: Optional[ListTuple[str]] = None,
+        regional_first: bool = False,
+    ) -> None:
+        self.dirty = self.is_dirty_rows(toplevel_rows, regional_rows)
+        try:
+            super().update_toplevel(
+                toplevel_rows,
+                tab,
+                regional_rows,
+                regional_adm,
+                regional_hxltags,
+                regional_first,
+            )
+        finally:
+            self.dirty = True
+
+    def update_regional(
+        self,
+        regional_rows: List[List],
+        toplevel_rows: Optional[List[List]] = None,
+        toplevel_hxltags: Optional[ListTuple[str]] = None,
+        tab: str = "regional",
+        toplevel: str = "allregions",
+    ) -> None:
+        self.dirty = self.is_dirty_rows(regional_rows, toplevel_rows)
+        try:
+            super().update_regional(
+                regional_rows, toplevel_rows, toplevel_hxltags, tab, toplevel
+            )
+        finally:
+            self.dirty = True
+
+    def update_national(
+        self,
+        countries: ListTuple[str],
+        names: Optional[ListTuple[str]] = None,
+        flag_countries: Optional[Dict] = None,
+        iso3_to_region: Optional[Dict] = None,
+        ignore_regions: ListTuple[str] = tuple(),
+        level="national",
+        tab="national",
+    ) -> None:
+        self.dirty = self.is_dirty(level, names)
+        try:
+            super().update_national(
+                countries,
+                names,
+                flag_countries,
+                iso3_to_region,
+                ignore_regions,
+                level,
+                tab,
+            )
+        finally:
+            self.dirty = True
+
+    def update_subnational(
+        self,
+        adminlevel: AdminLevel,
+        names: Optional[ListTuple[str]] = None,
+        level: str = "subnational",
+        tab: str = "subnational",
+    ) -> None:
+        self.dirty = self.is_dirty(level, names)
+        try:
+            super().update_subnational(adminlevel, names, level, tab)
+        finally:
+            self.dirty = True
+
+    def update_sources(self, *args, names: Optional[ListTuple[str]] = None, **kwargs):
+        if names is None:
+            self.dirty = bool(self.changed)
+        else:
+            self.dirty = any(name in self.changed for name in names)
+        try:
+            super().update_sources(*args, names=names, **kwargs)
+        finally:
+            self.dirty = True
@@ -1,12 +1,13 @@
 import logging
 
 from hdx.scraper.framework.base_scraper import BaseScraper
-from scrapers.utilities import calculate_ratios
+from scrapers.utilities import calculate_ratios, get_row_projector
+from scrapers.utilities.values import ValuesScraper
 
 logger = logging.getLogger(__name__)
 
 
-class VaccinationCampaigns(BaseScraper):
+class VaccinationCampaigns(ValuesScraper, BaseScraper):
     def __init__(self, datasetinfo, countryiso3s, outputs):
         super().__init__(
             "vaccination_campaigns",
@@ -24,30 +25,27 @@ class VaccinationCampaigns(BaseScraper):
     def run(self):
         headers, iterator = self.get_reader().read_hdx(self.datasetinfo)
         hxlrow = next(iterator)
+        header_to_hxltag = {
+            header: hxltag for header, hxltag in hxlrow.items() if hxltag
+        }
+        get_country_status = get_row_projector(
+            hxlrow, ("#country+code", "#status+name")
+        )
         campaigns_per_country = dict()
         affected_campaigns_per_country = self.get_values("national")[0]
         affected_campaigns_per_country2 = dict()
         for row in iterator:
-            newrow = dict()
-            countryiso = None
-            status = None
-            for key in row:
-                hxltag = hxlrow[key]
-                if not hxltag:
-                    continue
-                value = row[key]
-                newrow[hxlrow[key]] = value
-                if hxltag == "#country+code":
-                    countryiso = value
-                elif hxltag == "#status+name":
-                    if value:
-                        status = value.lower()
-                    else:
-                        status = None
+            countryiso, status = get_country_status(row)
             if not countryiso or countryiso not in self.countryiso3s:
                 continue
-            if not status or status == "completed as planned":
+            if not status:
+                continue
+            status = status.lower()
+            if status == "completed as planned":
                 continue
+            newrow = {
+                hxltag: row[header] for header, hxltag in header_to_hxltag.items()
+            }
             self.outputs["json"].add_data_row(self.name, newrow)
             campaigns_per_country[countryiso] = (
                 campaigns_per_country.get(countryiso, 0) + 1
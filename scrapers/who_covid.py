@@ -7,10 +7,12 @@ from hdx.location.country import Country
 from hdx.scraper.framework.base_scraper import BaseScraper
 from hdx.utilities.text import number_format
 
+from .utilities.values import ValuesScraper
+
 logger = logging.getLogger(__name__)
 
 
-class WHOCovid(BaseScraper):
+class WHOCovid(ValuesScraper, BaseScraper):
     def __init__(
         self,
         datasetinfo,
@@ -18,6 +20,8 @@ class WHOCovid(BaseScraper):
         hrp_countries,
         gho_countries,
         gho_iso3_to_region_nohrp,
+        incremental_downloader=None,
+        series_files=None,
     ):
         base_headers = ["Cumulative_cases", "Cumulative_deaths"]
         base_hxltags = ["#affected+infected", "#affected+killed"]
@@ -54,9 +58,14 @@ class WHOCovid(BaseScraper):
         self.hrp_countries = hrp_countries
         self.gho_countries = gho_countries
         self.gho_iso3_to_region_nohrp = gho_iso3_to_region_nohrp
+        self.incremental_downloader = incremental_downloader
+        self.series_files = series_files
 
     def get_who_data(self, reader, url):
-        path = reader.download_file(url)
+        if self.datasetinfo.get("append_only") and self.incremental_downloader:
+            path = self.incremental_downloader.download_file(reader, url)
+        else:
+            path = reader.download_file(url)
         df = pd.read_csv(path, keep_default_na=False)
         df.columns = df.columns.str.strip()
         df = df[
@@ -170,6 +179,16 @@ class WHOCovid(BaseScraper):
             self.outputs["json"].add_data_rows_by_key(
                 series_name, countryname, rows, series_headers_hxltags
             )
+            if self.series_files:
+                self.series_files.add_data_rows_by_key(
+                    series_name,
+                    countryname,
+                    rows[0]["ISO_3_CODE"],
+                    rows,
+                    series_headers_hxltags,
+                )
+        if self.series_files:
+            self.series_files.save(series_name)
 
         df_national = df_series.sort_values(by=["Date_reported"]).drop_duplicates(
             subset="ISO_3_CODE", keep="last"
@@ -276,6 +295,12 @@ class WHOCovid(BaseScraper):
             self.outputs["json"].add_data_rows_by_key(
                 self.name, countryiso, rows, grouped_trend_hxltags
             )
+            if self.series_files:
+                self.series_files.add_data_rows_by_key(
+                    trend_name, countryiso, countryiso, rows, grouped_trend_hxltags
+                )
+        if self.series_files:
+            self.series_files.save(trend_name)
 
         df_national = output_df.sort_values(by=["Date_reported"]).drop_duplicates(
             subset="ISO_3_CODE", keep="last"
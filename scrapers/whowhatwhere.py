@@ -4,11 +4,13 @@ from hdx.data.hdxobject import HDXError
 from hdx.scraper.framework.base_scraper import BaseScraper
 from hdx.utilities.dictandlist import dict_of_sets_add
 
+from .utilities.values import ValuesScraper
+
 logger = logging.getLogger(__name__)
 
 
-class WhoWhatWhere(BaseScraper):
-    def __init__(self, datasetinfo, today, adminone):
+class WhoWhatWhere(ValuesScraper, BaseScraper):
+    def __init__(self, datasetinfo, today, adminone, countryiso3s=None):
         super().__init__(
             "whowhatwhere",
             datasetinfo,
@@ -16,6 +18,7 @@ class WhoWhatWhere(BaseScraper):
         )
         self.today = today
         self.adminone = adminone
+        self.countryiso3s = countryiso3s
 
     def run(self) -> None:
         threew_url = self.datasetinfo["url"]
@@ -27,6 +30,8 @@ class WhoWhatWhere(BaseScraper):
         orgdict = dict()
         for ds_row in rows:
             countryiso3 = ds_row["Country ISO"]
+            if self.countryiso3s is not None and countryiso3 not in self.countryiso3s:
+                continue
             dataset_name = ds_row["Dataset Name"]
             if not dataset_name:
                 logger.warning(f"No 3w data for {countryiso3}.")
@@ -0,0 +1,46 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+
+class LocalHandler(BaseHTTPRequestHandler):
+    """Handler for servers started with the local_server fixture. Subclasses
+    implement do_GET and can respond with send_body.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def send_body(
+        self, body, status=200, content_type="application/json", headers=None
+    ):
+        self.send_response(status)
+        for key, value in (headers or dict()).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return
+
+
+@pytest.fixture(scope="function")
+def local_server():
+    """Start local HTTP servers with local_server(handler), which returns the
+    base url of the server. The servers are shut down after the test.
+    """
+    servers = list()
+
+    def start(handler):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
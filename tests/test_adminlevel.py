@@ -0,0 +1,105 @@
+import random
+
+import pytest
+from hdx.location.adminlevel import AdminLevel
+from scrapers.utilities.adminlevel import FuzzyIndex, IndexedAdminLevel
+
+
+class TestAdminLevel:
+    @pytest.fixture(scope="function")
+    def admin_config(self):
+        return {
+            "admin_name_mappings": {"Nord-Ouest": "HT06", "AFG|Kabil": "AF01"},
+            "admin_name_replacements": {" urban": "", "sud": "south", "YEM|al ": ""},
+            "admin_fuzzy_dont": ["nord", "north"],
+        }
+
+    @pytest.fixture(scope="function")
+    def admin_info(self):
+        names = {
+            "AFG": ("Kabul", "Kapisa", "Parwan", "Wardak", "Logar", "Nangarhar"),
+            "HTI": (
+                "Ouest",
+                "Sud-Est",
+                "Nord",
+                "Nord-Est",
+                "Artibonite",
+                "Nord-Ouest",
+            ),
+            "YEM": (
+                "Abyan",
+                "Aden",
+                "Al Bayda",
+                "Ad Dali'",
+                "Al Hudaydah",
+                "Amanat Al Asimah",
+            ),
+            "SSD": ("Northern Bahr el Ghazal", "Western Bahr el Ghazal", "Lakes", "Unity"),
+        }
+        admin_info = list()
+        for countryiso3, country_names in names.items():
+            for i, name in enumerate(country_names):
+                pcode = f"{countryiso3[:2]}{i + 1:02d}"
+                admin_info.append({"iso3": countryiso3, "pcode": pcode, "name": name})
+        return admin_info
+
+    @staticmethod
+    def get_names(admin_info, no_names):
+        rng = random.Random(0)
+        names = [
+            "Kabul urban",
+            "Kabil",
+            "Kapisaa",
+            "north",
+            "Sud Est",
+            "Nord-Ouest",
+            "Hudaydah",
+            "Al Dali",
+            "Bayda",
+            "Amanat Al Asima",
+            "N. Bahr el Ghazal",
+            "Lakez",
+            "Xyzzyx",
+        ]
+        for _ in range(no_names):
+            row = rng.choice(admin_info)
+            name = list(row["name"])
+            for _ in range(rng.randint(1, 3)):
+                position = rng.randrange(len(name))
+                name[position] = rng.choice("aeiklmnorstu ")
+            names.append((row["iso3"], "".join(name)))
+        return names
+
+    def test_fuzzy_pcode(self, admin_config, admin_info):
+        names = self.get_names(admin_info, 500)
+        results = list()
+        for cls in (AdminLevel, IndexedAdminLevel):
+            adminlevel = cls(admin_config)
+            adminlevel.setup_from_admin_info(admin_info)
+            matches = list()
+            for countryiso3 in ("AFG", "HTI", "YEM", "SSD"):
+                for name in names[:13]:
+                    matches.append(
+                        adminlevel.get_pcode(countryiso3, name, logname="test")
+                    )
+            for countryiso3, name in names[13:]:
+                matches.append(adminlevel.get_pcode(countryiso3, name, logname="test"))
+            results.append(
+                (matches, adminlevel.matches, adminlevel.errors, adminlevel.ignored)
+            )
+        assert results[0][0][1] == ("AF01", True)
+        assert len(results[0][1]) > 100
+        assert results[1] == results[0]
+        assert len(adminlevel.fuzzy_indices) == 4
+
+    def test_fuzzy_index(self, admin_info):
+        adminlevel = AdminLevel()
+        adminlevel.setup_from_admin_info(admin_info)
+        name_to_pcode = adminlevel.name_to_pcode["YEM"]
+        fuzzy_index = FuzzyIndex(adminlevel.phonetics, name_to_pcode)
+        assert fuzzy_index.find_substring("al") == "al bayda"
+        assert fuzzy_index.find_substring("dali") == "ad dali"
+        assert fuzzy_index.find_substring("sanaa") is None
+        assert fuzzy_index.match("al huddayda") == "al hudaydah"
+        assert fuzzy_index.match("xyz", alternative_name="adan") == "aden"
+        assert fuzzy_index.match("sanaa city") is None
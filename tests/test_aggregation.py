@@ -0,0 +1,139 @@
+import random
+
+import pytest
+from hdx.scraper.framework.scrapers.aggregator import Aggregator
+from scrapers.utilities.aggregation import AggregationMatrix, MatrixAggregator
+
+
+class TestAggregation:
+    @pytest.fixture(scope="function")
+    def adm_aggregation(self):
+        return {
+            "AFG": {"GHO", "ROAP", "HRPs"},
+            "MMR": {"GHO", "ROAP", "HRPs"},
+            "PAK": {"GHO", "ROAP"},
+            "TCD": {"GHO", "ROWCA", "HRPs"},
+            "BRA": {"GHO", "ROLAC"},
+        }
+
+    @pytest.fixture(scope="function")
+    def input_values(self):
+        return {
+            "#population": {"AFG": 100, "MMR": 200, "PAK": 300, "TCD": 400},
+            "#affected+inneed": {"AFG": "10", "MMR": "1.5", "PAK": "", "TCD": None},
+            "#affected+killed": {"AFG": "1|2", "MMR": "0", "TCD": "3|"},
+            "#access+visas+pct": {"AFG": 1, "MMR": 2, "PAK": 0.25, "BRA": 4},
+            "#access+travel+pct": {"AFG": 1, "MMR": 2, "TCD": 3, "BRA": 4},
+            "#affected+ch+food+p3plus+num": {"TCD": 5, "BRA": None},
+            "#affected+food+ipc+p3plus+num": {"AFG": 7, "TCD": 8, "BRA": 9},
+            "#value+funding+hrp+total+usd": {"MMR": 0.1, "BRA": 0.2, "AFG": 0.7},
+            "#affected+infected": {"AFG": None, "MMR": None},
+            "#value+ratio": {"AFG": 1, "MMR": 1, "TCD": 1, "BRA": 1},
+        }
+
+    @pytest.fixture(scope="function")
+    def configuration(self):
+        return {
+            "#population": {"action": "sum"},
+            "#affected+inneed": {"action": "sum"},
+            "#affected+killed": {"action": "mean"},
+            "#access+visas+pct": {"action": "mean"},
+            "#access+travel+pct": {"action": "mean"},
+            "#affected+food+ipc+p3plus+num": {
+                "action": "sum",
+                "input": [
+                    "#affected+ch+food+p3plus+num",
+                    "#affected+food+ipc+p3plus+num",
+                ],
+            },
+            "#value+funding+hrp+total+usd": {"action": "sum"},
+            "#affected+infected": {"action": "sum"},
+            "#affected+missing": {"action": "sum"},
+            "#value+ratio": {
+                "action": "eval",
+                "formula": "get_fraction_str(#affected+food+ipc+p3plus+num, "
+                "#access+travel+pct * 10) if #access+travel+pct else ''",
+            },
+        }
+
+    @staticmethod
+    def run(cls, configuration, adm_aggregation, input_values):
+        aggregators = list()
+        for hxltag, datasetinfo in configuration.items():
+            datasetinfo = dict(datasetinfo)
+            datasetinfo.setdefault("input", (hxltag,))
+            aggregator = cls(
+                f"{hxltag}_regional",
+                datasetinfo,
+                {"regional": ((hxltag,), (hxltag,))},
+                adm_aggregation,
+                True,
+                aggregation_scrapers=aggregators,
+            )
+            aggregator.set_input_values_sources(input_values, dict())
+            aggregators.append(aggregator)
+        if cls is MatrixAggregator:
+            matrix = AggregationMatrix(adm_aggregation)
+            matrix.set_input_values_sources(input_values, dict())
+            group = list(aggregators)
+            for aggregator in group:
+                aggregator.matrix = matrix
+                aggregator.group = group
+        results = dict()
+        for aggregator in list(aggregators):
+            try:
+                aggregator.run()
+                results[aggregator.name] = aggregator.get_values("regional")[0]
+            except KeyError as ex:
+                results[aggregator.name] = repr(ex)
+        return results
+
+    def test_matrix_aggregator(self, configuration, adm_aggregation, input_values):
+        expected = self.run(Aggregator, configuration, adm_aggregation, input_values)
+        assert expected["#affected+killed_regional"]["ROAP"] == 3
+        assert expected["#affected+missing_regional"] == "KeyError('#affected+missing')"
+        assert expected["#value+ratio_regional"]["ROWCA"] == "0.1667"
+        results = self.run(
+            MatrixAggregator, configuration, adm_aggregation, input_values
+        )
+        assert results == expected
+
+    def test_float_order(self, adm_aggregation):
+        rng = random.Random(1)
+        input_values = dict()
+        configuration = dict()
+        for i in range(100):
+            hxltag = f"#indicator+{i}"
+            countries = list(adm_aggregation)
+            rng.shuffle(countries)
+            input_values[hxltag] = {
+                countryiso3: rng.choice((rng.random() * 1e7, rng.randint(0, 10**9)))
+                for countryiso3 in countries
+            }
+            configuration[hxltag] = {"action": rng.choice(("sum", "mean"))}
+        expected = self.run(Aggregator, configuration, adm_aggregation, input_values)
+        results = self.run(
+            MatrixAggregator, configuration, adm_aggregation, input_values
+        )
+        assert results == expected
+
+    def test_nan_inf(self, adm_aggregation):
+        nan = float("nan")
+        inf = float("inf")
+        input_values = {
+            "#value+nan": {"AFG": nan, "MMR": 1.0, "TCD": 1.5, "BRA": 2.5},
+            "#value+inf": {"PAK": inf, "MMR": 0.5, "TCD": 1.5, "BRA": 2},
+            "#value+ninf": {"AFG": -inf, "TCD": 2.5},
+        }
+        configuration = {
+            "#value+nan": {"action": "sum"},
+            "#value+inf": {"action": "mean"},
+            "#value+ninf": {"action": "mean"},
+        }
+        expected = self.run(Aggregator, configuration, adm_aggregation, input_values)
+        assert expected["#value+nan_regional"]["ROWCA"] == "1.5"
+        assert expected["#value+inf_regional"]["ROLAC"] == 2
+        results = self.run(
+            MatrixAggregator, configuration, adm_aggregation, input_values
+        )
+        assert results == expected
@@ -0,0 +1,84 @@
+import pytest
+from hdx.scraper.framework.base_scraper import BaseScraper
+from hdx.scraper.framework.outputs.base import BaseOutput
+from hdx.utilities.dateparse import parse_date
+from hdx.utilities.path import temp_dir
+from scrapers.utilities.checkpoint import Checkpoint, CheckpointRunner
+
+
+class RecordingScraper(BaseScraper):
+    checkpoint_attributes = ("closed",)
+
+    def __init__(self, name, outputs, fail=False):
+        super().__init__(
+            name,
+            {
+                "source": "Test",
+                "source_url": "https://example.org",
+                "source_date": parse_date("2022-06-01"),
+            },
+            {"national": (("Value",), ("#value",))},
+        )
+        self.outputs = outputs
+        self.fail = fail
+        self.can_fallback = False
+        self.no_runs = 0
+        self.closed = None
+
+    def run(self) -> None:
+        self.no_runs += 1
+        if self.fail:
+            raise ValueError("Upload failed!")
+        self.get_values("national")[0]["AFG"] = len(self.name)
+        self.closed = ["AFG"]
+        self.outputs["json"].add_data_row(self.name, {"value": self.name})
+
+
+class ListOutput(BaseOutput):
+    def __init__(self):
+        super().__init__(list())
+        self.rows = list()
+
+    def add_data_row(self, key, row):
+        self.rows.append((key, row))
+
+
+class TestCheckpoint:
+    @pytest.fixture(scope="function")
+    def today(self):
+        return parse_date("2022-06-03")
+
+    def run(self, checkpoint, today, fail):
+        output = ListOutput()
+        outputs = checkpoint.record_outputs({"json": output})
+        runner = CheckpointRunner(["AFG"], today, checkpoint=checkpoint)
+        scrapers = [
+            RecordingScraper("first", outputs),
+            RecordingScraper("second", outputs, fail=fail),
+        ]
+        runner.add_customs(scrapers)
+        runner.run()
+        return scrapers, output
+
+    def test_resume(self, today):
+        with temp_dir("TestCheckpoint") as folder:
+            checkpoint = Checkpoint.start(folder, today)
+            assert checkpoint.run_id == "20220603T000000"
+            with pytest.raises(ValueError):
+                self.run(checkpoint, today, True)
+
+            checkpoint = Checkpoint.resume(folder, checkpoint.run_id)
+            assert checkpoint.today == today
+            (first, second), output = self.run(checkpoint, today, False)
+            assert first.no_runs == 0
+            assert first.has_run is True
+            assert first.get_values("national") == ({"AFG": 5},)
+            assert first.closed == ["AFG"]
+            assert second.no_runs == 1
+            assert output.rows == [
+                ("first", {"value": "first"}),
+                ("second", {"value": "second"}),
+            ]
+
+            with pytest.raises(ValueError):
+                Checkpoint.resume(folder, "20220602T000000")
@@ -0,0 +1,229 @@
+import copy
+import random
+from os.path import join
+
+import numpy as np
+import pytest
+from hdx.api.configuration import Configuration
+from hdx.location.country import Country
+from hdx.scraper.framework.utilities.reader import Read
+from hdx.utilities.dateparse import parse_date
+from hdx.utilities.path import temp_dir
+from hdx.utilities.useragent import UserAgent
+from scrapers.utilities.columnar import ColumnarExpression
+from scrapers.utilities.configurable import CompiledConfigurableScraper
+
+countryiso3s = ["AFG", "MMR", "PSE", "TCD", "YEM"]
+
+
+class RowsScraper(CompiledConfigurableScraper):
+    def __init__(self, rows, *args, **kwargs):
+        self.rows = rows
+        super().__init__(*args, **kwargs)
+
+    def get_iterator(self):
+        return list(self.rows[0].keys()), iter(copy.deepcopy(self.rows))
+
+
+class TestColumnar:
+    @pytest.fixture(scope="function")
+    def configuration(self):
+        UserAgent.set_global("test")
+        Configuration._create(
+            hdx_read_only=True,
+            hdx_site="prod",
+            project_config_yaml=join("config", "project_configuration.yml"),
+        )
+        return Configuration.read()
+
+    @pytest.fixture(scope="function")
+    def today(self):
+        return parse_date("2021-06-01")
+
+    @pytest.fixture(scope="function")
+    def rows(self):
+        rng = random.Random(0)
+        countries = ["AFG", "Afghanistan", "MMR", "Myanmar", "PSE", "TCD", "XYZ", ""]
+        rows = list()
+        for _ in range(400):
+            row = {
+                "Country": rng.choice(countries),
+                "Date": f"2021-{rng.randint(1, 7):02d}-{rng.randint(1, 28):02d}",
+                "Year": rng.choice((2018, 2019, 2020, 2022)),
+                "Type": rng.choice(("A", "B", "C", None)),
+                "Value": rng.choice((None, "", "12", "7.5", "100")),
+            }
+            for i in range(1, 4):
+                row[f"Region {i} Name"] = rng.choice(("North", "South", None))
+                row[f"Region {i} Value"] = rng.choice((None, 1, 2.5))
+            rows.append(row)
+        rows[300]["Type"] = "Stop"
+        return rows
+
+    @pytest.fixture(scope="function")
+    def datasetinfos(self):
+        base = {
+            "url": "https://example.org/data.csv",
+            "admin": ["Country"],
+            "input": ["Value"],
+            "output": ["Value"],
+            "output_hxl": ["#value"],
+        }
+        datasetinfos = [
+            {
+                "prefilter": "Value is not None and Value != ''",
+                "date": "Date",
+                "date_type": "date",
+                "transform": {"Value": "get_numeric_if_possible(Value)"},
+            },
+            {
+                "date": "Year",
+                "date_type": "year",
+                "filter_cols": ["Type"],
+                "prefilter": "Type is not None and Type != 'C'",
+                "sort": {"keys": ["Year", "Type"], "reverse": True},
+                "single_maxdate": True,
+                "subsets": [
+                    {
+                        "filter": f"Type == '{x}'",
+                        "input": ["Value"],
+                        "sum": [{"formula": "Value"}],
+                        "output": [f"Value{x}"],
+                        "output_hxl": [f"#value+{x.lower()}"],
+                    }
+                    for x in ("A", "B")
+                ],
+            },
+            {
+                "date": "Date",
+                "date_type": "date",
+                "process": ["Value", "Value * 2"],
+                "input_ignore_vals": [""],
+                "transform": {"Value": "get_numeric_if_possible(Value)"},
+                "output": ["Value", "Double"],
+                "output_hxl": ["#value", "#value+double"],
+            },
+            {
+                "stop_row": {"Type": "Stop"},
+                "prefilter": "Value",
+                "date": "Year",
+                "date_type": "int",
+                "input_append": ["Value"],
+            },
+            {
+                "flatten": [
+                    {"original": "Region {{1}} Name", "new": "Region"},
+                    {
+                        "original": "Region {{1}} Value",
+                        "new": "Region Value",
+                        "extracol": "Region Column",
+                    },
+                ],
+                "prefilter": "Region Value is not None",
+                "date": "Year",
+                "date_type": "year",
+                "input": ["Region Value", "Region Column"],
+                "list": ["Region Column"],
+                "output": ["Region Value", "Region Column"],
+                "output_hxl": ["#value+region", "#meta+column"],
+            },
+        ]
+        return [dict(base, **datasetinfo) for datasetinfo in datasetinfos]
+
+    def test_columnar_expression(self):
+        values = np.array([None, 0, 3, "3", 5], dtype=object)
+
+        def columns(name):
+            return values
+
+        positions = np.arange(len(values))
+        expression = ColumnarExpression("row['x'] is not None and row['x'] > 2")
+        with pytest.raises(TypeError):
+            expression.evaluate(columns, positions)
+        expression = ColumnarExpression(
+            "row['x'] in (0, 5) or "
+            "(row['x'] is not None and row['x'] != '3' and 1 < row['x'] + 1 < 5)"
+        )
+        assert list(expression.evaluate(columns, positions)) == [
+            False,
+            True,
+            True,
+            False,
+            True,
+        ]
+        for code in ("row['x'].strip() == ''", "x == 1", "len(row['x']) == 1"):
+            with pytest.raises(ValueError):
+                ColumnarExpression(code)
+
+    def test_columnar(self, rows, datasetinfos, today):
+        Country.countriesdata(use_live=False)
+        for datasetinfo in datasetinfos:
+            results = list()
+            for columnar in (False, True):
+                scraper = RowsScraper(
+                    rows,
+                    "test",
+                    dict(datasetinfo, columnar=columnar),
+                    "national",
+                    countryiso3s,
+                    today=today,
+                )
+                scraper.run()
+                assert scraper.rowparser.__class__.__name__ == (
+                    "ColumnarRowParser" if columnar else "CompiledRowParser"
+                )
+                assert not getattr(scraper.rowparser, "columnar_error", None)
+                results.append(
+                    (
+                        scraper.get_values("national"),
+                        scraper.rowparser.get_maxdate(),
+                    )
+                )
+            assert results[0][0][0], datasetinfo
+            assert results[1] == results[0]
+
+    def test_fixtures(self, configuration, today):
+        Country.countriesdata(
+            use_live=False,
+            country_name_overrides=configuration["country_name_overrides"],
+            country_name_mappings=configuration["country_name_mappings"],
+        )
+        with temp_dir("TestColumnar") as temp_folder:
+            Read.create_readers(
+                temp_folder,
+                join("tests", "fixtures", "input"),
+                temp_folder,
+                save=False,
+                use_saved=True,
+                today=parse_date("2022-06-03"),
+            )
+            for level_name, name in (
+                ("national", "population"),
+                ("national", "allocations"),
+                ("global", "allocations"),
+                ("global", "contributions"),
+            ):
+                datasetinfo = configuration[f"scraper_{level_name}"][name]
+                if level_name == "global":
+                    level = "single"
+                else:
+                    level = level_name
+                results = list()
+                for columnar in (False, True):
+                    scraper = CompiledConfigurableScraper(
+                        name,
+                        dict(datasetinfo, columnar=columnar),
+                        level,
+                        countryiso3s,
+                        level_name=level_name,
+                        today=today,
+                    )
+                    scraper.run()
+                    results.append(
+                        (
+                            scraper.get_values(level_name),
+                            scraper.rowparser.get_maxdate(),
+                        )
+                    )
+                assert results[0][0][0]
+                assert results[1] == results[0]
@@ -0,0 +1,116 @@
+import random
+from hashlib import sha256
+from importlib.metadata import version
+from inspect import getsource
+
+import pytest
+from hdx.scraper.framework.scrapers.configurable_scraper import ConfigurableScraper
+from hdx.scraper.framework.scrapers.rowparser import RowParser
+from hdx.utilities.dateparse import parse_date
+from scrapers.utilities.rowparser import CompiledRowParser, get_filter_columns
+
+
+class TestConfigurable:
+    @pytest.fixture(scope="function")
+    def datasetinfo(self):
+        return {
+            "admin": ["PooledFundName"],
+            "date": "AllocationYear",
+            "date_type": "year",
+            "filter_cols": ["FundType", "GenderMarker"],
+            "prefilter": "GenderMarker != '4'",
+        }
+
+    @pytest.fixture(scope="function")
+    def subsets(self):
+        subsets = list()
+        for fundtype in ("CBPF", "CERF"):
+            filters = [f"FundType == '{fundtype}'"]
+            filters.append(f"FundType == '{fundtype}' and GenderMarker is None")
+            for marker in range(3):
+                filters.append(
+                    f"FundType == '{fundtype}' and GenderMarker == '{marker}'"
+                )
+            for filter in filters:
+                subsets.append({"filter": filter, "input": ["Budget"]})
+        # Not a comparison of filter columns with literals
+        subsets.append({"filter": "int(GenderMarker or 0) > 0", "input": ["Budget"]})
+        subsets.append({"filter": None, "input": ["Budget"]})
+        return subsets
+
+    @pytest.fixture(scope="function")
+    def rows(self):
+        rng = random.Random(0)
+        rows = list()
+        for _ in range(500):
+            rows.append(
+                {
+                    "PooledFundName": rng.choice(("AFG", "Afghanistan", "MMR", "XYZ")),
+                    "AllocationYear": rng.choice(("2019", "2020", "2021")),
+                    "FundType": rng.choice(("CBPF", "CERF", "Other")),
+                    "GenderMarker": rng.choice((None, "0", "1", "2", "4")),
+                    "Budget": rng.choice((None, "100")),
+                }
+            )
+        return rows
+
+    def test_get_filter_columns(self):
+        filter_cols = ["FundType", "GenderMarker"]
+        assert get_filter_columns(
+            "row['FundType'] == 'CBPF' and row['GenderMarker'] is None",
+            filter_cols,
+        ) == {"FundType", "GenderMarker"}
+        assert get_filter_columns(
+            "not row['FundType'] in ('CBPF', 'CERF')", filter_cols
+        ) == {"FundType"}
+        assert get_filter_columns("row['Budget'] == '1'", filter_cols) is None
+        assert get_filter_columns("row['FundType'] is 'CBPF'", filter_cols) is None
+        assert get_filter_columns("int(row['GenderMarker']) > 0", filter_cols) is None
+        assert get_filter_columns("row['FundType'] ==", filter_cols) is None
+
+    def test_compiled_rowparser(self, datasetinfo, subsets, rows):
+        today = parse_date("2021-06-01")
+        results = list()
+        for cls in (RowParser, CompiledRowParser):
+            rowparser = cls(
+                "allocations",
+                ["AFG", "MMR"],
+                None,
+                "national",
+                "national",
+                today,
+                datasetinfo,
+                list(rows[0].keys()),
+                None,
+                subsets,
+            )
+            results.append(
+                [
+                    rowparser.parse(row)
+                    for row in rowparser.filter_sort_rows(iter(rows))
+                ]
+            )
+        assert len(results[0]) < len(rows)
+        assert results[1] == results[0]
+        assert rowparser.dispatch_indices == list(range(10))
+        assert len(rowparser.dispatch_table) <= 15
+
+    def test_framework_copies(self):
+        # CompiledConfigurableScraper.run and run_scraper and
+        # CompiledRowParser.parse are copies of these framework methods with
+        # changes. If this fails, carry the framework changes over to the
+        # copies and then update the version and hashes.
+        assert version("hdx-python-scraper") == "2.5.0"
+        hashes = {
+            function.__qualname__: sha256(getsource(function).encode()).hexdigest()
+            for function in (
+                ConfigurableScraper.run,
+                ConfigurableScraper.run_scraper,
+                RowParser.parse,
+            )
+        }
+        assert hashes == {
+            "ConfigurableScraper.run": "f7bd1ea983388d42b9b77b2044e3b84b06fc2c7aeb70ffc0d6d453f00db74b78",
+            "ConfigurableScraper.run_scraper": "d98d10c899a27c0b5d8cc62bc2d64d7faa7c288ac9506de7846cfda506631752",
+            "RowParser.parse": "cd9671828c07a06b3006ebba9859144ccf939bc523bbf4420c8f5f0a40364032",
+        }
@@ -0,0 +1,191 @@
+from os.path import join
+from threading import Thread
+from time import perf_counter, sleep
+
+import pytest
+from hdx.scraper.framework.base_scraper import BaseScraper
+from hdx.scraper.framework.utilities.fallbacks import Fallbacks
+from hdx.utilities.dateparse import parse_date
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.saver import save_json
+from hdx.utilities.useragent import UserAgent
+from scrapers.utilities.checkpoint import Checkpoint, CheckpointRunner
+from scrapers.utilities.deadlines import Deadline, DeadlineExceeded, Deadlines
+from scrapers.utilities.fallbacks import add_fallbacks
+from scrapers.utilities.http_pool import HTTPPool
+
+from .conftest import LocalHandler
+
+
+class Handler(LocalHandler):
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            sleep(3)
+        self.send_body(b'{"value": 1}')
+
+
+class DownloadScraper(BaseScraper):
+    def __init__(self, name, urls, can_fallback=True):
+        super().__init__(
+            name,
+            {
+                "source": "Test",
+                "source_url": "https://example.org",
+                "source_date": parse_date("2022-06-01"),
+            },
+            {"national": (("Food Prices",), ("#food-prices",))},
+        )
+        self.urls = urls
+        self.can_fallback = can_fallback
+
+    def run(self) -> None:
+        values = self.get_values("national")[0]
+        with Download() as downloader:
+            HTTPPool.mount(downloader.session)
+            for countryiso3, url in self.urls.items():
+                # Like scrapers that carry on when a country fails
+                try:
+                    values[countryiso3] = downloader.download_json(url)["value"]
+                except Exception:
+                    continue
+
+
+class ListErrors:
+    def __init__(self):
+        self.errors = list()
+
+    def add(self, message):
+        self.errors.append(message)
+
+
+class TestDeadlines:
+    @pytest.fixture(scope="function")
+    def server(self, local_server):
+        return local_server(Handler)
+
+    @pytest.fixture(scope="function")
+    def fallbacks(self):
+        output_json = {
+            "world_data": [],
+            "regional_data": [],
+            "national_data": [
+                {"#country+code": "AFG", "#food-prices": 3},
+                {"#country+code": "PSE", "#food-prices": 4},
+            ],
+            "subnational_data": [],
+            "sources_data": [
+                {
+                    "#indicator+name": "#food-prices",
+                    "#date": "Jun 2, 2022",
+                    "#meta+source": "WFP",
+                    "#meta+url": "https://example.org/food",
+                },
+            ],
+        }
+        with temp_dir("TestDeadlines") as folder:
+            path = join(folder, "all.json")
+            save_json(output_json, path)
+            add_fallbacks(path)
+            yield folder
+        Fallbacks.fallbacks = None
+
+    def test_deadline(self):
+        clock = [0.0]
+        deadline = Deadline("test", 10, clock=lambda: clock[0])
+        assert deadline.get_timeout(None) == 10
+        assert deadline.get_timeout((3.05, 30)) == (3.05, 10)
+        clock[0] = 8
+        assert deadline.get_timeout(5) == 2
+        with pytest.raises(DeadlineExceeded):
+            deadline.check(3)
+        assert deadline.exceeded is True
+        clock[0] = 10
+        with pytest.raises(DeadlineExceeded):
+            deadline.get_timeout(5)
+        deadlines = Deadlines({"default": 60, "scrapers": {"food_prices": 600}})
+        assert deadlines.get_budget("food_prices") == 600
+        assert deadlines.get_budget("fts") == 60
+        assert Deadlines({}).get_budget("fts") is None
+
+    def test_run(self, server, fallbacks):
+        UserAgent.set_global("test")
+        HTTPPool.setup({"pool_connections": 10, "pool_maxsize": 2})
+        errors = ListErrors()
+        today = parse_date("2022-06-03")
+        # The fallbacks fixture yields its temporary folder
+        checkpoint = Checkpoint.start(fallbacks, today)
+        runner = CheckpointRunner(
+            ["AFG", "PSE"],
+            today,
+            errors_on_exit=errors,
+            checkpoint=checkpoint,
+            deadlines=Deadlines({"default": 0.5, "scrapers": {"fast": 5}}),
+        )
+        urls = {"AFG": f"{server}/fast", "PSE": f"{server}/slow"}
+        scrapers = [
+            DownloadScraper("fast", {"AFG": f"{server}/fast"}),
+            DownloadScraper("slow", urls),
+            DownloadScraper("slow_no_fallbacks", urls, can_fallback=False),
+        ]
+        runner.add_customs(scrapers)
+        post_runs = list()
+        runner.add_post_run(
+            "slow_no_fallbacks", lambda scraper: post_runs.append(scraper.name)
+        )
+        start = perf_counter()
+        try:
+            runner.run()
+        finally:
+            HTTPPool.close()
+        # Each slow scraper is stopped after its 0.5s budget without retrying
+        assert perf_counter() - start < 2.5
+        assert Deadlines.get_current() is None
+        fast, slow, slow_no_fallbacks = scrapers
+        assert fast.get_values("national") == ({"AFG": 1},)
+        assert fast.fallbacks_used is False
+        assert slow.get_values("national") == [{"AFG": 3, "PSE": 4}]
+        assert slow.fallbacks_used is True
+        assert slow_no_fallbacks.get_values("national") == ({},)
+        assert slow_no_fallbacks.has_run is True
+        assert post_runs == ["slow_no_fallbacks"]
+        # Not saved to the checkpoint so that it is run again when resuming
+        assert checkpoint.load_scraper("slow") is not None
+        assert checkpoint.load_scraper("slow_no_fallbacks") is None
+        assert runner.changed == {"fast", "slow", "slow_no_fallbacks"}
+        assert len(errors.errors) == 2
+        assert "Using fallbacks for slow!" in errors.errors[0]
+        assert "DeadlineExceeded" in errors.errors[0]
+        assert errors.errors[1] == (
+            "slow_no_fallbacks exceeded its time budget of 0.5s and has no fallbacks!"
+        )
+
+    def test_other_thread(self, server):
+        UserAgent.set_global("test")
+        HTTPPool.setup({"pool_connections": 10, "pool_maxsize": 2})
+        deadlines = Deadlines({"default": 0.01})
+        results = list()
+
+        def download():
+            try:
+                results.append(downloader.download_json(f"{server}/fast")["value"])
+            except Exception as ex:
+                results.append(ex)
+
+        try:
+            with Download() as downloader:
+                HTTPPool.mount(downloader.session)
+                with deadlines.start("slow") as deadline:
+                    sleep(0.05)
+                    # A thread that is not running the scraper
+                    thread = Thread(target=download)
+                    thread.start()
+                    thread.join()
+                    download()
+                    assert Deadlines.get_current() is deadline
+        finally:
+            HTTPPool.close()
+        # Only requests in the thread running the scraper have its deadline
+        value, ex = results
+        assert value == 1
+        assert isinstance(ex.__cause__, DeadlineExceeded)
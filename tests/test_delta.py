@@ -0,0 +1,133 @@
+import copy
+from os import listdir
+from os.path import join
+
+import pytest
+from hdx.utilities.loader import load_json
+from hdx.utilities.path import temp_dir
+from scrapers.utilities.delta import DeltaFeed, get_delta_folder, get_patch
+
+
+def unescape(key):
+    return key.replace("~1", "/").replace("~0", "~")
+
+
+def apply_patch(document, patch):
+    document = copy.deepcopy(document)
+    for operation in patch:
+        keys = [unescape(key) for key in operation["path"].split("/")[1:]]
+        parent = document
+        for key in keys[:-1]:
+            parent = parent[key]
+        if operation["op"] == "remove":
+            del parent[keys[-1]]
+        else:
+            parent[keys[-1]] = operation["value"]
+    return document
+
+
+class TestDelta:
+    @pytest.fixture(scope="function")
+    def output_json(self):
+        return {
+            "world_data": [{"#population": "7800000000", "#affected+infected": 500}],
+            "regional_data": [
+                {"#region+name": "ROAP", "#population": 1000},
+                {"#region+name": "ROLAC", "#population": 2000.5},
+            ],
+            "national_data": [
+                {"#country+code": "AFG", "#population": 38000000, "#food-prices": 3},
+                {"#country+code": "PSE", "#population": "5100000"},
+            ],
+            "subnational_data": [
+                {"#adm1+code": "AF01", "#population": 12, "#affected+ipc": 0.25},
+            ],
+            "sources_data": [{"#indicator+name": "#population"}],
+        }
+
+    def test_get_patch(self):
+        old = {"national": {"AFG": {"#a/b": 1, "#c": 2}}, "world": {}}
+        new = {"national": {"AFG": {"#a/b": 3}, "PSE": {"#c": 4}}}
+        patch = get_patch(old, new)
+        assert patch == [
+            {"op": "remove", "path": "/world"},
+            {"op": "remove", "path": "/national/AFG/#c"},
+            {"op": "replace", "path": "/national/AFG/#a~1b", "value": 3},
+            {"op": "add", "path": "/national/PSE", "value": {"#c": 4}},
+        ]
+        assert apply_patch(old, patch) == new
+        assert get_patch(new, new) == list()
+
+    def test_delta_feed(self, output_json):
+        with temp_dir("TestDelta") as folder:
+            path = join(folder, "all.json")
+            delta_folder = get_delta_folder(path)
+            delta_feed = DeltaFeed(path, 3)
+
+            def load(name):
+                return load_json(join(delta_folder, f"{name}.json"))
+
+            assert delta_feed.save(output_json) == 1
+            document = load("full_1")["document"]
+            assert document["national"]["PSE"] == {
+                "#country+code": "PSE",
+                "#population": "5100000",
+            }
+            assert document["world"] == {"0": output_json["world_data"][0]}
+            assert "sources" not in document
+            assert load("latest") == {"version": 1, "full_version": 1, "deltas": []}
+
+            assert delta_feed.save(output_json) == 1
+            national = output_json["national_data"]
+            national[0]["#food-prices"] = 4
+            del national[1]["#population"]
+            national.append({"#country+code": "YEM", "#population": 30000000})
+            del output_json["regional_data"][1]
+            assert delta_feed.save(output_json) == 2
+            delta = load("delta_2")
+            assert delta["from_version"] == 1
+            assert len(delta["patch"]) == 4
+            document = apply_patch(document, delta["patch"])
+            assert list(document["regional"]) == ["ROAP"]
+            assert document["national"]["YEM"]["#population"] == 30000000
+
+            # Tabs that were not updated are unchanged
+            national_only = {"national_data": copy.deepcopy(national)}
+            national_only["national_data"][0]["#population"] = 39000000
+            assert delta_feed.save(national_only) == 3
+            delta = load("delta_3")
+            assert delta["patch"] == [
+                {
+                    "op": "replace",
+                    "path": "/national/AFG/#population",
+                    "value": 39000000,
+                }
+            ]
+            document = apply_patch(document, delta["patch"])
+            for version in range(4, 9):
+                national_only["national_data"][1]["#food-prices"] = version
+                assert delta_feed.save(national_only) == version
+                document = apply_patch(document, load(f"delta_{version}")["patch"])
+            # A client can catch up from the latest full document
+            full = load("full_7")["document"]
+            assert apply_patch(full, load("delta_8")["patch"]) == document
+            # Files from before the previous full document are removed
+            assert load("latest") == {
+                "version": 8,
+                "full_version": 7,
+                "deltas": [5, 6, 7, 8],
+            }
+            filenames = sorted(
+                filename
+                for filename in listdir(delta_folder)
+                if filename.endswith(".json")
+            )
+            assert filenames == [
+                "delta_5.json",
+                "delta_6.json",
+                "delta_7.json",
+                "delta_8.json",
+                "full_4.json",
+                "full_7.json",
+                "latest.json",
+            ]
@@ -0,0 +1,98 @@
+import pytest
+from hdx.scraper.framework.scrapers.configurable_scraper import ConfigurableScraper
+from hdx.utilities.dateparse import parse_date
+from scrapers.utilities.configurable import CompiledConfigurableScraper
+from scrapers.utilities.expressions import (
+    NotLiteral,
+    TextFormula,
+    UnsupportedExpression,
+    compile_function,
+    get_literal,
+    scraper_globals,
+)
+
+
+class TestExpressions:
+    @pytest.fixture(scope="function")
+    def datasetinfo(self):
+        return {
+            "source": "Test",
+            "source_url": "https://example.org/test",
+            "admin": ["iso3"],
+            "input": ["Cases", "Deaths", "Budget"],
+            "transform": {
+                "Cases": "get_numeric_if_possible(Cases)",
+                "Budget": "float(Budget)",
+            },
+            "process": [
+                "Cases",
+                "(Deaths / Cases) if Cases else None",
+                "number_format(Cases / #population)",
+                "-Deaths * 2",
+                "Budget",
+            ],
+            "input_ignore_vals": ["n/a"],
+            "output": [f"Output{i}" for i in range(5)],
+            "output_hxl": [f"#output+{i}" for i in range(5)],
+        }
+
+    @pytest.fixture(scope="function")
+    def rows(self):
+        return [
+            {"iso3": "AFG", "Cases": "10", "Deaths": "2", "Budget": "1.5"},
+            {"iso3": "MMR", "Cases": "n/a", "Deaths": "-3", "Budget": "2"},
+            {"iso3": "PSE", "Cases": "", "Deaths": "", "Budget": "0"},
+            {"iso3": "YEM", "Cases": "4", "Deaths": "1,000", "Budget": "3e2"},
+            {"iso3": "SYR", "Cases": "0", "Deaths": "7", "Budget": "-1"},
+        ]
+
+    def test_get_literal(self):
+        assert get_literal(3) == 3
+        assert get_literal("-3") == -3
+        assert get_literal("3e2") == 300.0
+        assert get_literal("1_000") == 1000
+        assert get_literal("None") is None
+        assert get_literal(True) is True
+        for value in ("1,000", "a", "--3", float("nan"), "1 + 2"):
+            with pytest.raises(NotLiteral):
+                get_literal(value)
+
+    def test_compile(self):
+        function = compile_function("int(val) + 1", ("val",), scraper_globals)
+        assert function("2") == 3
+        for expression in ("row['a']", "[x for x in val]", "(lambda: val)()"):
+            with pytest.raises(UnsupportedExpression):
+                compile_function(expression, ("val",), scraper_globals)
+        formula = TextFormula(
+            "m + mn * 2", ["m", "mn"], "population", ("population",), scraper_globals
+        )
+        assert formula.indices == [1, 0]
+        assert formula(10, values=[2, "-1"]) == 3
+        for string in ("m ** 2", "m.real", "m(2)", "m2"):
+            with pytest.raises(UnsupportedExpression):
+                TextFormula(string, ["m"], "1", (), scraper_globals)
+        with pytest.raises(UnsupportedExpression):
+            TextFormula("a + 1", ["a"], "1", (), scraper_globals)
+        with pytest.raises(UnsupportedExpression):
+            TextFormula("Nonea", ["one"], "1", (), scraper_globals)
+
+    def test_run_scraper(self, datasetinfo, rows):
+        results = list()
+        for cls in (ConfigurableScraper, CompiledConfigurableScraper):
+            scraper = cls(
+                "test",
+                dict(datasetinfo),
+                "national",
+                ["AFG", "MMR", "PSE", "YEM", "SYR"],
+                None,
+                "national",
+                today=parse_date("2022-06-01"),
+            )
+            scraper.population_lookup = {"AFG": 40, "MMR": 50, "YEM": 30, "SYR": 20}
+            scraper.get_iterator = lambda: (list(rows[0].keys()), iter(rows))
+            scraper.run()
+            results.append([dict(values) for values in scraper.get_values("national")])
+        assert isinstance(scraper.expressions, list)
+        assert results[1] == results[0]
+        assert results[1][3]["MMR"] == 6
+        assert results[1][4]["YEM"] == 300.0
@@ -0,0 +1,102 @@
+from os import listdir, remove
+from os.path import join
+
+import pytest
+from hdx.scraper.framework.utilities.fallbacks import Fallbacks
+from hdx.utilities.path import temp_dir
+from hdx.utilities.saver import save_json
+from scrapers.utilities.fallbacks import (
+    FallbackRows,
+    add_fallbacks,
+    get_index_folder,
+    levels_mapping,
+    save_fallbacks_index,
+    sources_key,
+)
+
+
+class TestFallbacks:
+    @pytest.fixture(scope="function")
+    def output_json(self):
+        return {
+            "world_data": [{"#population": 7800000000, "#affected+infected": 500}],
+            "regional_data": [
+                {"#region+name": "ROAP", "#population": 1000, "#value+funding": None},
+                {"#region+name": "ROLAC", "#population": 2000.5},
+            ],
+            "national_data": [
+                {"#country+code": "AFG", "#population": 38000000, "#food-prices": 3},
+                {"#country+code": "PSE", "#population": "5100000"},
+            ],
+            "subnational_data": [
+                {"#adm1+code": "AF01", "#population": 12, "#affected+ipc": 0.25},
+            ],
+            "covid_series_flat": [{"#country+code": "AFG", "#date": "2022-06-01"}],
+            "sources_data": [
+                {
+                    "#indicator+name": "#population",
+                    "#date": "Jun 1, 2022",
+                    "#meta+source": "World Bank",
+                    "#meta+url": "https://example.org/population",
+                },
+                {
+                    "#indicator+name": "#food-prices",
+                    "#date": "Jun 2, 2022",
+                    "#meta+source": "WFP",
+                    "#meta+url": "https://example.org/food",
+                },
+            ],
+        }
+
+    @staticmethod
+    def get_all():
+        results = dict()
+        for level, hxltags in (
+            ("global", ["#population", "#affected+infected"]),
+            ("regional", ["#population", "#value+funding"]),
+            ("national", ["#population", "#food-prices"]),
+            ("subnational", ["#affected+ipc"]),
+        ):
+            results[level] = Fallbacks.get(level, (list(), hxltags))
+        return results
+
+    def test_fallbacks_index(self, output_json):
+        with temp_dir("TestFallbacks") as folder:
+            path = join(folder, "all.json")
+            save_json(output_json, path)
+            Fallbacks.add(path, levels_mapping=levels_mapping, sources_key=sources_key)
+            expected = self.get_all()
+            assert expected["national"][0][1] == {"AFG": 3}
+
+            save_fallbacks_index(path, output_json)
+            add_fallbacks(path)
+            data = Fallbacks.fallbacks["national"]["data"]
+            assert isinstance(data, FallbackRows)
+            assert data.columns.columns == dict()
+            assert self.get_all() == expected
+            assert sorted(data.columns.columns) == [
+                "#country+code",
+                "#food-prices",
+                "#population",
+            ]
+
+            # Missing or unreadable files of the index are read from the output
+            index_folder = get_index_folder(path)
+            for filename in listdir(index_folder):
+                if filename.startswith("national_"):
+                    remove(join(index_folder, filename))
+            with open(join(index_folder, "sources_data.pickle"), "wb") as f:
+                f.write(b"unreadable")
+            add_fallbacks(path)
+            assert isinstance(Fallbacks.fallbacks["national"]["data"], FallbackRows)
+            assert self.get_all() == expected
+
+            # An index older than the output is not used
+            output_json["national_data"][0]["#food-prices"] = 40
+            save_json(output_json, path)
+            add_fallbacks(path)
+            assert isinstance(Fallbacks.fallbacks["national"]["data"], list)
+            assert Fallbacks.get("national", (list(), ["#food-prices"]))[0] == [
+                {"AFG": 40}
+            ]
+        Fallbacks.fallbacks = None
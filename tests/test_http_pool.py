@@ -0,0 +1,86 @@
+from time import perf_counter, sleep
+
+import pytest
+from hdx.scraper.framework.utilities.reader import Read
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.useragent import UserAgent
+from scrapers.utilities.deadlines import DeadlineRetry
+from scrapers.utilities.http_pool import HTTPPool
+
+from .conftest import LocalHandler
+
+handshakes = list()
+
+
+class Handler(LocalHandler):
+    def setup(self):
+        # Stands in for the TCP and TLS handshake of a new connection
+        handshakes.append(1)
+        sleep(0.05)
+        super().setup()
+
+    def do_GET(self):
+        self.send_body(b'{"value": 1}')
+
+
+class TestHTTPPool:
+    @pytest.fixture(scope="function")
+    def server(self, local_server):
+        handshakes.clear()
+        return local_server(Handler)
+
+    @pytest.fixture(scope="function")
+    def pool(self):
+        UserAgent.set_global("test")
+        yield
+        HTTPPool.close()
+
+    @staticmethod
+    def run_scrapers(url):
+        # Each run uses a new downloader as FoodPrices does
+        start = perf_counter()
+        for _ in range(3):
+            with Download() as downloader:
+                HTTPPool.mount(downloader.session)
+                for _ in range(5):
+                    assert downloader.download_json(url) == {"value": 1}
+        return perf_counter() - start
+
+    def test_http_pool(self, server, pool):
+        url = f"{server}/data"
+        unpooled_seconds = self.run_scrapers(url)
+        assert len(handshakes) == 3
+
+        handshakes.clear()
+        HTTPPool.setup({"pool_connections": 10, "pool_maxsize": 2})
+        pooled_seconds = self.run_scrapers(url)
+        assert len(handshakes) == 1
+        assert pooled_seconds < unpooled_seconds
+        assert HTTPPool.adapter.get_stats() == {"http://127.0.0.1": (15, 1)}
+
+        with temp_dir("TestHTTPPool") as folder:
+            Read.create_readers(folder, folder, folder, False, False)
+            HTTPPool.mount_readers()
+            assert HTTPPool.adapter.get_stats() == dict()
+            downloader = Read.get_reader().downloader
+            assert downloader.session.get_adapter(url) is HTTPPool.adapter
+            assert downloader.download_json(url) == {"value": 1}
+        assert len(handshakes) == 1
+        assert HTTPPool.adapter.get_stats() == {"http://127.0.0.1": (1, 0)}
+
+    def test_retries(self, pool):
+        HTTPPool.setup({"pool_connections": 10, "pool_maxsize": 2})
+        retries = HTTPPool.adapter.max_retries
+        assert isinstance(retries, DeadlineRetry)
+        assert retries.total == 5
+        assert 503 in retries.status_forcelist
+        # Mounting a session does not change the retries of the other sessions
+        with Download(retry_attempts=1) as downloader:
+            HTTPPool.mount(downloader.session)
+        assert HTTPPool.adapter.max_retries is retries
+        HTTPPool.setup(
+            {"pool_connections": 10, "pool_maxsize": 2, "rate_limits": dict()}
+        )
+        # Retries on status are left to the rate limiter
+        assert not HTTPPool.adapter.max_retries.status_forcelist
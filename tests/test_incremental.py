@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import pytest
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.useragent import UserAgent
+from scrapers.utilities.incremental import IncrementalDownloader
+
+from .conftest import LocalHandler
+
+source = {"content": b"", "ranges": True, "requests": list()}
+
+
+class Handler(LocalHandler):
+    def do_GET(self):
+        content = source["content"]
+        range = self.headers.get("Range")
+        source["requests"].append(range)
+        if range and source["ranges"]:
+            start = int(range[6:-1])
+            length = len(content)
+            if start >= length:
+                headers = {"Content-Range": f"bytes */{length}"}
+                self.send_body(b"", status=416, headers=headers)
+                return
+            headers = {"Content-Range": f"bytes {start}-{length - 1}/{length}"}
+            self.send_body(content[start:], 206, "text/csv", headers)
+        else:
+            self.send_body(content, content_type="text/csv")
+
+
+class TestIncremental:
+    @pytest.fixture(scope="function")
+    def url(self, local_server):
+        source["content"] = b"Date_reported,Country_code,New_cases\n"
+        source["ranges"] = True
+        source["requests"].clear()
+        return f"{local_server(Handler)}/who.csv"
+
+    @staticmethod
+    def add_rows(date, no_rows):
+        rows = [f"{date},C{i},{i * 7}\n".encode() for i in range(no_rows)]
+        source["content"] += b"".join(rows)
+
+    def test_download_file(self, url):
+        UserAgent.set_global("test")
+        with temp_dir("TestIncremental") as folder:
+            with Download() as downloader:
+                reader = SimpleNamespace(
+                    save=False, use_saved=False, downloader=downloader
+                )
+                incremental = IncrementalDownloader(folder, tail_size=64)
+
+                def download():
+                    source["requests"].clear()
+                    incremental.bytes_downloaded = 0
+                    path = incremental.download_file(reader, url)
+                    with open(path, "rb") as f:
+                        assert f.read() == source["content"]
+                    return source["requests"], incremental.bytes_downloaded
+
+                self.add_rows("2022-06-01", 100)
+                assert download() == ([None], len(source["content"]))
+                # Only the tail and the new rows are downloaded
+                length = len(source["content"])
+                self.add_rows("2022-06-02", 10)
+                new_bytes = len(source["content"]) - length
+                assert download() == ([f"bytes={length - 64}-"], 64 + new_bytes)
+                # Nothing new
+                length = len(source["content"])
+                assert download() == ([f"bytes={length - 64}-"], 64)
+                # A revised row in the tail means a full download
+                source["content"] = source["content"][:-4] + b"999\n"
+                requests, no_bytes = download()
+                assert requests == [f"bytes={length - 64}-", None]
+                assert no_bytes == len(source["content"])
+                # The file got shorter
+                source["content"] = source["content"][:-100]
+                requests, no_bytes = download()
+                assert requests == [f"bytes={length - 64}-", None]
+                # A server without ranges sends the whole file once
+                source["ranges"] = False
+                self.add_rows("2022-06-03", 10)
+                requests, no_bytes = download()
+                assert len(requests) == 1
+                assert no_bytes == len(source["content"])
+
+    def test_saved(self):
+        paths = list()
+        reader = SimpleNamespace(
+            save=False, use_saved=True, download_file=lambda url: paths.append(url)
+        )
+        IncrementalDownloader("folder").download_file(reader, "https://x.org/a.csv")
+        assert paths == ["https://x.org/a.csv"]
@@ -0,0 +1,93 @@
+import filecmp
+import gzip
+import json
+import logging
+from os import makedirs
+from os.path import exists, join
+
+import pytest
+from hdx.api.configuration import Configuration
+from hdx.scraper.framework.outputs.json import JsonFile
+from hdx.utilities.path import temp_dir
+from hdx.utilities.useragent import UserAgent
+from scrapers.utilities.json_output import CompressedJsonFile, compressors, encoders
+
+
+class TestJsonOutput:
+    @pytest.fixture(scope="function")
+    def configuration(self):
+        UserAgent.set_global("test")
+        Configuration._create(
+            hdx_read_only=True,
+            hdx_site="prod",
+            project_config_yaml=join("config", "project_configuration.yml"),
+        )
+        json_configuration = Configuration.read()["json"]
+        json_configuration["compression"] = {"gz": 6, "zz": 1}
+        return json_configuration
+
+    @staticmethod
+    def add_data(jsonout):
+        jsonout.add_data_row("world", {"#population": 7800000000, "#value": 0.5})
+        for countryiso3, name in (("AFG", "Afghanistan"), ("CIV", "Côte d'Ivoire")):
+            jsonout.add_data_row(
+                "national",
+                {
+                    "#country+code": countryiso3,
+                    "#country+name": name,
+                    "#affected+infected+new+per100000+weekly": "1.2345",
+                    "#affected+inneed": 1000,
+                },
+            )
+        rows = [{"#date+reported": "2022-06-01", "#affected+infected": 10}]
+        jsonout.add_data_rows_by_key("covid_series", "Afghanistan", rows)
+        jsonout.add_data_rows_by_key("covid_series_flat", "Afghanistan", rows)
+
+    def test_canonical(self, configuration, caplog):
+        jsonout = JsonFile(configuration, None)
+        compressed_jsonout = CompressedJsonFile(configuration, None)
+        self.add_data(jsonout)
+        self.add_data(compressed_jsonout)
+        with temp_dir("TestJsonOutput") as folder:
+            expected_folder = join(folder, "expected")
+            makedirs(expected_folder)
+            filepaths = jsonout.save(expected_folder, countries_to_save=["AFG"])
+            # A compressed copy that can no longer be made
+            with open(join(folder, "all.json.zz"), "w") as f:
+                f.write("stale")
+            with caplog.at_level(logging.INFO):
+                assert compressed_jsonout.save(folder, countries_to_save=["AFG"]) == [
+                    join(folder, filepath[len(expected_folder) + 1 :])
+                    for filepath in filepaths
+                ]
+                compressed_jsonout.report()
+            assert len(filepaths) == 4
+            for filepath in filepaths:
+                path = join(folder, filepath[len(expected_folder) + 1 :])
+                assert filecmp.cmp(path, filepath, shallow=False)
+                with open(path, "rb") as f:
+                    data = f.read()
+                with gzip.open(f"{path}.gz") as f:
+                    assert f.read() == data
+                assert not exists(f"{path}.zz")
+            assert f"{join(folder, 'all.json')} gz:" in caplog.text
+            with open(join(folder, "out_covidseries.json")) as f:
+                output = json.load(f)
+            assert [row["#country+code"] for row in output["cumulative"]] == ["AFG"]
+
+    @pytest.mark.skipif("fast" not in encoders, reason="orjson is not installed")
+    def test_fast(self, configuration):
+        jsonout = CompressedJsonFile(configuration, None, encoder="fast")
+        self.add_data(jsonout)
+        with temp_dir("TestJsonOutputFast") as folder:
+            for filepath in jsonout.save(folder, countries_to_save=["AFG"]):
+                with open(filepath, "rb") as f:
+                    data = f.read()
+                if filepath.endswith("all.json"):
+                    assert "Côte".encode() in data
+                    assert json.loads(data) == jsonout.json
+
+    def test_unavailable(self, configuration):
+        jsonout = CompressedJsonFile(configuration, None, encoder="other")
+        assert jsonout.encoder == "canonical"
+        assert "zz" not in compressors
@@ -4,13 +4,18 @@ from os.path import join
 import pytest
 from hdx.api.configuration import Configuration
 from hdx.scraper.framework.outputs.base import BaseOutput
-from hdx.scraper.framework.outputs.json import JsonFile
 from hdx.scraper.framework.utilities.reader import Read
 from hdx.utilities.dateparse import parse_date
 from hdx.utilities.errors_onexit import ErrorsOnExit
+from hdx.utilities.loader import load_json
 from hdx.utilities.path import temp_dir
 from hdx.utilities.useragent import UserAgent
 from scrapers.main import get_indicators
+from scrapers.utilities.json_output import CompressedJsonFile
+from scrapers.utilities.shards import Shard, ShardsCheckpoint, start_shard
+
+hrp_countries = ["AFG", "CAF", "MMR", "PSE", "TCD", "UKR", "VEN", "YEM"]
+gho_countries = hrp_countries + ["BRA", "EGY", "KEN", "PAK"]
 
 
 class TestCovid:
@@ -28,47 +33,85 @@ class TestCovid:
     def folder(self):
         return join("tests", "fixtures")
 
+    @staticmethod
+    def get_indicators(configuration, folder, temp_folder, errors_on_exit, **kwargs):
+        today = parse_date("2022-06-03")
+        Read.create_readers(
+            temp_folder,
+            join(folder, "input"),
+            temp_folder,
+            save=False,
+            use_saved=True,
+            today=today,
+        )
+        tabs = configuration["tabs"]
+        noout = BaseOutput(tabs)
+        jsonout = CompressedJsonFile(configuration["json"], tabs)
+        outputs = {"gsheets": noout, "excel": noout, "json": jsonout}
+        countries_to_save = get_indicators(
+            configuration,
+            today,
+            outputs,
+            tabs,
+            scrapers_to_run=None,
+            gho_countries_override=gho_countries,
+            hrp_countries_override=hrp_countries,
+            errors_on_exit=errors_on_exit,
+            use_live=False,
+            **kwargs,
+        )
+        return jsonout.save(folder=temp_folder, countries_to_save=countries_to_save)
+
+    @staticmethod
+    def check_outputs(configuration, folder, filepaths):
+        json_configuration = configuration["json"]
+        additional_outputs = json_configuration["additional_outputs"]
+        for i, filepath in enumerate(filepaths[1:]):
+            assert filecmp.cmp(
+                filepath,
+                join(folder, additional_outputs[i]["filepath"]),
+            )
+        assert filecmp.cmp(filepaths[0], join(folder, json_configuration["output"]))
+        # The UNHCR Myanmar IDPs override is applied to idps_national
+        national_data = load_json(filepaths[0])["national_data"]
+        idps = {
+            row["#country+code"]: row.get("#affected+displaced")
+            for row in national_data
+        }
+        assert idps["MMR"] == "671011"
+
     def test_get_indicators(self, configuration, folder):
         with ErrorsOnExit() as errors_on_exit:
             with temp_dir(
                 "TestCovidViz", delete_on_success=True, delete_on_failure=False
             ) as temp_folder:
-                today = parse_date("2022-06-03")
-                Read.create_readers(
-                    temp_folder,
-                    join(folder, "input"),
-                    temp_folder,
-                    save=False,
-                    use_saved=True,
-                    today=today,
-                )
-                tabs = configuration["tabs"]
-                noout = BaseOutput(tabs)
-                json_configuration = configuration["json"]
-                jsonout = JsonFile(json_configuration, tabs)
-                outputs = {"gsheets": noout, "excel": noout, "json": jsonout}
-                hrp_countries = ["AFG", "CAF", "MMR", "PSE", "TCD", "UKR", "VEN", "YEM"]
-                gho_countries = hrp_countries + ["BRA", "EGY", "KEN", "PAK"]
-                countries_to_save = get_indicators(
-                    configuration,
-                    today,
-                    outputs,
-                    tabs,
-                    scrapers_to_run=None,
-                    gho_countries_override=gho_countries,
-                    hrp_countries_override=hrp_countries,
-                    errors_on_exit=errors_on_exit,
-                    use_live=False,
-                )
-                filepaths = jsonout.save(
-                    folder=temp_folder, countries_to_save=countries_to_save
+                filepaths = self.get_indicators(
+                    configuration, folder, temp_folder, errors_on_exit
                 )
-                additional_outputs = json_configuration["additional_outputs"]
-                for i, filepath in enumerate(filepaths[1:]):
-                    assert filecmp.cmp(
-                        filepath,
-                        join(folder, additional_outputs[i]["filepath"]),
+                self.check_outputs(configuration, folder, filepaths)
+
+    def test_get_indicators_sharded(self, configuration, folder):
+        with ErrorsOnExit() as errors_on_exit:
+            with temp_dir(
+                "TestCovidVizSharded", delete_on_success=True, delete_on_failure=False
+            ) as temp_folder:
+                shard_folder = join(temp_folder, "shards")
+                today = parse_date("2022-06-03")
+                for number in (1, 2):
+                    shard = Shard(number, 2, gho_countries)
+                    self.get_indicators(
+                        configuration,
+                        folder,
+                        temp_folder,
+                        errors_on_exit,
+                        checkpoint=start_shard(shard_folder, shard, today),
+                        shard=shard,
                     )
-                assert filecmp.cmp(
-                    filepaths[0], join(folder, json_configuration["output"])
+                filepaths = self.get_indicators(
+                    configuration,
+                    folder,
+                    temp_folder,
+                    errors_on_exit,
+                    checkpoint=ShardsCheckpoint(shard_folder),
                 )
+                self.check_outputs(configuration, folder, filepaths)
@@ -0,0 +1,101 @@
+from collections import Counter
+from threading import Thread
+from time import perf_counter
+
+import pytest
+from hdx.utilities.downloader import Download
+from hdx.utilities.useragent import UserAgent
+from scrapers.utilities.http_pool import HTTPPool
+from scrapers.utilities.rate_limits import RateLimiter
+
+from .conftest import LocalHandler
+
+hits = Counter()
+
+
+class Handler(LocalHandler):
+    def do_GET(self):
+        hits[self.path] += 1
+        if self.path == "/busy" and hits[self.path] <= 2:
+            self.send_body(b"", status=429, headers={"Retry-After": "1"})
+            return
+        self.send_body(b'{"value": 1}')
+
+
+class TestRateLimits:
+    @pytest.fixture(scope="function")
+    def servers(self, local_server):
+        hits.clear()
+        return [local_server(Handler) for _ in range(2)]
+
+    def test_host_limiter(self):
+        clock = [0.0]
+        sleeps = list()
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        rate_limiter = RateLimiter(
+            {"hosts": {"api.wfp.org": {"min_interval": 0.1}}},
+            clock=lambda: clock[0],
+            sleep=sleep,
+        )
+        limiter = rate_limiter.get("api.wfp.org")
+        assert rate_limiter.get("api.wfp.org") is limiter
+        limiter.acquire()
+        limiter.acquire()
+        assert sleeps == [pytest.approx(0.1)]
+        limiter.update(200, 1)
+        assert limiter.interval == 0.1
+        limiter.update(429, 1, 5)
+        assert limiter.interval == 0.5
+        limiter.update(503, 1)
+        assert limiter.interval == 1
+        assert rate_limiter.get("other.org").interval == 0
+        limiter.acquire()
+        assert sleeps[-1] == pytest.approx(5)
+        for _ in range(100):
+            limiter.update(200, 1)
+        assert limiter.interval == 0.1
+        limiter.update(200, 10)
+        assert limiter.interval == 1
+        assert limiter.get_retry_delay(200, "GET", 0) is None
+        assert limiter.get_retry_delay(502, "POST", 0) is None
+        assert limiter.get_retry_delay(502, "GET", 5) is None
+        assert 0.25 <= limiter.get_retry_delay(502, "GET", 0) <= 0.75
+        assert limiter.get_retry_delay(429, "GET", 0, 3) == 3
+
+    def test_retries(self, servers):
+        UserAgent.set_global("test")
+        HTTPPool.setup(
+            {
+                "pool_connections": 10,
+                "pool_maxsize": 2,
+                "rate_limits": {"default": {"backoff_factor": 0.01}},
+            }
+        )
+        results = dict()
+
+        def download(name, url):
+            start = perf_counter()
+            with Download() as downloader:
+                HTTPPool.mount(downloader.session)
+                results[name] = downloader.download_json(url), perf_counter() - start
+
+        try:
+            busy = Thread(target=download, args=("busy", f"{servers[0]}/busy"))
+            busy.start()
+            # Requests to another host are not held up by the busy one
+            download("other", f"{servers[1]}/other")
+            busy.join()
+            rate_limiter = HTTPPool.adapter.rate_limiter
+            limiter = rate_limiter.get(servers[0].split("//")[1])
+            assert (limiter.requests, limiter.throttled, limiter.retried) == (3, 2, 2)
+        finally:
+            HTTPPool.close()
+        assert results["busy"][0] == {"value": 1}
+        assert results["busy"][1] >= 2
+        assert results["other"][0] == {"value": 1}
+        assert results["other"][1] < 1
+        assert hits == {"/busy": 3, "/other": 1}
@@ -0,0 +1,138 @@
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+from hdx.location.country import Country
+from hdx.scraper.framework.base_scraper import BaseScraper
+from hdx.scraper.framework.outputs.base import BaseOutput
+from hdx.scraper.framework.utilities.reader import Read
+from hdx.utilities.dateparse import parse_date
+from hdx.utilities.downloader import Download
+from hdx.utilities.path import temp_dir
+from hdx.utilities.useragent import UserAgent
+from scrapers.utilities.checkpoint import CheckpointRunner
+from scrapers.utilities.scheduler import Scheduler
+from scrapers.utilities.writer import DirtyWriter
+
+from .conftest import LocalHandler
+
+hits = Counter()
+
+
+class Handler(LocalHandler):
+    def do_GET(self):
+        hits[self.path] += 1
+        # Only the WHO figures change
+        if self.path == "/who_covid":
+            value = hits[self.path]
+        else:
+            value = 1
+        self.send_body(b'{"value": %d}' % value)
+
+
+class HttpScraper(BaseScraper):
+    def __init__(self, name, url, outputs):
+        super().__init__(
+            name,
+            {
+                "source": "Test",
+                "source_url": url,
+                "source_date": parse_date("2022-06-01"),
+            },
+            {"national": (("Value",), ("#value",))},
+        )
+        self.url = url
+        self.outputs = outputs
+
+    def run(self) -> None:
+        with Download() as downloader:
+            value = downloader.download_json(self.url)["value"]
+        self.get_values("national")[0]["AFG"] = value
+        if self.name == "who_covid":
+            self.outputs["gsheets"].update_tab("covid_series", [[value]])
+
+
+class TabsOutput(BaseOutput):
+    def __init__(self):
+        super().__init__(list())
+        self.tabs = list()
+
+    def update_tab(self, tabname, values, hxltags=None, **kwargs):
+        self.tabs.append(tabname)
+
+
+class TestScheduler:
+    @pytest.fixture(scope="function")
+    def server(self, local_server):
+        hits.clear()
+        return local_server(Handler)
+
+    @pytest.fixture(scope="function")
+    def configuration(self):
+        return {
+            "default": 1,
+            "minimum_wait_hours": 2,
+            "cadences": {"who_covid": 1, "education": 7},
+        }
+
+    def test_get_cadence(self, configuration):
+        scheduler = Scheduler("", configuration)
+        assert scheduler.get_cadence("who_covid") == timedelta(days=1)
+        assert scheduler.get_cadence("education_closures") == timedelta(days=7)
+        assert scheduler.get_cadence("educationx") == timedelta(days=1)
+        assert scheduler.get_wait(True) == timedelta(hours=2)
+
+    def test_run(self, server, configuration):
+        UserAgent.set_global("test")
+        clock = [parse_date("2022-06-03 06:00:00")]
+        sleeps = list()
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += timedelta(seconds=seconds)
+
+        Country.countriesdata(use_live=False)
+        published = list()
+        values = list()
+
+        def run_cycle(today, checkpoint, errors_on_exit):
+            gsheets = TabsOutput()
+            outputs = {"gsheets": gsheets}
+            scraper_outputs = checkpoint.record_outputs(outputs)
+            runner = CheckpointRunner(
+                ["AFG"], today, errors_on_exit=errors_on_exit, checkpoint=checkpoint
+            )
+            scrapers = [
+                HttpScraper(name, f"{server}/{name}", scraper_outputs)
+                for name in ("who_covid", "education_closures")
+            ]
+            runner.add_customs(scrapers)
+            runner.run()
+            writer = DirtyWriter(runner, outputs)
+            for scraper in scrapers:
+                writer.update_national(["AFG"], names=[scraper.name], tab=scraper.name)
+            writer.update_sources()
+            checkpoint.save_published()
+            published.append(gsheets.tabs)
+            values.append(
+                tuple(scraper.get_values("national")[0]["AFG"] for scraper in scrapers)
+            )
+
+        with temp_dir("TestScheduler") as folder:
+            Read.create_readers(folder, folder, folder, False, False)
+            scheduler = Scheduler(
+                folder, configuration, now=lambda: clock[0], sleep=sleep
+            )
+            scheduler.run(run_cycle, cycles=8)
+        assert hits == {"/who_covid": 8, "/education_closures": 2}
+        assert sleeps == [86400] * 7
+        assert values == [(i + 1, 1) for i in range(8)]
+        assert published[0] == [
+            "covid_series",
+            "who_covid",
+            "education_closures",
+            "sources",
+        ]
+        # Education closures are fetched again on day 7 but have not changed
+        for tabs in published[1:]:
+            assert tabs == ["covid_series", "who_covid", "sources"]
@@ -0,0 +1,169 @@
+import shutil
+from datetime import date, timedelta
+from os import listdir
+from os.path import join
+
+import pytest
+from hdx.api.configuration import Configuration
+from hdx.scraper.framework.base_scraper import BaseScraper
+from hdx.scraper.framework.outputs.base import BaseOutput
+from hdx.scraper.framework.outputs.json import JsonFile
+from hdx.scraper.framework.utilities.reader import Read
+from hdx.utilities.dateparse import parse_date
+from hdx.utilities.loader import load_json
+from hdx.utilities.path import temp_dir
+from hdx.utilities.useragent import UserAgent
+from scrapers.utilities.series import SeriesFiles
+from scrapers.who_covid import WHOCovid
+
+gho_countries = ["AFG", "PSE", "YEM", "BRA"]
+hrp_countries = ["AFG", "PSE", "YEM"]
+
+
+class TestSeries:
+    @pytest.fixture(scope="function")
+    def configuration(self):
+        UserAgent.set_global("test")
+        Configuration._create(
+            hdx_read_only=True,
+            hdx_site="prod",
+            project_config_yaml=join("config", "project_configuration.yml"),
+        )
+        return Configuration.read()
+
+    @pytest.fixture(scope="function")
+    def folder(self):
+        with temp_dir("TestSeries") as folder:
+            dataset = "coronavirus-covid-19-cases-and-deaths.json"
+            shutil.copy(join("tests", "fixtures", "input", dataset), folder)
+            rows = [
+                "Date_reported,Country_code,Country,WHO_region,New_cases,"
+                "Cumulative_cases,New_deaths,Cumulative_deaths"
+            ]
+            start = date(2022, 5, 2)
+            for i, countryiso2 in enumerate(("AF", "PS", "YE", "BR", "FR")):
+                cases = 0
+                deaths = 0
+                for day in range(28):
+                    new_cases = (i + 1) * (day % 5 + 1)
+                    new_deaths = day % 3 * i
+                    cases += new_cases
+                    deaths += new_deaths
+                    reported = start + timedelta(days=day)
+                    rows.append(
+                        f"{reported.isoformat()},{countryiso2},,,{new_cases},"
+                        f"{cases},{new_deaths},{deaths}"
+                    )
+            with open(join(folder, "who-covid-19-global-data.csv"), "w") as f:
+                f.write("\n".join(rows))
+            yield folder
+
+    def test_series_files(self, configuration):
+        jsonout = JsonFile(configuration["json"], configuration["tabs"])
+        hxltags = {"ISO_3_CODE": "#country+code", "Date": "#date+reported"}
+        rows = {
+            "Afghanistan": [
+                {"ISO_3_CODE": "AFG", "Date": "2022-05-01", "Cases": 1},
+                {"ISO_3_CODE": "AFG", "Date": "2022-05-02", "Cases": 2},
+            ],
+            "Yemen": [{"ISO_3_CODE": "YEM", "Date": "2022-05-02", "Cases": 3}],
+        }
+        with temp_dir("TestSeriesFiles") as folder:
+            series_files = SeriesFiles(folder)
+            series_files.add_data_rows_by_key("covid_series", "Yemen", "YEM", list())
+            series_files.add_data_rows_by_key("covid_series", "France", "FRA", list())
+            series_files.save("covid_series")
+            for key, country_rows in rows.items():
+                jsonout.add_data_rows_by_key("covid_series", key, country_rows, hxltags)
+                countryiso3 = country_rows[0]["ISO_3_CODE"]
+                series_files.add_data_rows_by_key(
+                    "covid_series", key, countryiso3, country_rows, hxltags
+                )
+            manifest = series_files.save("covid_series")
+            assert manifest["name"] == "covid_series"
+            assert manifest["countries"]["AFG"] == {
+                "key": "Afghanistan",
+                "file": "AFG.json",
+                "size": 116,
+                "rows": 2,
+                "start_date": "2022-05-01",
+                "end_date": "2022-05-02",
+            }
+            assert load_json(join(folder, "covid_series", "manifest.json")) == manifest
+            # Files of countries that are no longer in the series are removed
+            assert sorted(listdir(join(folder, "covid_series"))) == [
+                "AFG.json",
+                "YEM.json",
+                "manifest.json",
+            ]
+            output = dict()
+            for details in manifest["countries"].values():
+                path = join(folder, "covid_series", details["file"])
+                output[details["key"]] = load_json(path)
+            assert output == jsonout.json["covid_series_data"]
+
+    def test_who_covid(self, configuration, folder):
+        Read.create_readers(
+            folder,
+            folder,
+            folder,
+            save=False,
+            use_saved=True,
+            today=parse_date("2022-06-03"),
+        )
+        BaseScraper.population_lookup = {
+            "AFG": 38000000,
+            "PSE": 5100000,
+            "YEM": 30000000,
+            "BRA": 212000000,
+        }
+        tabs = configuration["tabs"]
+        noout = BaseOutput(tabs)
+        jsonout = JsonFile(configuration["json"], tabs)
+        outputs = {"gsheets": noout, "excel": noout, "json": jsonout}
+        series_folder = join(folder, "series")
+        series_files = SeriesFiles(series_folder)
+        scraper = WHOCovid(
+            configuration["who_covid"],
+            outputs,
+            hrp_countries,
+            gho_countries,
+            {"AFG": "ROAP", "PSE": "ROMENA", "YEM": "ROMENA", "BRA": "ROLAC"},
+            series_files=series_files,
+        )
+        scraper.run()
+        output_json = jsonout.json
+        for name, key in (
+            ("covid_series", "covid_series_data"),
+            ("covid_trend", "who_covid_data"),
+        ):
+            # The concatenated files are the same as the monolithic output
+            manifest = load_json(join(series_folder, name, "manifest.json"))
+            assert manifest["name"] == name
+            output = dict()
+            for countryiso3, details in manifest["countries"].items():
+                rows = load_json(join(series_folder, name, details["file"]))
+                assert details["rows"] == len(rows)
+                assert details["start_date"] == rows[0]["#date+reported"]
+                assert details["end_date"] == rows[-1]["#date+reported"]
+                output[details["key"]] = rows
+            assert output == output_json[key]
+        countries = manifest["countries"]
+        assert list(countries) == [
+            "AFG",
+            "BRA",
+            "GHO",
+            "HRPs",
+            "PSE",
+            "ROAP",
+            "ROLAC",
+            "ROMENA",
+            "YEM",
+        ]
+        assert countries["AFG"]["start_date"] == "2022-05-08"
+        countries = load_json(join(series_folder, "covid_series", "manifest.json"))[
+            "countries"
+        ]
+        assert countries["PSE"]["key"] == "State of Palestine"
+        assert countries["PSE"]["start_date"] == "2022-05-02"
+        assert countries["PSE"]["end_date"] == "2022-05-29"
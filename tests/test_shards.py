@@ -0,0 +1,96 @@
+import pytest
+from hdx.scraper.framework.base_scraper import BaseScraper
+from hdx.utilities.dateparse import parse_date
+from hdx.utilities.path import temp_dir
+from scrapers.utilities.checkpoint import CheckpointRunner
+from scrapers.utilities.shards import Shard, ShardsCheckpoint, start_shard
+
+gho_countries = ["AFG", "CAF", "MMR", "PSE", "TCD", "UKR", "VEN", "YEM"]
+
+
+class CountryScraper(BaseScraper):
+    def __init__(self, countryiso3s):
+        super().__init__(
+            "countries",
+            {
+                "source": "Test",
+                "source_url": "https://example.org",
+                "source_date": parse_date("2022-06-01"),
+            },
+            {"national": (("Value",), ("#value",))},
+        )
+        self.countryiso3s = countryiso3s
+        self.can_fallback = False
+        self.no_runs = 0
+
+    def run(self) -> None:
+        self.no_runs += 1
+        values = self.get_values("national")[0]
+        for countryiso3 in self.countryiso3s:
+            values[countryiso3] = len(countryiso3) + ord(countryiso3[0])
+            self.source_urls.add(f"https://example.org/{countryiso3}")
+
+
+class TestShards:
+    @pytest.fixture(scope="function")
+    def today(self):
+        return parse_date("2022-06-03")
+
+    def test_shard(self):
+        shards = [Shard(number, 3, gho_countries) for number in range(1, 4)]
+        assert shards[1].run_id == "shard_2_of_3"
+        countries = [shard.get_countries(gho_countries) for shard in shards]
+        assert countries == [
+            ["AFG", "CAF", "MMR"],
+            ["PSE", "TCD", "UKR"],
+            ["VEN", "YEM"],
+        ]
+        assert sum(countries, []) == gho_countries
+        for countryiso3 in ("BRA", "EGY", "KEN", "PAK"):
+            assert sum(countryiso3 in shard for shard in shards) == 1
+        assert Shard.parse("2/3", gho_countries).get_countries(gho_countries) == [
+            "PSE",
+            "TCD",
+            "UKR",
+        ]
+        with pytest.raises(ValueError):
+            Shard.parse("4/3", gho_countries)
+        with pytest.raises(ValueError):
+            Shard.parse("2", gho_countries)
+
+    def run(self, checkpoint, today, countryiso3s):
+        runner = CheckpointRunner(gho_countries, today, checkpoint=checkpoint)
+        scraper = CountryScraper(countryiso3s)
+        runner.add_custom(scraper)
+        runner.run()
+        return scraper
+
+    def test_merge(self, today):
+        expected = self.run(None, today, gho_countries)
+        with temp_dir("TestShards") as folder:
+            for number in (1, 2):
+                shard = Shard(number, 3, gho_countries)
+                checkpoint = start_shard(folder, shard, today)
+                self.run(checkpoint, today, shard.get_countries(gho_countries))
+            with pytest.raises(ValueError):
+                ShardsCheckpoint(folder)
+
+            shard = Shard(3, 3, gho_countries)
+            checkpoint = start_shard(folder, shard, today)
+            self.run(checkpoint, today, shard.get_countries(gho_countries))
+            # A shard that is run again restores its scrapers
+            checkpoint = start_shard(folder, shard, parse_date("2022-06-04"))
+            assert checkpoint.today == today
+            scraper = self.run(checkpoint, today, shard.get_countries(gho_countries))
+            assert scraper.no_runs == 0
+
+            checkpoint = ShardsCheckpoint(folder)
+            assert checkpoint.today == today
+            scraper = self.run(checkpoint, today, list())
+            assert scraper.no_runs == 0
+            national = scraper.get_values("national")
+            assert national == expected.get_values("national")
+            assert list(national[0]) == gho_countries
+            assert scraper.source_urls == expected.source_urls
+            sources = expected.get_sources("national")
+            assert scraper.get_sources("national") == sources
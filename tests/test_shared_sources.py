@@ -0,0 +1,46 @@
+from threading import Thread
+
+from scrapers.utilities.shared_sources import SharedSources
+
+
+class TestSharedSources:
+    def test_shared_sources(self):
+        allocations = {
+            "url": "https://cbpfgms.github.io/pfbi-data/download/full_pfmb_allocations.csv",
+            "format": "csv",
+        }
+        configuration = {
+            "scraper_national": {"allocations": dict(allocations)},
+            "scraper_global": {"allocations": dict(allocations)},
+            "who_covid": {"dataset": "coronavirus-covid-19-cases-and-deaths", "format": "csv"},
+        }
+        shared_sources = SharedSources(configuration)
+        assert "shared_source" not in configuration["who_covid"]
+        shared_key = configuration["scraper_national"]["allocations"]["shared_source"]
+        assert shared_key == configuration["scraper_global"]["allocations"]["shared_source"]
+
+        calls = list()
+
+        def read_fn():
+            calls.append(1)
+            return ["a"], iter([{"a": 1}, {"a": 2}]), list()
+
+        key = (shared_key, allocations["url"])
+        results = list()
+
+        def read():
+            headers, iterator = shared_sources.read(key, read_fn)
+            rows = list(iterator)
+            results.append((headers, [row["a"] for row in rows]))
+            rows[0]["a"] = 3
+
+        threads = [Thread(target=read) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert results == [(["a"], [1, 2]), (["a"], [1, 2])]
+        assert shared_sources.saved_reads == 1
+        assert shared_sources.sources == dict()
+        shared_sources.close()
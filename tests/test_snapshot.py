@@ -0,0 +1,33 @@
+import logging
+from importlib.metadata import version
+from os import listdir
+from os.path import join
+
+from hdx.location.country import Country
+from hdx.utilities.dateparse import parse_date
+from hdx.utilities.path import temp_dir
+from scrapers.utilities.snapshot import read_project_configuration, setup_countries
+
+
+class TestSnapshot:
+    def test_setup_countries(self, caplog):
+        # setup_countries reads and sets Country._countriesdata, which is
+        # private to hdx-python-country. If this fails, check that it still
+        # holds the parsed countries and then update the pinned version.
+        assert version("hdx-python-country") == "3.8.1"
+        today = parse_date("2022-06-03")
+        with temp_dir("TestSnapshot") as folder:
+            configuration = read_project_configuration(
+                join("config", "project_configuration.yml"), folder
+            )
+            Country._countriesdata = None
+            setup_countries(configuration, False, today, folder)
+            expected = Country.countriesdata()
+            assert len([x for x in listdir(folder) if x.startswith("countries_")]) == 1
+            Country._countriesdata = None
+            with caplog.at_level(logging.INFO):
+                setup_countries(configuration, False, today, folder)
+            assert "Loaded countries snapshot" in caplog.text
+            assert Country._countriesdata == expected
+        assert Country.get_country_name_from_iso3("BOL") == "Bolivia"
+        assert Country.get_iso3_country_code("Congo DR") == "COD"
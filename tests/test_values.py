@@ -0,0 +1,87 @@
+import pickle
+
+import numpy as np
+from hdx.scraper.framework.base_scraper import BaseScraper
+from hdx.scraper.framework.runner import Runner
+from hdx.utilities.dateparse import parse_date
+from scrapers.utilities.checkpoint import CheckpointRunner
+from scrapers.utilities.values import Values, ValuesScraper
+
+
+class DictScraper(BaseScraper):
+    def __init__(self, name, values):
+        hxltags = [f"#{name}+{i}" for i in range(len(values))]
+        super().__init__(name, {}, {"subnational": (hxltags, hxltags)})
+        for output, input in zip(self.get_values("subnational"), values):
+            output.update(input)
+        self.has_run = True
+
+    def run(self):
+        pass
+
+
+class CompactScraper(ValuesScraper, DictScraper):
+    pass
+
+
+class TestValues:
+    def test_values(self):
+        values = Values("testlevel")
+        values["AFG01"] = 3
+        values["AFG02"] = 4
+        assert values.data.typecode == "q"
+        values["AFG03"] = 2**70
+        assert isinstance(values.data, list)
+        values["AFG02"] = True
+        values["AFG04"] = None
+        values["AFG05"] = np.int64(7)
+        expected = {
+            "AFG01": 3,
+            "AFG02": True,
+            "AFG03": 2**70,
+            "AFG04": None,
+            "AFG05": np.int64(7),
+        }
+        assert values == expected
+        assert list(values.items()) == list(expected.items())
+        assert type(values["AFG02"]) is bool
+        assert type(values["AFG05"]) is np.int64
+        del values["AFG01"]
+        assert "AFG01" not in values
+        assert values.get("AFG01", "missing") == "missing"
+        assert list(values) == ["AFG02", "AFG03", "AFG04", "AFG05"]
+
+        floats = Values("testlevel", (("AFG02", 1.5), ("AFG01", -0.0)))
+        assert floats.data.typecode == "d"
+        assert list(floats.items()) == [("AFG02", 1.5), ("AFG01", -0.0)]
+        restored = pickle.loads(pickle.dumps(floats))
+        assert list(restored.items()) == list(floats.items())
+        ids = floats.index.get_ids(["AFG01", "AFG02", "AFG99"])
+        assert floats.take(ids) == [-0.0, 1.5, None]
+
+    def test_get_rows(self):
+        pcodes = [f"AF{i:04d}" for i in range(100)]
+        inputs = (
+            [{pcode: i for i, pcode in enumerate(pcodes) if i % 3}],
+            [
+                {pcode: i / 7 for i, pcode in enumerate(pcodes) if i % 2},
+                {pcode: str(i) for i, pcode in enumerate(pcodes[:50])},
+                dict(),
+            ],
+        )
+        row_fns = (lambda adm: adm[:2],)
+        headers = (["iso"], ["#country+code"])
+        rows = list()
+        for runner_class, scraper_class in (
+            (Runner, DictScraper),
+            (CheckpointRunner, CompactScraper),
+        ):
+            runner = runner_class(("AFG",), parse_date("2022-06-01"))
+            for i, values in enumerate(inputs):
+                runner.add_custom(scraper_class(f"scraper{i}", values))
+            rows.append(runner.get_rows("subnational", pcodes, headers, row_fns))
+        assert isinstance(
+            runner.get_scraper("scraper0").get_values("subnational")[0], Values
+        )
+        assert len(rows[0]) == 102
+        assert rows[1] == rows[0]
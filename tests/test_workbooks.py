@@ -0,0 +1,64 @@
+from os.path import join
+
+import pytest
+from hdx.scraper.framework.utilities.reader import Read
+from hdx.utilities.dateparse import parse_date
+from hdx.utilities.path import temp_dir
+from hdx.utilities.useragent import UserAgent
+from scrapers.utilities.configurable import CompiledConfigurableScraper
+from scrapers.utilities.shared_sources import SharedRead, SharedSources
+from scrapers.utilities.workbooks import WorkbookParser
+
+
+class TestWorkbooks:
+    @pytest.fixture(scope="function")
+    def readers(self):
+        UserAgent.set_global("test")
+        with temp_dir("TestWorkbooks") as temp_folder:
+            Read.create_readers(
+                temp_folder,
+                join("tests", "fixtures", "input"),
+                temp_folder,
+                save=False,
+                use_saved=True,
+                today=parse_date("2022-06-03"),
+            )
+            yield
+
+    @pytest.fixture(scope="function")
+    def scraper(self, readers):
+        datasetinfo = {
+            "url": "https://example.org/closures.xlsx",
+            "filename": "closure_duration_total_duration_of_school_closures.xlsx",
+            "format": "xlsx",
+            "admin": ["Country"],
+            "input": ["Duration of FULL and PARTIAL school closures (in weeks)"],
+            "output": ["Full Partial Closure Duration"],
+            "output_hxl": ["#impact+full_partial+weeks"],
+        }
+        return CompiledConfigurableScraper(
+            "closure_duration", datasetinfo, "national", ["AFG"]
+        )
+
+    def test_workbook_cache(self, scraper):
+        expected_headers, iterator = scraper.get_iterator()
+        expected_rows = list(iterator)
+
+        with temp_dir("TestWorkbookCache") as cache_folder:
+            for hits in (0, 1):
+                workbook_parser = WorkbookParser(cache_folder)
+                shared_sources = SharedSources(dict())
+                shared_sources.setup_readers(workbook_parser)
+                reader = scraper.get_reader()
+                reader.paths.paths = list()
+                try:
+                    headers, iterator = scraper.get_iterator()
+                    assert headers == expected_headers
+                    assert list(iterator) == expected_rows
+                    assert workbook_parser.cache.hits == hits
+                    # Counted once for the bytes saved by shared sources
+                    assert len(reader.paths.paths) == 1
+                finally:
+                    workbook_parser.close()
+                    shared_sources.close()
+                assert not isinstance(scraper.get_reader(), SharedRead)
@@ -0,0 +1,110 @@
+import pytest
+from hdx.location.country import Country
+from hdx.scraper.framework.base_scraper import BaseScraper
+from hdx.scraper.framework.outputs.base import BaseOutput
+from hdx.scraper.framework.utilities.reader import Read
+from hdx.utilities.dateparse import parse_date
+from hdx.utilities.path import temp_dir
+from hdx.utilities.useragent import UserAgent
+from scrapers.utilities.aggregation import add_aggregators
+from scrapers.utilities.checkpoint import CheckpointRunner
+from scrapers.utilities.writer import DirtyWriter
+
+
+class ValuesScraper(BaseScraper):
+    def __init__(self, name, hxltag, values):
+        super().__init__(
+            name,
+            {
+                "source": "Test",
+                "source_url": "https://example.org",
+                "source_date": parse_date("2022-06-01"),
+            },
+            {"national": ((hxltag,), (hxltag,))},
+        )
+        self.national_values = values
+
+    def run(self) -> None:
+        self.get_values("national")[0].update(self.national_values)
+
+
+class TabsOutput(BaseOutput):
+    def __init__(self):
+        super().__init__(list())
+        self.tabs = list()
+
+    def update_tab(self, tabname, values, hxltags=None, **kwargs):
+        self.tabs.append(tabname)
+
+
+class TestWriter:
+    @pytest.fixture(scope="function")
+    def today(self):
+        return parse_date("2022-06-03")
+
+    @pytest.fixture(scope="function")
+    def readers(self, today):
+        UserAgent.set_global("test")
+        with temp_dir("TestWriter") as temp_folder:
+            Read.create_readers(
+                temp_folder, temp_folder, temp_folder, False, False, today=today
+            )
+            yield
+
+    @pytest.fixture(scope="function")
+    def runner(self, readers, today):
+        Country.countriesdata(use_live=False)
+        runner = CheckpointRunner(["AFG", "MMR"], today)
+        runner.add_customs(
+            (
+                ValuesScraper("population", "#population", {"AFG": 10, "MMR": 20}),
+                ValuesScraper("inneed", "#affected+inneed", {"AFG": 1, "MMR": 2}),
+            )
+        )
+        adm_aggregation = {"AFG": ("ROAP", "GHO"), "MMR": ("ROAP", "GHO")}
+        add_aggregators(
+            runner,
+            True,
+            {"#population": {"action": "sum"}, "#affected+inneed": {"action": "sum"}},
+            "national",
+            "regional",
+            adm_aggregation,
+        )
+        runner.run()
+        return runner
+
+    def write(self, runner):
+        outputs = {"gsheets": TabsOutput(), "json": TabsOutput()}
+        writer = DirtyWriter(runner, outputs)
+        regional_rows = writer.get_regional_rows(
+            ["ROAP", "GHO"], names=["population_regional"]
+        )
+        writer.update_regional(regional_rows)
+        writer.update_national(["AFG", "MMR"], names=["population"])
+        writer.update_national(["AFG", "MMR"], names=["inneed"], tab="inneed")
+        writer.update_sources(names=["inneed"])
+        return writer, outputs
+
+    def test_dirty_writer(self, runner):
+        assert runner.changed == {"population", "inneed"}
+        writer, outputs = self.write(runner)
+        tabs = ["regional", "national", "inneed", "sources"]
+        assert outputs["gsheets"].tabs == tabs
+        assert outputs["json"].tabs == tabs
+
+        runner.changed = {"population"}
+        writer, outputs = self.write(runner)
+        assert writer.changed == {"population", "population_regional"}
+        assert outputs["gsheets"].tabs == ["regional", "national"]
+        assert outputs["json"].tabs == tabs
+
+        runner.changed = set()
+        writer, outputs = self.write(runner)
+        assert outputs["gsheets"].tabs == []
+        assert outputs["json"].tabs == tabs
+        regional_rows = writer.get_regional_rows(
+            ["ROAP", "GHO"], names=["population_regional"]
+        )
+        assert regional_rows.dirty is False
+        # Rows that are not from the writer are always published
+        assert writer.is_dirty_rows(list(regional_rows)) is True